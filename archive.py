@@ -0,0 +1,90 @@
+"""
+Archive tier for settled orders.
+
+Completed and cancelled orders older than a configurable age are moved, with
+their lines, from orders/order_items into archived_orders and
+archived_order_items. The live tables then only hold recent and pending
+orders, so the listings and every write stay fast however long the shop has
+been open. search_orders and get_order_by_id in database.py fall back to the
+archive when a search reaches back far enough. The sales rollup already
+holds the totals of every order, and its rebuild reads both tiers.
+
+Run it from the command line, e.g. nightly:
+
+    python manage.py archive-orders --older-than-days 90
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import select, insert, delete
+
+from models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+
+# Orders settled this many days after they were placed are archived by default
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# Payment statuses an order can no longer leave on its own; only these are archived
+SETTLED_STATUSES = ("completed", "cancelled")
+
+ORDER_FIELDS = [column.name for column in Order.__table__.columns]
+ORDER_ITEM_FIELDS = [column.name for column in ArchivedOrderItem.__table__.columns]
+
+
+def _archivable(cutoff: datetime, batch_size: int):
+    """
+    Ids of the oldest settled orders placed before `cutoff`, at most `batch_size`.
+
+    Orders and lines have AUTOINCREMENT ids (migration 6), so archiving the
+    newest ones never lets a new order or line reuse an archived id.
+    """
+    return (
+        select(Order.id)
+        .where(Order.payment_status.in_(SETTLED_STATUSES), Order.order_date < cutoff)
+        .order_by(Order.order_date, Order.id)
+        .limit(batch_size)
+    )
+
+
+def archive_orders(
+    engine,
+    older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS),
+    batch_size: int = 500,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Move settled orders placed more than `older_than` ago into the archive tables.
+
+    Orders move `batch_size` at a time, oldest first, each batch in its own
+    short transaction, so the job never holds the write lock for long and
+    can be interrupted and rerun at any point. `progress` is called with the
+    running total after each batch. Returns the number of orders archived.
+    """
+    cutoff = datetime.now() - older_than
+    archived = 0
+    while True:
+        with engine.begin() as connection:
+            order_ids = list(connection.scalars(_archivable(cutoff, batch_size)))
+            if not order_ids:
+                return archived
+
+            connection.execute(
+                insert(ArchivedOrder.__table__).from_select(
+                    ORDER_FIELDS,
+                    select(*(Order.__table__.c[name] for name in ORDER_FIELDS)).where(Order.id.in_(order_ids))
+                )
+            )
+            connection.execute(
+                insert(ArchivedOrderItem.__table__).from_select(
+                    ORDER_ITEM_FIELDS,
+                    select(*(OrderItem.__table__.c[name] for name in ORDER_ITEM_FIELDS))
+                    .where(OrderItem.order_id.in_(order_ids))
+                )
+            )
+            connection.execute(delete(OrderItem.__table__).where(OrderItem.order_id.in_(order_ids)))
+            connection.execute(delete(Order.__table__).where(Order.id.in_(order_ids)))
+
+        archived += len(order_ids)
+        if progress:
+            progress(archived)
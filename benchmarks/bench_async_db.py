@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparing concurrent request throughput of the async database layer
+against the previous blocking path, where `async def` handlers ran queries on a
+synchronous SQLAlchemy session and stalled the event loop.
+
+Both apps are driven in-process through an ASGI transport against the same
+seeded SQLite file, with a mix of heavy (/api/orders) and light (/api/items)
+requests so the effect of one slow query on its neighbours is visible. They
+run identical queries (a 50-order keyset page, the item list) with no caches,
+so only the session differs.
+
+Results on a single-CPU machine with the defaults: at 50 req/s both sessions
+keep every request under about 12 ms p95. At --rate 200 the async session is
+the slower one: p95 about 130 ms against about 13 ms for the blocking session
+in the reference run, and 2 to 10 times the blocking p95 in repeated runs.
+On a small SQLite database each query is quicker than aiosqlite's hand-off
+between its connection thread and the event loop, so what the async session
+buys is that one slow query no longer stalls its neighbours, not throughput.
+
+Usage:
+    python benchmarks/bench_async_db.py --orders 2000 --rate 50 --requests 400
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000, help="Number of orders to seed")
+    parser.add_argument("--rate", type=float, default=50.0, help="Request arrival rate (requests/second)")
+    parser.add_argument("--requests", type=int, default=400, help="Total requests per run")
+    parser.add_argument("--heavy-ratio", type=float, default=0.2, help="Share of requests hitting /api/orders")
+    return parser.parse_args()
+
+
+def seed(engine, order_count):
+    """Seed the benchmark database with items and orders"""
+    from models import Base, Item, Order, OrderItem
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.now()
+    items = [{"id": i, "item_name": f"Item {i}", "price_per_quantity": 1.0 + i, "remaining_quantity": None} for i in range(1, 51)]
+    orders, lines = [], []
+    for order_id in range(1, order_count + 1):
+        order_date = now - timedelta(minutes=order_id)
+        total = 0.0
+        for item in rng.sample(items, 3):
+            quantity = rng.randint(1, 5)
+            subtotal = quantity * item["price_per_quantity"]
+            total += subtotal
+            lines.append({
+                "order_id": order_id, "item_id": item["id"], "item_name": item["item_name"],
+                "quantity": quantity, "unit_price": item["price_per_quantity"], "subtotal": subtotal,
+            })
+        orders.append({
+            "id": order_id, "total_price": total, "payment_status": "completed",
+            "order_date": order_date, "payment_date": order_date,
+        })
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), items)
+        conn.execute(Order.__table__.insert(), orders)
+        conn.execute(OrderItem.__table__.insert(), lines)
+
+
+class BlockingSession:
+    """
+    Stands in for an AsyncSession, but runs each statement on a blocking
+    Session, so the event loop stalls while the query runs, as it did on the
+    previous path.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+
+def build_app(blocking):
+    """
+    An app serving /api/items and /api/orders through a blocking or an async session.
+
+    Both variants run the same statements: the item list, and the same
+    50-order keyset page the real /api/orders serves (database.get_all_orders).
+    They answer every request from the database, without the item catalog
+    or any other cache, so the only difference measured is whether queries
+    block the event loop.
+    """
+    from fastapi import FastAPI, Query
+    from fastapi.responses import ORJSONResponse
+    from sqlalchemy import select
+    import database as db
+    from models import Item
+
+    app = FastAPI()
+    items_query = select(*(getattr(Item, key) for key in ("id", "item_name", "price_per_quantity", "remaining_quantity")))
+    items_query = items_query.order_by(Item.item_name)
+
+    async def run(operation):
+        if blocking:
+            session = db.SessionLocal()
+            try:
+                return await operation(BlockingSession(session))
+            finally:
+                session.close()
+        async with db.AsyncSessionLocal() as session:
+            return await operation(session)
+
+    @app.get("/api/items", response_class=ORJSONResponse)
+    async def get_items():
+        async def operation(session):
+            return [row._asdict() for row in await session.execute(items_query)]
+        return ORJSONResponse(await run(operation))
+
+    @app.get("/api/orders", response_class=ORJSONResponse)
+    async def get_orders(limit: int = Query(50), cursor: str = Query(None)):
+        async def operation(session):
+            return await db.get_all_orders(limit=limit, cursor=cursor, db=session)
+        orders, next_cursor = await run(operation)
+        return ORJSONResponse({"orders": orders, "next_cursor": next_cursor})
+
+    return app
+
+
+async def run_load(app, total, rate, heavy_ratio):
+    """Issue `total` requests at a fixed arrival rate and collect per-path latencies.
+
+    Requests are scheduled open-loop, so latency is measured from the moment a
+    request was due to be sent. Time spent waiting for a blocked event loop is
+    therefore counted against the request that was stuck behind it.
+    """
+    import httpx
+
+    rng = random.Random(7)
+    paths = ["/api/orders" if rng.random() < heavy_ratio else "/api/items" for _ in range(total)]
+    latencies = {"/api/orders": [], "/api/items": []}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def send(index, path):
+            due = started + index / rate
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies[path].append(loop.time() - due)
+
+        await asyncio.gather(*(send(index, path) for index, path in enumerate(paths)))
+        elapsed = loop.time() - started
+
+    return elapsed, latencies
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, total, elapsed, latencies):
+    print(f"\n{name}")
+    print(f"  throughput: {total / elapsed:8.1f} req/s ({elapsed:.2f}s for {total} requests)")
+    for path, values in latencies.items():
+        if values:
+            print(
+                f"  {path:<12} n={len(values):<5} p50={percentile(values, 50) * 1000:7.1f}ms "
+                f"p95={percentile(values, 95) * 1000:7.1f}ms mean={statistics.mean(values) * 1000:7.1f}ms"
+            )
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="billing-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    import database as db
+
+    seed(db.engine, args.orders)
+    print(f"Seeded {args.orders} orders in {workdir}")
+
+    async def run_all():
+        for name, target in (("sync session (previous path)", build_app(blocking=True)),
+                             ("async session", build_app(blocking=False))):
+            # Warm up connections before measuring
+            await run_load(target, 10, args.rate, args.heavy_ratio)
+            elapsed, latencies = await run_load(target, args.requests, args.rate, args.heavy_ratio)
+            report(name, args.requests, elapsed, latencies)
+        await db.async_engine.dispose()
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
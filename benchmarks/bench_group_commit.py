@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Order creation throughput: commit per request vs. the group-commit write queue.
+
+Worker processes, like uvicorn workers, drive the app in-process through an
+ASGI transport against one seeded SQLite file. Their clients create orders
+(and add items to some of them) as fast as they can for a fixed time, once
+with every request committing on its own and once with WRITE_QUEUE_ENABLED,
+where each worker batches the writes of its clients into shared transactions.
+
+Reported per mode: orders created per second, request latency percentiles,
+failed requests (such as "database is locked" once busy_timeout runs out)
+and, for the write queue, the average number of writes per transaction.
+
+Usage:
+    python benchmarks/bench_group_commit.py --workers 2 --clients 16 --duration 10
+    python benchmarks/bench_group_commit.py --synchronous FULL   # fsync on every commit
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing the database file")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients per worker")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds each mode runs for")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="WRITE_QUEUE_WINDOW_MS for the write queue")
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLITE_SYNCHRONOUS for both modes")
+    # Internal: run as one worker process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def seed_database(path):
+    """Seed a small database whose items do not track stock, so no order is refused"""
+    import sqlite3
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    engine = create_engine(f"sqlite:///{path}")
+    populate(engine, item_count=50, order_count=1000, days=7, seed=1)
+    engine.dispose()
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE items SET remaining_quantity = NULL")
+        return [row[0] for row in connection.execute("SELECT id FROM items")]
+
+
+async def run_worker(args):
+    """Create orders until the time is up and print counts and latencies as JSON"""
+    import httpx
+    import metrics
+    from main import app
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    rng = random.Random(args.seed)
+    item_ids = json.loads(os.environ["BENCH_ITEM_IDS"])
+    latencies = []
+    counts = {"orders": 0, "items_added": 0, "failed": 0}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def post(url, payload):
+            started = time.perf_counter()
+            response = await client.post(url, json=payload)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                counts["failed"] += 1
+            return response
+
+        async def client_loop(deadline):
+            while time.time() < deadline:
+                lines = [{"item_id": item_id, "quantity": rng.randint(1, 3)}
+                         for item_id in rng.sample(item_ids, rng.randint(1, 4))]
+                response = await post("/api/create-order", {"items": lines, "payment_status": "pending"})
+                if response.status_code != 200:
+                    continue
+                counts["orders"] += 1
+                if rng.random() < 0.3:
+                    order_id = response.json()["order_id"]
+                    response = await post(f"/api/orders/{order_id}/items",
+                                          {"item_id": rng.choice(item_ids), "quantity": 1})
+                    if response.status_code == 200:
+                        counts["items_added"] += 1
+
+        await asyncio.sleep(max(0.0, args.start_at - time.time()))
+        deadline = time.time() + args.duration
+        await asyncio.gather(*(client_loop(deadline) for _ in range(args.clients)))
+
+    batch_sizes = metrics.WRITE_BATCH_SIZE._values.get((), [0.0])
+    counts["batches"] = sum(batch_sizes[:-1])
+    counts["batched_writes"] = batch_sizes[-1]
+    counts["latencies"] = latencies
+    print(json.dumps(counts))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def run_mode(args, db_path, item_ids, write_queue):
+    """Run every worker against a fresh copy of the seeded database and sum their results"""
+    workdir = tempfile.mkdtemp(prefix="bench_group_commit_")
+    path = os.path.join(workdir, "billing.db")
+    shutil.copy(db_path, path)
+
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", BENCH_ITEM_IDS=json.dumps(item_ids),
+               SQLITE_SYNCHRONOUS=args.synchronous, WRITE_QUEUE_ENABLED="1" if write_queue else "0",
+               WRITE_QUEUE_WINDOW_MS=str(args.window_ms))
+    env.pop("ASYNC_DATABASE_URL", None)
+    # Apply migrations once, before the workers race to start
+    subprocess.run([sys.executable, "-c", "import database"], cwd=ROOT, env=env, check=True)
+
+    start_at = time.time() + 3.0
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--start-at", str(start_at),
+             "--seed", str(index), "--clients", str(args.clients), "--duration", str(args.duration)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE,
+        )
+        for index in range(args.workers)
+    ]
+
+    total = {"orders": 0, "items_added": 0, "failed": 0, "batches": 0, "batched_writes": 0, "latencies": []}
+    for worker in workers:
+        output, _ = worker.communicate()
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        for key, value in result.items():
+            total[key] += value
+    shutil.rmtree(workdir, ignore_errors=True)
+    return total
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    if args.worker:
+        os.chdir(ROOT)
+        asyncio.run(run_worker(args))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_group_commit_seed_")
+    db_path = os.path.join(workdir, "billing.db")
+    item_ids = seed_database(db_path)
+
+    print(f"{args.workers} workers x {args.clients} clients for {args.duration:.0f} s per mode, "
+          f"synchronous={args.synchronous}, write queue window {args.window_ms:g} ms\n")
+    print(f"{'mode':<20} {'orders/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7} {'writes/txn':>11}")
+    for name, write_queue in (("commit per request", False), ("write queue", True)):
+        result = run_mode(args, db_path, item_ids, write_queue)
+        latencies = result["latencies"]
+        per_batch = f"{result['batched_writes'] / result['batches']:.1f}" if result["batches"] else "1.0"
+        print(f"{name:<20} {result['orders'] / args.duration:>9.1f} "
+              f"{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {result['failed']:>7} {per_batch:>11}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+HTTP benchmark suite for the FastAPI endpoints.
+
+For each database size the suite seeds a fresh SQLite file with
+populate_dummy_data.populate() and drives main.app in-process through an ASGI
+transport. Each size runs in its own worker process, because the app binds to
+its database when it is first imported. For every endpoint it measures
+latency percentiles with one client, then throughput with several concurrent
+clients.
+
+Endpoints covered: the home page, item listing, order listing, order search,
+order creation and the order item add / update / remove endpoints. The order
+search result cache is turned off, and search parameters vary per request,
+so searches are measured against the database.
+
+Results are written as JSON so runs can be compared across commits. Pass
+--baseline to compare against an earlier run; the suite exits with status 1
+if any endpoint's latency grows past --threshold or any request fails.
+
+The read endpoints can also be measured from pytest against the shared
+seeded database of conftest.py, see test_http.py.
+
+Usage:
+    python benchmarks/bench_http.py --sizes 1000 10000 100000 --output bench.json
+    python benchmarks/bench_http.py --baseline bench.json --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Read endpoints measured with GET, by name. Search parameters change with
+# every request: {item} cycles through the catalog and {day} through the
+# last SEARCH_DAYS days with orders.
+READ_ENDPOINTS = {
+    "GET /": "/",
+    "GET /api/items": "/api/items",
+    "GET /api/orders": "/api/orders?limit=50",
+    "GET /api/search-orders (status)": "/api/search-orders?status=pending&limit=50",
+    "GET /api/search-orders (item, by total)": "/api/search-orders?item_name={item}&sort_by=total_price&limit=50",
+    "GET /api/search-orders (date range)": "/api/search-orders?order_date_start={day}&order_date_end={day}&limit=50",
+}
+SEARCH_DAYS = 30
+
+
+# Seeded payment status mix: in a real shop only the orders being served are
+# still pending, which keeps the home page's pending queue realistic
+STATUS_MIX = {"pending": 0.002, "completed": 0.95, "cancelled": 0.048}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Order counts to seed")
+    parser.add_argument("--items", type=int, default=100, help="Items in each seeded catalog")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients in the throughput phase")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint before measuring")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative growth of --metric over the baseline (default: 0.25)")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"],
+                        help="Latency metric compared against the baseline")
+    # Internal: run the measurements for one size
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies, errors, throughput):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        "throughput_rps": round(throughput, 1),
+    }
+
+
+class Runner:
+    """Measures one endpoint: sequential latencies, then concurrent throughput"""
+
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+
+    async def call(self, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        return time.perf_counter() - started, response.status_code < 400, response
+
+    async def measure(self, make_request):
+        """`make_request(i)` returns (method, url, kwargs) for the i-th request"""
+        count = self.args.requests
+        for i in range(self.args.warmup):
+            method, url, kwargs = make_request(count * 2 + i)
+            await self.call(method, url, **kwargs)
+
+        latencies, errors = [], 0
+        for i in range(count):
+            method, url, kwargs = make_request(i)
+            elapsed, ok, _ = await self.call(method, url, **kwargs)
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+        # Throughput: the same number of requests again, spread over concurrent clients
+        queue = list(range(count, count * 2))
+
+        async def client_loop():
+            nonlocal errors
+            while queue:
+                method, url, kwargs = make_request(queue.pop())
+                _, ok, _ = await self.call(method, url, **kwargs)
+                errors += 0 if ok else 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(self.args.concurrency)))
+        throughput = count / (time.perf_counter() - started)
+
+        return summarize(latencies, errors, throughput)
+
+
+async def run_endpoints(app, args, writes=True):
+    """
+    Measure every endpoint of `app`, and return the results by endpoint name.
+
+    With `writes` false only READ_ENDPOINTS are measured, leaving the
+    database unchanged apart from restocking.
+    """
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        runner = Runner(client, args)
+
+        # Make sure stock never runs out during the write phases
+        await client.post("/api/restock-all")
+        items = (await client.get("/api/items")).json()
+        newest = (await client.get("/api/orders?limit=1")).json()["orders"][0]["order_date"][:10]
+        days = [(date.fromisoformat(newest) - timedelta(days=offset)).isoformat() for offset in range(SEARCH_DAYS)]
+
+        def search_params(i):
+            return {"item": quote(items[i % len(items)]["item_name"]), "day": days[i % len(days)]}
+
+        for name, url in READ_ENDPOINTS.items():
+            results[name] = await runner.measure(lambda i, url=url: ("GET", url.format(**search_params(i)), {}))
+
+        if not writes:
+            return results
+
+        # Order creation; the orders created here are edited below
+        created = []
+
+        def create_request(i):
+            lines = [{"item_id": items[(i + offset) % len(items)]["id"], "quantity": 1} for offset in range(3)]
+            return "POST", "/api/create-order", {"json": {"items": lines, "payment_status": "pending"}}
+
+        async def record_created(method, url, **kwargs):
+            elapsed, ok, response = await original_call(method, url, **kwargs)
+            if ok:
+                created.append(response.json()["order_id"])
+            return elapsed, ok, response
+
+        original_call = runner.call
+        runner.call = record_created
+        results["POST /api/create-order"] = await runner.measure(create_request)
+        runner.call = original_call
+
+        # Add an item that is not on the order yet, so every add creates a new line
+        def add_request(i):
+            item = items[(i + 3) % len(items)]
+            return "POST", f"/api/orders/{created[i % len(created)]}/items", {"json": {"item_id": item["id"], "quantity": 1}}
+
+        results["POST /api/orders/{id}/items"] = await runner.measure(add_request)
+
+        # Look up the lines added above (not measured) to update and then remove them
+        added_lines = []
+        for order_id in created:
+            lines = (await client.get(f"/api/orders/{order_id}/items")).json()
+            added_lines += [(order_id, line["id"]) for line in lines[3:]]
+
+        def update_request(i):
+            order_id, line_id = added_lines[i % len(added_lines)]
+            return "PUT", f"/api/orders/{order_id}/items/{line_id}", {"json": {"quantity": 2 + i % 3}}
+
+        results["PUT /api/orders/{id}/items/{line}"] = await runner.measure(update_request)
+
+        def remove_request(i):
+            order_id, line_id = added_lines.pop()
+            return "DELETE", f"/api/orders/{order_id}/items/{line_id}", {}
+
+        # Each removal consumes a line, so only measure as many as were added
+        runs = len(added_lines) // 2 - args.warmup
+        saved = args.requests
+        args.requests = max(1, min(args.requests, runs))
+        results["DELETE /api/orders/{id}/items/{line}"] = await runner.measure(remove_request)
+        args.requests = saved
+
+    return results
+
+
+def run_worker(args):
+    """Worker process: seed one size, run the measurements and print them as JSON"""
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    workdir = tempfile.mkdtemp(prefix="bench_http_")
+    db_path = os.path.join(workdir, "billing.db")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    populate(engine, item_count=args.items, order_count=args.worker, days=365, status_mix=STATUS_MIX, seed=42)
+    engine.dispose()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # Measure the queries, not the per-worker search result cache
+    os.environ["SEARCH_CACHE_ENTRIES"] = "0"
+    os.chdir(ROOT)
+
+    from main import app
+    print(json.dumps(asyncio.run(run_endpoints(app, args))))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, metric, threshold):
+    """Return a description of every endpoint that regressed past the threshold"""
+    regressions = []
+    for size, endpoints in current["results"].items():
+        for name, result in endpoints.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before or before.get(metric) is None or result.get(metric) is None:
+                continue
+            if result[metric] > before[metric] * (1 + threshold):
+                change = result[metric] / before[metric] - 1
+                regressions.append(
+                    f"{size} orders, {name}: {metric} {before[metric]:.2f} -> {result[metric]:.2f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    if args.worker is not None:
+        run_worker(args)
+        return
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "items": args.items,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "results": {},
+    }
+
+    for size in args.sizes:
+        print(f"\n{size:,} orders")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(size), "--items", str(args.items),
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--warmup", str(args.warmup)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if output.returncode != 0:
+            print(output.stderr, file=sys.stderr)
+            sys.exit(f"Benchmark worker for {size} orders failed")
+
+        results = json.loads(output.stdout.strip().splitlines()[-1])
+        report["results"][str(size)] = results
+
+        print(f"  {'endpoint':<42} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'errors':>7}")
+        for name, r in results.items():
+            print(f"  {name:<42} {r['p50_ms']:>6.1f}ms {r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms "
+                  f"{r['throughput_rps']:>8.1f} {r['errors']:>7}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    failures = [
+        f"{size} orders, {name}: {r['errors']} failed requests"
+        for size, endpoints in report["results"].items()
+        for name, r in endpoints.items()
+        if r["errors"]
+    ]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures += compare(report, baseline, args.metric, args.threshold)
+        print(f"Compared {args.metric} against {args.baseline} (commit {baseline.get('commit')}), "
+              f"threshold +{args.threshold:.0%}")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
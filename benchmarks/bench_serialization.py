@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the order list serialization path behind /api/orders and
+/api/search-orders.
+
+The previous path loaded Order objects with their order_items through
+selectinload, validated every order and line into Pydantic models, wrapped
+them in an OrderPage and let FastAPI run jsonable_encoder and json.dumps over
+the result. The current path selects only the needed columns as row tuples,
+groups the lines by order_id in one pass and encodes the dicts with orjson.
+
+Both paths run in-process against the same seeded SQLite file and are timed
+from query to JSON bytes, per page size. Both must produce the same orders.
+
+Usage:
+    python benchmarks/bench_serialization.py --orders 20000 --limits 50 200 500 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000, help="Number of orders to seed")
+    parser.add_argument("--items", type=int, default=100, help="Items in the seeded catalog")
+    parser.add_argument("--limits", type=int, nargs="+", default=[50, 200, 500], help="Page sizes to measure")
+    parser.add_argument("--repeat", type=int, default=20, help="Measured runs per page size and path")
+    return parser.parse_args()
+
+
+async def previous_path(db, limit):
+    """Recreate the previous path: ORM rows, Pydantic models, jsonable_encoder, json.dumps"""
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from models import Order
+    from schemas import OrderItemResponse, OrderPage, OrderResponse
+
+    rows = (await db.execute(
+        select(Order).options(selectinload(Order.order_items))
+        .order_by(Order.order_date.desc(), Order.id.desc()).limit(limit)
+    )).scalars().all()
+    orders = []
+    for order in rows:
+        response = OrderResponse.model_validate(order)
+        response.items = [OrderItemResponse.model_validate(line) for line in order.order_items]
+        orders.append(response)
+    page = OrderPage(orders=orders, next_cursor=None)
+    return json.dumps(jsonable_encoder(page), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+async def current_path(db, limit):
+    """The current path: column rows grouped into dicts, encoded by orjson"""
+    import orjson
+    import database
+
+    orders, _ = await database._fetch_order_page(db, database._order_columns_query(), limit, None)
+    return orjson.dumps({"orders": orders, "next_cursor": None})
+
+
+def normalized(body):
+    """Decoded orders with lines in id order, to compare the two paths' output"""
+    orders = json.loads(body)["orders"]
+    for order in orders:
+        order["items"].sort(key=lambda line: line["id"])
+    return orders
+
+
+async def measure(path, limit, repeat):
+    from database import AsyncSessionLocal
+
+    timings, body = [], None
+    for run in range(repeat + 1):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            body = await path(db, limit)
+            elapsed = time.perf_counter() - started
+        # The first run warms the caches and is not measured
+        if run:
+            timings.append(elapsed)
+    return timings, body
+
+
+async def run(args):
+    print(f"{args.orders:,} orders, {args.repeat} runs per page size\n")
+    print(f"  {'limit':>6} {'previous p50':>13} {'current p50':>12} {'speedup':>8} {'bytes':>9}")
+    for limit in args.limits:
+        before, before_body = await measure(previous_path, limit, args.repeat)
+        after, after_body = await measure(current_path, limit, args.repeat)
+        if normalized(before_body) != normalized(after_body):
+            sys.exit(f"The two paths returned different orders for limit {limit}")
+
+        before_ms = statistics.median(before) * 1000
+        after_ms = statistics.median(after) * 1000
+        print(f"  {limit:>6} {before_ms:>11.2f}ms {after_ms:>10.2f}ms {before_ms / after_ms:>7.1f}x "
+              f"{len(after_body):>9,}")
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    workdir = tempfile.mkdtemp(prefix="bench_serialization_")
+    db_path = os.path.join(workdir, "billing.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    populate(engine, item_count=args.items, order_count=args.orders, days=365, seed=42)
+    engine.dispose()
+
+    # The app binds to its database when database.py is first imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.chdir(ROOT)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
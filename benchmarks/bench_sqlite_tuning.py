@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark of mixed read/write throughput under SQLite's default settings and
+under the tuning profile applied by database.py (WAL, synchronous=NORMAL,
+busy_timeout, larger cache, mmap, foreign keys).
+
+Each profile runs against its own copy of one seeded database file. Several
+worker processes, like uvicorn workers, drive the app in-process through an
+ASGI transport at the same time. Each worker runs concurrent clients that
+mix order listings, order searches and item reads with order creation and
+payment updates. Reported per profile: successful requests per second,
+failed requests (e.g. "database is locked"), and read and write latency
+percentiles.
+
+Usage:
+    python benchmarks/bench_sqlite_tuning.py --workers 4 --clients 8 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment for each profile. The baseline leaves every PRAGMA at SQLite's
+# default except journal_mode, which is stored in the file and so has to be
+# set back to the rollback journal explicitly.
+PROFILES = {
+    "baseline": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "",
+        "SQLITE_BUSY_TIMEOUT_MS": "",
+        "SQLITE_CACHE_SIZE": "",
+        "SQLITE_MMAP_SIZE": "",
+        "SQLITE_TEMP_STORE": "",
+        "SQLITE_FOREIGN_KEYS": "",
+    },
+    "tuned": {},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000, help="Number of orders to seed")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes sharing the database file")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients per worker")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each profile")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of requests that write")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=["baseline", "tuned"])
+    # Internal: run as one worker process of a profile
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def seed_database(path, order_count):
+    """
+    Seed a database file with items and orders, without importing the app.
+
+    Items do not track stock, so no order creation is refused however long
+    the run.
+    """
+    import sqlite3
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    engine = create_engine(f"sqlite:///{path}")
+    populate(engine, item_count=50, order_count=order_count, days=30, seed=1)
+    engine.dispose()
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE items SET remaining_quantity = NULL")
+
+
+async def run_worker(args):
+    """Drive the app with concurrent mixed clients and print the results as JSON"""
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results = {"read": [], "write": [], "errors": 0}
+    rng = random.Random(args.seed)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        items = (await client.get("/api/items")).json()
+        pending = []
+
+        async def request(kind, method, url, **kwargs):
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                results["errors"] += 1
+            else:
+                results[kind].append(elapsed)
+            return response
+
+        async def client_loop(deadline):
+            while time.time() < deadline:
+                if rng.random() < args.write_ratio:
+                    if pending and rng.random() < 0.5:
+                        await request("write", "POST", f"/api/update-payment-status/{pending.pop()}")
+                    else:
+                        lines = [{"item_id": item["id"], "quantity": rng.randint(1, 3)} for item in rng.sample(items, 2)]
+                        response = await request("write", "POST", "/api/create-order",
+                                                 json={"items": lines, "payment_status": "pending"})
+                        if response.status_code == 200:
+                            pending.append(response.json()["order_id"])
+                else:
+                    choice = rng.random()
+                    if choice < 0.4:
+                        await request("read", "GET", "/api/orders?limit=50")
+                    elif choice < 0.8:
+                        await request("read", "GET", "/api/search-orders?status=pending&limit=50")
+                    else:
+                        await request("read", "GET", f"/api/items/{rng.choice(items)['id']}")
+
+        await asyncio.sleep(max(0.0, args.start_at - time.time()))
+        deadline = time.time() + args.duration
+        await asyncio.gather(*(client_loop(deadline) for _ in range(args.clients)))
+
+    print(json.dumps(results))
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_profile(name, seeded_path, args):
+    """Run all workers of one profile against a fresh copy of the seeded database"""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    db_path = os.path.join(workdir, "billing.db")
+    shutil.copy(seeded_path, db_path)
+
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", **PROFILES[name])
+    env.pop("ASYNC_DATABASE_URL", None)
+
+    # Apply migrations and the journal mode once, before the workers race to start
+    subprocess.run([sys.executable, "-c", "import database"], cwd=ROOT, env=env, check=True)
+
+    start_at = time.time() + 3.0
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--start-at", str(start_at),
+             "--seed", str(index), "--clients", str(args.clients), "--duration", str(args.duration),
+             "--write-ratio", str(args.write_ratio)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE,
+        )
+        for index in range(args.workers)
+    ]
+
+    reads, writes, errors = [], [], 0
+    for worker in workers:
+        output, _ = worker.communicate()
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        reads += result["read"]
+        writes += result["write"]
+        errors += result["errors"]
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "profile": name,
+        "throughput": (len(reads) + len(writes)) / args.duration,
+        "reads": len(reads),
+        "writes": len(writes),
+        "errors": errors,
+        "read_p50": statistics.median(reads) if reads else float("nan"),
+        "read_p95": percentile(reads, 0.95),
+        "write_p50": statistics.median(writes) if writes else float("nan"),
+        "write_p95": percentile(writes, 0.95),
+    }
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    if args.worker:
+        os.chdir(ROOT)
+        asyncio.run(run_worker(args))
+        return
+
+    seeded_dir = tempfile.mkdtemp(prefix="bench_seed_")
+    seeded_path = os.path.join(seeded_dir, "billing.db")
+    print(f"Seeding {args.orders} orders...")
+    seed_database(seeded_path, args.orders)
+
+    print(f"{args.workers} workers x {args.clients} clients, {args.duration:.0f}s per profile, "
+          f"{args.write_ratio:.0%} writes\n")
+    print(f"{'profile':<10} {'ok req/s':>9} {'reads':>7} {'writes':>7} {'errors':>7} "
+          f"{'read p50':>9} {'read p95':>9} {'write p50':>10} {'write p95':>10}")
+    for name in args.profiles:
+        r = run_profile(name, seeded_path, args)
+        print(f"{r['profile']:<10} {r['throughput']:>9.1f} {r['reads']:>7} {r['writes']:>7} {r['errors']:>7} "
+              f"{r['read_p50'] * 1000:>7.1f}ms {r['read_p95'] * 1000:>7.1f}ms "
+              f"{r['write_p50'] * 1000:>8.1f}ms {r['write_p95'] * 1000:>8.1f}ms")
+
+    shutil.rmtree(seeded_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Shared pytest fixtures for performance tests.
+
+The database is generated once per test session with populate_dummy_data.populate().
+Its size comes from environment variables, so the same tests can run against a
+small database locally and a large one on a benchmark machine:
+
+    BENCH_ITEMS=200 BENCH_ORDERS=500000 BENCH_STATUS_MIX=pending=1,completed=95,cancelled=4 pytest benchmarks/
+
+The app binds its engines to DATABASE_URL when the database module is first
+imported, so the `app` fixture must run before anything else imports it. The
+fixtures change sys.path, the environment and the working directory only for
+the test session, and undo it afterwards.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def project_root():
+    """The project directory, importable for the test session"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.syspath_prepend(ROOT)
+        yield ROOT
+
+
+@pytest.fixture(scope="session")
+def bench_settings(project_root):
+    """
+    Shape of the seeded database, from BENCH_ITEMS, BENCH_ORDERS, BENCH_DAYS,
+    BENCH_STATUS_MIX and BENCH_SEED. By default, as in a real shop, only the
+    orders being served are still pending, like bench_http.py seeds them.
+    """
+    from populate_dummy_data import parse_status_mix
+
+    return {
+        "item_count": int(os.getenv("BENCH_ITEMS", "100")),
+        "order_count": int(os.getenv("BENCH_ORDERS", "10000")),
+        "days": int(os.getenv("BENCH_DAYS", "90")),
+        "status_mix": parse_status_mix(os.getenv("BENCH_STATUS_MIX", "pending=0.2,completed=95,cancelled=4.8")),
+        "seed": int(os.getenv("BENCH_SEED", "42")),
+    }
+
+
+@pytest.fixture(scope="session")
+def seeded_database(tmp_path_factory, bench_settings):
+    """Path of a SQLite file filled with BENCH_ORDERS orders (default 10000) over BENCH_ITEMS items"""
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    path = tmp_path_factory.mktemp("billing") / "billing.db"
+    engine = create_engine(f"sqlite:///{path}")
+    populate(engine, **bench_settings)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture(scope="session")
+def app(seeded_database, project_root):
+    """The FastAPI app bound to the seeded database"""
+    database_url = f"sqlite:///{seeded_database}"
+    database = sys.modules.get("database")
+    if database is not None and database.DATABASE_URL != database_url:
+        pytest.fail(f"database was imported before the fixture, bound to {database.DATABASE_URL}")
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("DATABASE_URL", database_url)
+        patch.delenv("ASYNC_DATABASE_URL", raising=False)
+        # Measure the queries, not the per-worker search result cache
+        patch.setenv("SEARCH_CACHE_ENTRIES", "0")
+        # Templates and static files are looked up relative to the project
+        patch.chdir(project_root)
+
+        from main import app
+        yield app
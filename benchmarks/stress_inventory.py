@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for stock keeping.
+
+Several worker processes, like uvicorn workers, drive the app in-process
+through an ASGI transport against one seeded SQLite file. Their clients race
+for a few scarce items: creating orders, adding items to pending orders,
+raising and lowering line quantities, removing lines and cancelling orders,
+until the stock is gone or the time is up.
+
+Afterwards the database is checked:
+  - no item has negative stock
+  - for every item, the initial stock equals the remaining stock plus the
+    units on the lines of orders created by the test that are not cancelled,
+    so nothing was oversold and no restored unit was lost
+
+Requests refused for lack of stock are expected. Server errors (such as
+"database is locked" when the machine is overloaded) are reported; their
+transactions roll back, so the stock checks must hold regardless. Exits with
+status 1 if a stock check fails.
+
+Usage:
+    python benchmarks/stress_inventory.py --workers 2 --clients 4 --stock 200
+
+test_stress_inventory.py runs a scaled-down race under pytest.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes sharing the database file")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent clients per worker")
+    parser.add_argument("--items", type=int, default=3, help="Number of scarce items raced for")
+    parser.add_argument("--stock", type=int, default=200, help="Initial stock of each scarce item")
+    parser.add_argument("--duration", type=float, default=20.0, help="Give up after this many seconds")
+    # Internal: run as one worker process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def seed_database(path, args):
+    """Seed a small database and set the stock of the first `args.items` items"""
+    from sqlalchemy import create_engine
+    from populate_dummy_data import populate
+
+    engine = create_engine(f"sqlite:///{path}")
+    populate(engine, item_count=10, order_count=100, days=7, seed=1)
+    engine.dispose()
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE items SET remaining_quantity = ? WHERE id <= ?", (args.stock, args.items))
+        last_order_id = connection.execute("SELECT max(id) FROM orders").fetchone()[0]
+    return list(range(1, args.items + 1)), last_order_id
+
+
+async def run_worker(args):
+    """Race for the scarce items and print the response counts as JSON"""
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    rng = random.Random(args.seed)
+    scarce = list(range(1, args.items + 1))
+    outcomes = Counter()
+    sold_out = set()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+
+        async def request(action, method, url, **kwargs):
+            response = await client.request(method, url, **kwargs)
+            if response.status_code < 400:
+                outcomes[f"{action} ok"] += 1
+            elif "stock" in response.text.lower():
+                outcomes[f"{action} out of stock"] += 1
+            elif response.status_code < 500:
+                outcomes[f"{action} refused"] += 1
+            else:
+                outcomes[f"{action} failed {response.status_code}"] += 1
+            return response
+
+        async def client_loop(deadline):
+            orders = []
+            while time.time() < deadline and len(sold_out) < len(scarce):
+                item_id = rng.choice(scarce)
+                choice = rng.random()
+                if not orders or choice < 0.4:
+                    lines = [{"item_id": item_id, "quantity": rng.randint(1, 3)}]
+                    response = await request("create", "POST", "/api/create-order",
+                                             json={"items": lines, "payment_status": "pending"})
+                    if response.status_code == 200:
+                        orders.append(response.json()["order_id"])
+                    elif response.status_code == 400:
+                        sold_out.add(item_id)
+                    continue
+
+                order_id = rng.choice(orders)
+                if choice < 0.6:
+                    await request("add", "POST", f"/api/orders/{order_id}/items",
+                                  json={"item_id": item_id, "quantity": rng.randint(1, 2)})
+                    continue
+
+                # Removing the last line deletes the order
+                response = await client.get(f"/api/orders/{order_id}/items")
+                lines = response.json() if response.status_code == 200 else []
+                if not lines:
+                    orders.remove(order_id)
+                    continue
+                line = rng.choice(lines)
+                if choice < 0.8:
+                    quantity = max(1, line["quantity"] + rng.choice([-2, -1, 1, 2, 3]))
+                    await request("update", "PUT", f"/api/orders/{order_id}/items/{line['id']}",
+                                  json={"quantity": quantity})
+                elif choice < 0.9:
+                    await request("remove", "DELETE", f"/api/orders/{order_id}/items/{line['id']}")
+                else:
+                    await request("cancel", "POST", f"/api/cancel-order/{order_id}")
+                    orders.remove(order_id)
+
+        await asyncio.sleep(max(0.0, args.start_at - time.time()))
+        deadline = time.time() + args.duration
+        await asyncio.gather(*(client_loop(deadline) for _ in range(args.clients)))
+
+    print(json.dumps(outcomes))
+
+
+def check_stock(path, scarce, initial_stock, last_order_id):
+    """Return a description of every broken stock invariant"""
+    problems = []
+    with sqlite3.connect(path) as connection:
+        for item_id in scarce:
+            remaining = connection.execute(
+                "SELECT remaining_quantity FROM items WHERE id = ?", (item_id,)
+            ).fetchone()[0]
+            sold = connection.execute(
+                "SELECT coalesce(sum(order_items.quantity), 0) FROM order_items JOIN orders ON orders.id = order_items.order_id "
+                "WHERE order_items.item_id = ? AND orders.id > ? AND orders.payment_status != 'cancelled'",
+                (item_id, last_order_id),
+            ).fetchone()[0]
+            print(f"  item {item_id}: {remaining} left, {sold} sold, {initial_stock} at start")
+            if remaining < 0:
+                problems.append(f"item {item_id} has negative stock ({remaining})")
+            if remaining + sold != initial_stock:
+                problems.append(f"item {item_id}: {remaining} left + {sold} sold != {initial_stock} at start")
+    return problems
+
+
+def race(args, db_path):
+    """
+    Seed `db_path` and run `args.workers` worker processes against it.
+
+    Returns the summed response counts, the ids of the scarce items and the
+    last seeded order id, for check_stock.
+    """
+    scarce, last_order_id = seed_database(db_path, args)
+
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    env.pop("ASYNC_DATABASE_URL", None)
+    # Apply migrations once, before the workers race to start
+    subprocess.run([sys.executable, "-c", "import database"], cwd=ROOT, env=env, check=True)
+
+    start_at = time.time() + 3.0
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--start-at", str(start_at),
+             "--seed", str(index), "--clients", str(args.clients), "--items", str(args.items),
+             "--duration", str(args.duration)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE,
+        )
+        for index in range(args.workers)
+    ]
+
+    outcomes = Counter()
+    for worker in workers:
+        output, _ = worker.communicate()
+        outcomes.update(json.loads(output.decode().strip().splitlines()[-1]))
+    return outcomes, scarce, last_order_id
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    if args.worker:
+        os.chdir(ROOT)
+        asyncio.run(run_worker(args))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="stress_inventory_")
+    db_path = os.path.join(workdir, "billing.db")
+    print(f"{args.workers} workers x {args.clients} clients racing for {args.items} items "
+          f"with {args.stock} units each")
+    outcomes, scarce, last_order_id = race(args, db_path)
+
+    print("\nResponses:")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<28} {count:>6}")
+
+    print("\nStock:")
+    problems = check_stock(db_path, scarce, args.stock, last_order_id)
+    failed = sum(count for outcome, count in outcomes.items() if " failed " in outcome)
+    if failed:
+        print(f"\nWarning: {failed} requests failed with server errors")
+
+    if problems:
+        print("\nFAILED:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Order creation is all or nothing: an order that cannot be fulfilled in full
+writes no order, no lines and takes no stock.
+
+    pytest benchmarks/test_create_order.py
+"""
+
+import sqlite3
+
+from test_seeded_app import with_client
+
+
+def database_state(path):
+    """Order and line counts, and the stock of every item"""
+    with sqlite3.connect(path) as connection:
+        return (
+            connection.execute("SELECT count(*) FROM orders").fetchone()[0],
+            connection.execute("SELECT count(*) FROM order_items").fetchone()[0],
+            dict(connection.execute("SELECT id, remaining_quantity FROM items").fetchall()),
+        )
+
+
+def test_order_with_a_short_item_writes_nothing(app, seeded_database):
+    before = database_state(seeded_database)
+    first, second = [item_id for item_id, stock in before[2].items() if stock][:2]
+
+    async def create(client):
+        # The first line can be served, the second asks for one unit more than is left
+        lines = [{"item_id": first, "quantity": 1}, {"item_id": second, "quantity": before[2][second] + 1}]
+        return await client.post("/api/create-order", json={"items": lines, "payment_status": "pending"})
+
+    response = with_client(app, create)
+    assert response.status_code == 400
+    assert "Not enough stock" in response.json()["detail"]
+    assert database_state(seeded_database) == before
+
+
+def test_order_with_a_missing_item_writes_nothing(app, seeded_database):
+    before = database_state(seeded_database)
+    first = next(item_id for item_id, stock in before[2].items() if stock)
+
+    async def create(client):
+        lines = [{"item_id": first, "quantity": 1}, {"item_id": max(before[2]) + 1, "quantity": 1}]
+        return await client.post("/api/create-order", json={"items": lines, "payment_status": "pending"})
+
+    response = with_client(app, create)
+    assert response.status_code == 404
+    assert database_state(seeded_database) == before
@@ -0,0 +1,36 @@
+"""
+Latency of the read endpoints against the shared seeded database.
+
+Runs the measurements of bench_http.py on the `app` fixture. Write endpoints
+are left to bench_http.py, which seeds a database per size, so the shared
+database stays as seeded for the other tests. Results are printed (use -s);
+set BENCH_P95_BUDGET_MS to also fail when an endpoint's p95 latency exceeds it:
+
+    BENCH_ORDERS=100000 BENCH_P95_BUDGET_MS=50 pytest benchmarks/test_http.py -s
+"""
+
+import argparse
+import asyncio
+import os
+
+from bench_http import READ_ENDPOINTS, run_endpoints
+
+
+def test_read_endpoints(app):
+    args = argparse.Namespace(
+        requests=int(os.getenv("BENCH_REQUESTS", "50")),
+        concurrency=int(os.getenv("BENCH_CONCURRENCY", "8")),
+        warmup=5,
+    )
+    results = asyncio.run(run_endpoints(app, args, writes=False))
+
+    print()
+    for name, r in results.items():
+        print(f"  {name:<42} p50 {r['p50_ms']:>6.1f}ms  p95 {r['p95_ms']:>6.1f}ms  {r['throughput_rps']:>7.1f} req/s")
+
+    assert set(results) == set(READ_ENDPOINTS)
+    assert {name: r["errors"] for name, r in results.items() if r["errors"]} == {}
+
+    budget = os.getenv("BENCH_P95_BUDGET_MS")
+    if budget:
+        assert {name: r["p95_ms"] for name, r in results.items() if r["p95_ms"] > float(budget)} == {}
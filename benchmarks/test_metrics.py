@@ -0,0 +1,22 @@
+"""
+Request metrics are labelled with the route template that served the
+request, including mounted apps such as the static files.
+
+    pytest benchmarks/test_metrics.py
+"""
+
+from test_seeded_app import with_client
+
+
+def test_requests_are_labelled_with_their_route(app):
+    async def fetch(client):
+        assert (await client.get("/static/css/styles.css")).status_code == 200
+        assert (await client.get("/api/orders", params={"limit": 1})).status_code == 200
+        assert (await client.get("/no/such/page")).status_code == 404
+        return (await client.get("/metrics")).text
+
+    lines = with_client(app, fetch).splitlines()
+    counted = {line.split(" ")[0] for line in lines if line.startswith("http_requests_total{")}
+    assert 'http_requests_total{method="GET",route="/static",status="200"}' in counted
+    assert 'http_requests_total{method="GET",route="/api/orders",status="200"}' in counted
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in counted
@@ -0,0 +1,47 @@
+"""
+Order search sorts in SQL across pages: walking every page of a search with
+a cursor returns the matching orders exactly once, in the order the database
+sorts them on (sort value, id).
+
+    pytest benchmarks/test_search_sort.py
+"""
+
+import sqlite3
+
+import pytest
+
+from test_seeded_app import with_client
+
+# The expected order of the cancelled orders for each sort, straight from SQLite
+EXPECTED = {
+    "total_price": "SELECT id FROM orders WHERE payment_status = 'cancelled' ORDER BY total_price {0}, id {0}",
+    "order_date": "SELECT id FROM orders WHERE payment_status = 'cancelled' ORDER BY order_date {0}, id {0}",
+    "quantity": (
+        "SELECT orders.id FROM orders JOIN "
+        "(SELECT order_id, sum(quantity) AS quantity FROM order_items GROUP BY order_id) lines "
+        "ON lines.order_id = orders.id "
+        "WHERE payment_status = 'cancelled' ORDER BY lines.quantity {0}, orders.id {0}"
+    ),
+}
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", sorted(EXPECTED))
+def test_search_pages_follow_the_sql_sort(app, seeded_database, sort_by, sort_order):
+    async def walk(client):
+        order_ids, cursor = [], None
+        while True:
+            params = {"status": "cancelled", "sort_by": sort_by, "sort_order": sort_order, "limit": 50}
+            response = await client.get("/api/search-orders", params={**params, **({"cursor": cursor} if cursor else {})})
+            response.raise_for_status()
+            page = response.json()
+            order_ids += [order["id"] for order in page["orders"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return order_ids
+
+    with sqlite3.connect(seeded_database) as connection:
+        expected = [row[0] for row in connection.execute(EXPECTED[sort_by].format(sort_order.upper()))]
+
+    assert len(expected) > 50
+    assert with_client(app, walk) == expected
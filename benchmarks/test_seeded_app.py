@@ -0,0 +1,61 @@
+"""
+Sanity checks for the shared fixtures: the seeded database has the requested
+size and is consistent, and the app fixture serves it. The performance tests
+rely on both.
+
+    pytest benchmarks/test_seeded_app.py
+"""
+
+import asyncio
+import sqlite3
+
+import httpx
+
+
+def with_client(app, session):
+    """Run `session(client)` with an HTTP client calling the app in-process, and return its result"""
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await session(client)
+
+    return asyncio.run(run())
+
+
+def test_seeded_database_has_requested_size(seeded_database, bench_settings):
+    with sqlite3.connect(seeded_database) as connection:
+        assert connection.execute("SELECT count(*) FROM items").fetchone()[0] == bench_settings["item_count"]
+        assert connection.execute("SELECT count(*) FROM orders").fetchone()[0] == bench_settings["order_count"]
+        # Every order has lines, and its total is the sum of their subtotals
+        mismatched = connection.execute(
+            "SELECT count(*) FROM orders o LEFT JOIN "
+            "(SELECT order_id, sum(subtotal) AS total FROM order_items GROUP BY order_id) l ON l.order_id = o.id "
+            "WHERE l.total IS NULL OR abs(l.total - o.total_price) > 0.005"
+        ).fetchone()[0]
+        assert mismatched == 0
+
+
+def test_app_pages_through_every_seeded_order(app, bench_settings):
+    async def walk(client):
+        order_ids, cursor = [], None
+        while True:
+            params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/api/orders", params=params)).json()
+            order_ids += [order["id"] for order in page["orders"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return order_ids
+
+    order_ids = with_client(app, walk)
+    assert len(order_ids) == len(set(order_ids)) == bench_settings["order_count"]
+
+
+def test_app_summary_counts_every_seeded_order(app, bench_settings):
+    async def summarize(client):
+        response = await client.get("/api/search-orders/summary")
+        response.raise_for_status()
+        return response.json()
+
+    summary = with_client(app, summarize)
+    assert summary["order_count"] == bench_settings["order_count"]
+    assert sum(status["order_count"] for status in summary["by_status"]) == bench_settings["order_count"]
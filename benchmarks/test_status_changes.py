@@ -0,0 +1,99 @@
+"""
+Payment status changes follow STATUS_TRANSITIONS, for single orders and for
+batches: pending orders can be settled or cancelled and settled orders
+cancelled, while other moves are refused (409 for a single order, a per-order
+detail in a batch) and leave the order as it was.
+
+    pytest benchmarks/test_status_changes.py
+"""
+
+import sqlite3
+
+import pytest
+
+from test_seeded_app import with_client
+
+
+def statuses(path, order_ids):
+    with sqlite3.connect(path) as connection:
+        return [
+            connection.execute("SELECT payment_status FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+            for order_id in order_ids
+        ]
+
+
+@pytest.fixture
+def pending_orders(seeded_database):
+    """Ids of two pending orders, taken by the test"""
+    with sqlite3.connect(seeded_database) as connection:
+        order_ids = [row[0] for row in connection.execute(
+            "SELECT id FROM orders WHERE payment_status = 'pending' ORDER BY id DESC LIMIT 2"
+        )]
+    assert len(order_ids) == 2, "the seeded database needs pending orders"
+    return order_ids
+
+
+def test_single_order_moves_only_along_allowed_transitions(app, seeded_database, pending_orders):
+    order_id = pending_orders[0]
+
+    async def walk(client):
+        async def post(action):
+            response = await client.post(f"/api/{action}/{order_id}", headers={"Accept": "application/json"})
+            return response.status_code, response.json().get("detail")
+
+        return [
+            await post("update-payment-status"),
+            await post("update-payment-status"),
+            await post("cancel-order"),
+            await post("cancel-order"),
+            await post("update-payment-status"),
+        ]
+
+    assert with_client(app, walk) == [
+        (200, None),
+        (409, "Order is already completed"),
+        (200, None),
+        (409, "Order is already cancelled"),
+        (409, "Cannot change a cancelled order to completed"),
+    ]
+    assert statuses(seeded_database, [order_id]) == ["cancelled"]
+
+
+def test_single_order_change_of_a_missing_order_is_not_found(app):
+    async def post(client):
+        return (await client.post("/api/cancel-order/999999999")).status_code
+
+    assert with_client(app, post) == 404
+
+
+def test_batch_reports_every_order(app, seeded_database, pending_orders):
+    pending, other = pending_orders
+
+    async def run(client):
+        # Cancel one order first, so the batch meets a refused transition
+        (await client.post(f"/api/cancel-order/{other}", headers={"Accept": "application/json"})).raise_for_status()
+        response = await client.post(
+            "/api/orders/batch-status",
+            json={"order_ids": [pending, other, 999999999], "payment_status": "completed"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    body = with_client(app, run)
+    assert body["updated"] == 1
+    assert [(result["order_id"], result["success"], result["payment_status"], result["detail"]) for result in body["results"]] == [
+        (pending, True, "completed", None),
+        (other, False, "cancelled", "Cannot change a cancelled order to completed"),
+        (999999999, False, None, "Order not found"),
+    ]
+    assert statuses(seeded_database, [pending, other]) == ["completed", "cancelled"]
+
+
+def test_batch_rejects_an_unknown_status(app, pending_orders):
+    async def post(client):
+        response = await client.post(
+            "/api/orders/batch-status", json={"order_ids": pending_orders, "payment_status": "refunded"}
+        )
+        return response.status_code
+
+    assert with_client(app, post) == 400
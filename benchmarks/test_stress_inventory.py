@@ -0,0 +1,30 @@
+"""
+Stock keeping under concurrency: a scaled-down run of stress_inventory.py.
+
+Two worker processes race for a little stock on a database of their own, so
+the shared seeded database is left alone. Set BENCH_STRESS_SECONDS to race
+for longer:
+
+    BENCH_STRESS_SECONDS=30 pytest benchmarks/test_stress_inventory.py -s
+"""
+
+import argparse
+import os
+
+from stress_inventory import check_stock, race
+
+
+def test_stock_is_never_oversold_or_lost(tmp_path, project_root):
+    args = argparse.Namespace(
+        workers=2,
+        clients=3,
+        items=2,
+        stock=30,
+        duration=float(os.getenv("BENCH_STRESS_SECONDS", "5")),
+    )
+    db_path = str(tmp_path / "billing.db")
+    outcomes, scarce, last_order_id = race(args, db_path)
+
+    assert outcomes["create ok"] > 0
+    # No negative stock, and every unit is either left or on a live order
+    assert check_stock(db_path, scarce, args.stock, last_order_id) == []
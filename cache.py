@@ -0,0 +1,264 @@
+"""
+In-process caches for the Food Billing Application.
+
+Caches live in the memory of a single worker process. Every write path in
+database.py updates or invalidates them once its transaction has committed,
+so a worker always sees its own writes. Changes made by other processes
+writing to the same database are not seen until the cache is invalidated.
+"""
+
+import bisect
+import collections
+import sys
+import time
+import uuid
+from typing import Dict, Hashable, List, Optional
+
+from schemas import ItemResponse
+
+
+# Identifies this process, so ETags handed out before a restart (when the
+# counters start again from zero) never match afterwards
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+class VersionCounter:
+    """
+    Version number for a table, bumped by every committed write that changes it.
+
+    The value is only meaningful within this process and misses writes made
+    by other processes; `etag` combines it with BOOT_ID and a stamp of the
+    database as a whole (see database.data_version) so it can be handed to
+    clients for conditional requests.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def bump(self):
+        self.value += 1
+
+    def etag(self, data_version: str) -> str:
+        return f'W/"{self.name}-{BOOT_ID}-{self.value}-{data_version}"'
+
+
+# Versions of the item catalog and of the orders (including their lines)
+item_versions = VersionCounter("items")
+order_versions = VersionCounter("orders")
+
+
+class ItemCatalogCache:
+    """
+    In-memory copy of the item catalog.
+
+    Holds every item indexed by id, plus a view sorted by lower-cased name for
+    listings, exact name lookups and prefix search. The catalog is loaded from the database on the
+    first read after start-up or after invalidate(). Stock changes from orders
+    are applied in place, so selling items does not force a reload.
+    """
+
+    def __init__(self):
+        self._by_id: Optional[Dict[int, ItemResponse]] = None
+        self._sorted_ids: List[int] = []
+        self._sorted_keys: List[str] = []
+        # Bumped on every invalidation so a load that raced with a write is discarded
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._by_id is not None
+
+    def load(self, items: List[ItemResponse], generation: int):
+        """Install a freshly queried catalog unless a write invalidated it meanwhile"""
+        if generation != self.generation:
+            return
+        self._by_id = {item.id: item for item in items}
+        ordered = sorted(items, key=lambda item: item.item_name.lower())
+        self._sorted_ids = [item.id for item in ordered]
+        self._sorted_keys = [item.item_name.lower() for item in ordered]
+
+    def invalidate(self):
+        """Drop the catalog; the next read reloads it from the database"""
+        item_versions.bump()
+        self._by_id = None
+        self._sorted_ids = []
+        self._sorted_keys = []
+        self.generation += 1
+        self.invalidations += 1
+
+    def all(self) -> List[ItemResponse]:
+        """All items sorted by name"""
+        return [self._by_id[item_id] for item_id in self._sorted_ids]
+
+    def get(self, item_id: int) -> Optional[ItemResponse]:
+        return self._by_id.get(item_id)
+
+    def get_by_name(self, item_name: str) -> Optional[ItemResponse]:
+        key = item_name.lower()
+        position = bisect.bisect_left(self._sorted_keys, key)
+        while position < len(self._sorted_keys) and self._sorted_keys[position] == key:
+            item = self._by_id[self._sorted_ids[position]]
+            if item.item_name == item_name:
+                return item
+            position += 1
+        return None
+
+    def search(self, query: str) -> List[ItemResponse]:
+        """
+        Items whose name contains `query`, case-insensitively.
+
+        Prefix matches come first (found by bisecting the sorted view), followed by
+        the remaining substring matches, each group in name order.
+        """
+        key = query.lower()
+        start = bisect.bisect_left(self._sorted_keys, key)
+        end = start
+        while end < len(self._sorted_keys) and self._sorted_keys[end].startswith(key):
+            end += 1
+
+        prefix_ids = self._sorted_ids[start:end]
+        substring_ids = [
+            item_id
+            for position, item_id in enumerate(self._sorted_ids)
+            if not start <= position < end and key in self._sorted_keys[position]
+        ]
+        return [self._by_id[item_id] for item_id in prefix_ids + substring_ids]
+
+    def adjust_stock(self, quantity_changes: Dict[int, int]):
+        """Apply committed stock changes (item id -> delta) to tracked items"""
+        item_versions.bump()
+        if not self.loaded:
+            return
+        for item_id, change in quantity_changes.items():
+            item = self._by_id.get(item_id)
+            if item is not None and item.remaining_quantity is not None:
+                self._by_id[item_id] = item.model_copy(
+                    update={"remaining_quantity": item.remaining_quantity + change}
+                )
+
+    def set_stock(self, quantity: int):
+        """Apply a committed restock that set every item to `quantity`"""
+        item_versions.bump()
+        if not self.loaded:
+            return
+        for item_id, item in self._by_id.items():
+            self._by_id[item_id] = item.model_copy(update={"remaining_quantity": quantity})
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "loaded": self.loaded,
+            "items": len(self._sorted_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared catalog cache for this process
+item_catalog = ItemCatalogCache()
+
+
+class SearchResultCache:
+    """
+    LRU cache of encoded order search pages, keyed on normalized search parameters.
+
+    Entries belong to one value of order_versions: once any order write has
+    committed, the next lookup drops every entry rather than serve a stale
+    page. Entries also expire `ttl_seconds` after they were stored, which
+    bounds how long writes made by other processes go unseen. The cache holds
+    at most `max_entries` pages and `max_bytes` of memory, evicting the least
+    recently used pages first.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires at, body, size in bytes), least recently used first
+        self._entries: "collections.OrderedDict[Hashable, tuple]" = collections.OrderedDict()
+        self._version = order_versions.value
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """The cached page for `key`, or None if it is missing, stale or expired"""
+        self._check_version()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, body: bytes, version: int):
+        """
+        Store the page for `key`, read while order_versions was at `version`.
+
+        Pages read before the latest order write are not stored.
+        """
+        self._check_version()
+        if version != self._version or not self.enabled:
+            return
+        # Approximate memory held by the entry: the body and the key's parts
+        size = sys.getsizeof(body) + sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, body, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _remove(self, key: Hashable):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def _check_version(self):
+        """Drop every entry if an order write has committed since they were stored"""
+        if order_versions.value != self._version:
+            self._version = order_versions.value
+            if self._entries:
+                self.clear()
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
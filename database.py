@@ -1,18 +1,42 @@
 import os
+import re
+import io
+import csv
 import json
-from datetime import datetime
+import base64
+import time
+from datetime import date, datetime, timedelta
 from typing import Optional, List, Dict, Any
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session, joinedload
-from sqlalchemy.pool import QueuePool
+from sqlalchemy import create_engine, event, text, select, insert, update, case, func, or_, and_, type_coerce, union_all, BigInteger
+from sqlalchemy.orm import sessionmaker, Session, selectinload
+from sqlalchemy.sql import table, column
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
 from fastapi import Depends
+from pydantic import ValidationError
 
 # Import models from models.py
-from models import Base, Item, Order, OrderItem
+from models import Base, Item, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales, DailyItemSales, to_epoch
+from migrations import upgrade, has_search_indexes
 
 # Import Pydantic schemas
-from schemas import ItemResponse, OrderResponse, OrderItemResponse
+from schemas import ItemCreate, ItemResponse, OrderResponse, OrderItemResponse, DailySalesResponse, ItemSalesResponse, SalesReport
+
+# In-process caches kept in step with committed writes
+from cache import item_catalog, order_versions, SearchResultCache
+
+# Live change events for open pages
+from events import event_broker
+
+# Group commit for order writes
+from write_queue import WriteQueue
+
+# Query and connection pool instrumentation
+from metrics import instrument_engine, timed_pool, WRITE_BATCH_SIZE
 
 # Load environment variables
 load_dotenv()
@@ -20,47 +44,576 @@ load_dotenv()
 # Get database URL from environment or use default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/billing.db")
 
-# Create SQLAlchemy engine with connection pooling
+# Async drivers for the synchronous URL schemes we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def _async_url(url: str) -> str:
+    """Translate a synchronous database URL into its async driver equivalent"""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+# Async URL used by the request path; can be overridden explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# SQLite tuning profile, applied with PRAGMAs to every new connection. Each value
+# can be overridden from the environment; an empty value keeps SQLite's default.
+#  - WAL lets readers proceed while a write is in progress
+#  - synchronous=NORMAL is durable under WAL except for power loss, and much cheaper than FULL
+#  - busy_timeout makes a writer wait for the lock instead of failing with "database is locked"
+#  - cache_size is in KiB when negative; mmap_size is in bytes
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "ON"),
+}
+
+for pragma, value in SQLITE_PRAGMAS.items():
+    # Values are interpolated into the PRAGMA statement, so only allow plain words and numbers
+    if value and not re.fullmatch(r"-?\w+", value):
+        raise ValueError(f"Invalid value for SQLite PRAGMA {pragma}: {value!r}")
+
+# Connection pool bounds (ignored for in-memory SQLite, which shares one connection)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Group commit for create_order and add_item_to_order (see write_queue.py); off by default.
+# The window is how long the writer waits for more writes to join a batch.
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "").lower() in ("1", "true", "yes", "on")
+WRITE_QUEUE_WINDOW_MS = float(os.getenv("WRITE_QUEUE_WINDOW_MS", "2"))
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+
+# Order search result cache (see SearchResultCache); SEARCH_CACHE_ENTRIES=0 turns it off
+SEARCH_CACHE_ENTRIES = int(os.getenv("SEARCH_CACHE_ENTRIES", "256"))
+SEARCH_CACHE_MAX_MB = float(os.getenv("SEARCH_CACHE_MAX_MB", "32"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _is_memory_database(url: str) -> bool:
+    """Whether a SQLite URL points at an in-memory database"""
+    database = make_url(url).database
+    return _is_sqlite(url) and (not database or database == ":memory:" or "mode=memory" in url)
+
+def _pool_options(url: str, queue_pool) -> Dict[str, Any]:
+    """
+    Pick a pool for the database behind `url`.
+
+    In-memory SQLite lives and dies with its connection, so it gets a single
+    shared connection (StaticPool); to share one in-memory database between
+    the sync and async engines use a named shared-cache URI such as
+    sqlite:///file:billing?mode=memory&cache=shared&uri=true. SQLite files
+    get a queue pool: under WAL every pooled connection can read concurrently
+    and busy_timeout queues the writers. Connections are only recycled for
+    database servers, since recycling a SQLite connection just throws away
+    its page cache.
+    """
+    if _is_memory_database(url):
+        return {"poolclass": StaticPool}
+
+    options = {
+        "poolclass": queue_pool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": 30,
+    }
+    if not _is_sqlite(url):
+        options["pool_recycle"] = 1800
+    return options
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite tuning profile to a newly opened connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        if value:
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+# Create SQLAlchemy engine with connection pooling.
+# The synchronous engine is used for schema management and offline scripts.
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
+    connect_args={"check_same_thread": False} if _is_sqlite(DATABASE_URL) else {},
+    **_pool_options(DATABASE_URL, timed_pool(QueuePool, "sync")),
 )
 
-# Create session factory
+# Create async engine used by the FastAPI routes so queries never block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **_pool_options(ASYNC_DATABASE_URL, timed_pool(AsyncAdaptedQueuePool, "async")),
+)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+if _is_sqlite(DATABASE_URL):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+if _is_sqlite(ASYNC_DATABASE_URL):
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+# Connection kept open only to read PRAGMA data_version (see data_version)
+_data_version_connection = None
+
+def data_version() -> str:
+    """
+    A stamp that changes whenever anyone may have written to the database.
+
+    The per-process version counters miss writes made by other workers and by
+    scripts such as manage.py, so ETags also carry this stamp. For a SQLite
+    file it is PRAGMA data_version read on a dedicated connection, which
+    changes with every commit made through any other connection; reading it
+    costs no I/O, so it can be checked on every conditional request. An
+    in-memory database is only reachable from this process, so the counters
+    suffice. Other databases have no such counter, and the stamp changes
+    every SEARCH_CACHE_TTL_SECONDS instead, bounding how long writes made
+    elsewhere go unseen like the search result cache does.
+    """
+    global _data_version_connection
+    if _is_memory_database(DATABASE_URL):
+        return "0"
+    if not _is_sqlite(DATABASE_URL):
+        return str(int(time.time() // max(SEARCH_CACHE_TTL_SECONDS, 1)))
+
+    if _data_version_connection is None:
+        # Taken out of the pool for good, with the same URL options and pragmas
+        _data_version_connection = engine.raw_connection()
+        _data_version_connection.detach()
+    cursor = _data_version_connection.cursor()
+    try:
+        cursor.execute("PRAGMA data_version")
+        return str(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class OrderError(Exception):
+    """Raised when an order cannot be placed as requested"""
+    status_code = 400
+
+
+class ItemNotFoundError(OrderError):
+    """Raised when an order references an item that does not exist"""
+    status_code = 404
+
+
+class StatusTransitionError(OrderError):
+    """Raised when an order cannot move to the requested payment status"""
+    status_code = 409
 
 # Database dependency
-def get_db():
-    """Dependency for getting database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+# Post-commit hooks
+def _on_commit(db: AsyncSession, callback):
+    """
+    Run `callback` once the session's current transaction commits.
+
+    Used to update in-process caches only after a write is durable; callbacks
+    registered by a transaction that rolls back are discarded.
+    """
+    db.sync_session.info.setdefault("on_commit", []).append(callback)
+
+def _publish(db: AsyncSession, event_type: str, data: Dict[str, Any]):
+    """Publish a live event (see events.py) once the session's current transaction commits"""
+    _on_commit(db, lambda: event_broker.publish(event_type, data))
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session):
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_commit_callbacks(session):
+    session.info.pop("on_commit", None)
+
+# Group commit
+async def _in_savepoint(db: AsyncSession, operation, *args):
+    """
+    Run `operation(db, *args)` inside a SAVEPOINT.
+
+    If it raises, only its own writes are rolled back. Rolling back a
+    savepoint fires after_rollback, which drops every pending commit
+    callback, so the ones registered before it are put back.
+    """
+    callbacks = list(db.sync_session.info.get("on_commit", []))
+    try:
+        async with db.begin_nested():
+            return await operation(db, *args)
+    except Exception:
+        db.sync_session.info["on_commit"] = callbacks
+        raise
+
+async def _apply_write_batch(writes) -> list:
+    """
+    Apply a batch of queued writes in one transaction (see WriteQueue).
+
+    Each write gets its own savepoint, so one refused for lack of stock does
+    not undo the others. A database error such as "database is locked" fails
+    the whole batch instead: the next write would only wait for the same lock.
+    """
+    WRITE_BATCH_SIZE.observe(len(writes))
+    outcomes = []
+    async with AsyncSessionLocal() as db:
+        if _is_sqlite(ASYNC_DATABASE_URL):
+            # The sqlite3 driver only opens a transaction before INSERT/UPDATE/DELETE,
+            # so a leading SAVEPOINT would start (and its RELEASE commit) one per
+            # write. Open the batch's transaction explicitly, taking the write lock
+            # up front so no write has to upgrade a read snapshot mid-batch.
+            await db.execute(text("BEGIN IMMEDIATE"))
+        for operation, args in writes:
+            try:
+                outcomes.append((await _in_savepoint(db, operation, *args), None))
+            except OperationalError:
+                raise
+            except Exception as exc:
+                outcomes.append((None, exc))
+        await db.commit()
+    return outcomes
+
+# Shared writer for this process; used when WRITE_QUEUE_ENABLED is set
+order_writes = WriteQueue(_apply_write_batch, WRITE_QUEUE_WINDOW_MS / 1000, WRITE_QUEUE_MAX_BATCH)
 
 # Initialize database
 def init_db():
     """Initialize the database with tables if they don't exist"""
     # Create data directory if it doesn't exist
-    if DATABASE_URL.startswith("sqlite"):
-        db_file = DATABASE_URL.replace("sqlite:///", "")
-        os.makedirs(os.path.dirname(db_file), exist_ok=True)
-    
+    if _is_sqlite(DATABASE_URL) and not _is_memory_database(DATABASE_URL):
+        db_dir = os.path.dirname(make_url(DATABASE_URL).database)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
     # Create tables
     Base.metadata.create_all(bind=engine)
-    
+
+    # Bring databases created by older versions up to date (indexes, column changes)
+    upgrade(engine)
+
+
+# Sort keys accepted by search_orders. Order-level keys sort on the order row;
+# item-level keys sort on an aggregate over the order's lines.
+# Timestamps sort on their stored epoch integers so cursor values stay plain numbers.
+# Each entry builds the expression for a pair of live or archive tables.
+ORDER_SORT_COLUMNS = {
+    "id": lambda orders: orders.id,
+    "order_date": lambda orders: type_coerce(orders.order_date, BigInteger),
+    "payment_date": lambda orders: func.coalesce(type_coerce(orders.payment_date, BigInteger), 0),
+    "total_price": lambda orders: orders.total_price,
+}
+ITEM_SORT_AGGREGATES = {
+    "item_name": lambda order_items: func.min(order_items.item_name),   # alphabetically first item in the order
+    "quantity": lambda order_items: func.sum(order_items.quantity),     # total units in the order
+    "price": lambda order_items: func.max(order_items.unit_price),      # most expensive item in the order
+}
+SORT_KEYS = set(ORDER_SORT_COLUMNS) | set(ITEM_SORT_AGGREGATES)
+
+def parse_timestamp(value: str, end_of_day: bool = False) -> datetime:
+    """
+    Parse an ISO date or datetime filter value.
+
+    A date-only value used as an end bound is widened to the end of that day,
+    so "2024-01-05" as an upper bound includes orders placed on the 5th. A
+    value with a UTC offset is converted to naive local wall-clock time, the
+    way timestamps are stored (see models.to_epoch), so it compares with
+    stored values and day boundaries.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+def encode_cursor(sort_by: str, sort_value, order_id: int) -> str:
+    """Encode the sort position of the last order on a page as an opaque cursor"""
+    raw = json.dumps([sort_by, sort_value, order_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str):
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed or for another sort"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, sort_value, order_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort_by != sort_by or not isinstance(order_id, int):
+        raise ValueError("Invalid cursor")
+    return sort_value, order_id
+
+# Values per IN (...) lookup, well below SQLite's bound parameter limit
+IN_CHUNK_SIZE = 500
+
+# Columns the order list endpoints return; the same names on the live and archive tables
+ORDER_COLUMNS = ["id", "total_price", "payment_status", "order_date", "payment_date"]
+ORDER_ITEM_COLUMNS = ["id", "order_id", "item_id", "item_name", "quantity", "unit_price", "subtotal"]
+
+def _order_columns_query(orders=Order):
+    """Select the columns of ORDER_COLUMNS, as the base of an order list query"""
+    return select(*(getattr(orders, key) for key in ORDER_COLUMNS))
+
+async def _fetch_order_page(
+    db: AsyncSession,
+    query,
+    limit: Optional[int],
+    cursor: Optional[str],
+    sort_by: str = "order_date",
+    sort_order: str = "desc",
+    archive_query=None,
+):
+    """
+    Run an order query sorted by `sort_by`, one keyset page at a time.
+
+    Pages are positioned with a WHERE clause on (sort value, id) rather than an
+    OFFSET, so every page costs the same no matter how deep it is. Item-level
+    sort keys are computed by joining a per-order aggregate over order_items.
+    `query` selects ORDER_COLUMNS (see _order_columns_query). Returns the
+    orders on the page as dicts (see _orders_with_items) and the cursor for
+    the next one (None on the last page).
+
+    `archive_query`, the same query over the archive tables, adds archived
+    orders: both tiers are paged with the same cursor and their pages merged
+    on (sort value, id).
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort_by: {sort_by}")
+    if sort_order not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort_order: {sort_order}")
+    position = decode_cursor(cursor, sort_by) if cursor else None
+
+    rows = [
+        (row, OrderItem)
+        for row in await _order_page_rows(db, query, Order, OrderItem, limit, position, sort_by, sort_order)
+    ]
+    if archive_query is not None:
+        rows += [
+            (row, ArchivedOrderItem)
+            for row in await _order_page_rows(
+                db, archive_query, ArchivedOrder, ArchivedOrderItem, limit, position, sort_by, sort_order
+            )
+        ]
+        rows.sort(key=lambda entry: (entry[0].sort_value, entry[0].id), reverse=sort_order == "desc")
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(sort_by, last.sort_value, last.id)
+
+    if archive_query is None:
+        return await _orders_with_items(db, [row for row, _ in rows]), next_cursor
+
+    # Each order's lines come from its own tier; put the page back in sort order afterwards
+    orders = {}
+    for order_items in (OrderItem, ArchivedOrderItem):
+        tier_rows = [row for row, tier in rows if tier is order_items]
+        for order in await _orders_with_items(db, tier_rows, order_items):
+            orders[order["id"]] = order
+    return [orders[row.id] for row, _ in rows], next_cursor
+
+async def _order_page_rows(db: AsyncSession, query, orders, order_items, limit, position, sort_by, sort_order):
+    """Rows of one keyset page of `query` over the `orders`/`order_items` tables, plus a "sort_value" column"""
+    if sort_by in ITEM_SORT_AGGREGATES:
+        aggregate = (
+            select(order_items.order_id, ITEM_SORT_AGGREGATES[sort_by](order_items).label("sort_value"))
+            .group_by(order_items.order_id)
+            .subquery()
+        )
+        query = query.outerjoin(aggregate, aggregate.c.order_id == orders.id)
+        sort_column = func.coalesce(aggregate.c.sort_value, "" if sort_by == "item_name" else 0)
+    else:
+        sort_column = ORDER_SORT_COLUMNS[sort_by](orders)
+
+    query = query.add_columns(sort_column.label("sort_value"))
+
+    descending = sort_order == "desc"
+    if position:
+        sort_value, order_id = position
+        if descending:
+            query = query.filter(or_(sort_column < sort_value, and_(sort_column == sort_value, orders.id < order_id)))
+        else:
+            query = query.filter(or_(sort_column > sort_value, and_(sort_column == sort_value, orders.id > order_id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), orders.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), orders.id.asc())
+
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        query = query.limit(limit + 1)
+
+    return (await db.execute(query)).all()
+
+async def _orders_with_items(db: AsyncSession, rows, order_items=OrderItem) -> List[Dict[str, Any]]:
+    """
+    Turn order rows selected with ORDER_COLUMNS into dicts with their lines under "items".
+
+    The lines of all the orders are fetched from `order_items` as row tuples,
+    in chunks of IN_CHUNK_SIZE orders, and grouped by order_id in a single
+    pass. No ORM objects or Pydantic models are built, so the dicts can go
+    straight to a JSON encoder; timestamps are left as datetimes for it to
+    format.
+    """
+    orders = {}
+    for row in rows:
+        order = dict(zip(ORDER_COLUMNS, row))
+        order["items"] = []
+        orders[order["id"]] = order
+
+    order_ids = list(orders)
+    for start in range(0, len(order_ids), IN_CHUNK_SIZE):
+        lines = await db.execute(
+            select(*(getattr(order_items, key) for key in ORDER_ITEM_COLUMNS))
+            .where(order_items.order_id.in_(order_ids[start:start + IN_CHUNK_SIZE]))
+            .order_by(order_items.order_id, order_items.id)
+        )
+        for line in lines:
+            orders[line.order_id]["items"].append(dict(zip(ORDER_ITEM_COLUMNS, line)))
+
+    return list(orders.values())
+
+async def _publish_orders(db: AsyncSession, order_ids: List[int]):
+    """
+    Publish an "order" event per order in `order_ids` once the transaction commits.
+
+    The orders are read back inside the transaction, after its writes, only
+    while some page has an event stream open; otherwise the broker merely
+    records that it skipped them.
+    """
+    if not event_broker.listening:
+        _on_commit(db, event_broker.skip)
+        return
+
+    await db.flush()
+    for start in range(0, len(order_ids), IN_CHUNK_SIZE):
+        rows = (await db.execute(
+            _order_columns_query().where(Order.id.in_(order_ids[start:start + IN_CHUNK_SIZE]))
+        )).all()
+        for order in await _orders_with_items(db, rows):
+            _publish(db, "order", {"order": order})
+
+def _order_responses(orders) -> List[OrderResponse]:
+    """Build OrderResponse objects with their items from loaded Order rows"""
+    result = []
+    for order in orders:
+        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
+        order_dict = OrderResponse.model_validate(order)
+        order_dict.items = items
+        result.append(order_dict)
+
+    return result
+
+# Lightweight handle on the order line FTS5 table created by migrations.create_search_indexes.
+# Item searches are served from the in-memory catalog, which needs no index.
+order_items_fts = table("order_items_fts", column("rowid"), column("item_name"))
+
+# The trigram tokenizer only matches queries of at least three characters
+MIN_SEARCH_INDEX_QUERY_LENGTH = 3
+
+def _use_search_index(query: str) -> bool:
+    """Whether a name search can be answered from the FTS5 index"""
+    return SEARCH_INDEX_ENABLED and len(query) >= MIN_SEARCH_INDEX_QUERY_LENGTH
+
+def _match_phrase(query: str) -> str:
+    """Quote a user search string as a single FTS5 phrase so it matches literally"""
+    return '"' + query.replace('"', '""') + '"'
 
 # Item operations
-def get_all_items(db: Session = Depends(get_db)):
-    items = db.query(Item).order_by(Item.item_name).all()
-    return [ItemResponse.model_validate(item) for item in items]
+async def _item_catalog(db: AsyncSession):
+    """Return the cached item catalog, loading it from the database on a miss"""
+    if item_catalog.loaded:
+        item_catalog.hits += 1
+        return item_catalog
+
+    item_catalog.misses += 1
+    generation = item_catalog.generation
+    items = await db.scalars(select(Item))
+    item_catalog.load([ItemResponse.model_validate(item) for item in items], generation)
+    if not item_catalog.loaded:
+        # A write invalidated the catalog while it was loading; read it again
+        return await _item_catalog(db)
+    return item_catalog
+
+async def _adjust_stock(db: AsyncSession, changes: Dict[int, int]) -> Dict[int, int]:
+    """
+    Atomically add `changes` ({item_id: units, negative to take stock}) to tracked stock.
+
+    Every item is updated in one statement computed by the database
+    (remaining_quantity = remaining_quantity + change) and guarded so stock
+    never drops below zero, so two terminals racing for the last units cannot
+    both get them, whatever they read before. Items that do not track stock,
+    do not exist or lack the stock are left unchanged.
+
+    Returns the changes that were applied; on commit the cached catalog follows
+    them and the new stock levels are published as a "stock" event.
+    """
+    if not changes:
+        return {}
+
+    change = case(changes, value=Item.id)
+    updated = (await db.execute(
+        update(Item.__table__)
+        .where(Item.id.in_(changes), Item.remaining_quantity.is_not(None), Item.remaining_quantity + change >= 0)
+        .values(remaining_quantity=Item.remaining_quantity + change)
+        .returning(Item.id, Item.remaining_quantity)
+    )).all()
+    applied = {row.id: changes[row.id] for row in updated}
+    if applied:
+        _on_commit(db, lambda: item_catalog.adjust_stock(applied))
+        _publish(db, "stock", {"items": [{"id": row.id, "remaining_quantity": row.remaining_quantity} for row in updated]})
+    return applied
+
+async def _take_stock(db: AsyncSession, item_id: int, quantity: int) -> Optional[int]:
+    """
+    Take `quantity` units of an item with a guarded update.
+
+    Returns None if the units were taken or the item does not track stock,
+    otherwise the number of units available.
+    """
+    if await _adjust_stock(db, {item_id: -quantity}):
+        return None
+    return await db.scalar(select(Item.remaining_quantity).where(Item.id == item_id))
+
+async def _lock_pending_order(db: AsyncSession, order_id: int) -> Optional[Order]:
+    """
+    Claim a pending order for writing and return it, or None if it is not pending.
+
+    The claim is a guarded no-op UPDATE, so it is the transaction's first
+    write: on SQLite it takes the write lock, on other databases the row
+    lock, before anything is read. The order and its lines read afterwards
+    cannot change until commit, so a concurrent cancel cannot restore stock
+    for lines this transaction is about to change, or the other way round.
+    """
+    claimed = await db.scalar(
+        update(Order.__table__)
+        .where(Order.id == order_id, Order.payment_status == "pending")
+        .values(payment_status=Order.payment_status)
+        .returning(Order.id)
+    )
+    if claimed is None:
+        return None
+    return await db.get(Order, order_id, populate_existing=True)
+
+async def get_all_items(db: AsyncSession = Depends(get_db)):
+    return (await _item_catalog(db)).all()
 
-def add_item(item_name: str, price_per_quantity: float, remaining_quantity: Optional[int] = None, db: Session = Depends(get_db)):
+async def add_item(item_name: str, price_per_quantity: float, remaining_quantity: Optional[int] = None, db: AsyncSession = Depends(get_db)):
     """Add a new item to the database"""
     item = Item(
         item_name=item_name,
@@ -68,203 +621,581 @@ def add_item(item_name: str, price_per_quantity: float, remaining_quantity: Opti
         remaining_quantity=remaining_quantity
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    _on_commit(db, item_catalog.invalidate)
+    _publish(db, "items", {})
+    await db.commit()
     return item.id
 
-def update_item(item_id: int, item_name: str, price_per_quantity: float, remaining_quantity: Optional[int] = None, db: Session = Depends(get_db)):
+async def update_item(item_id: int, item_name: str, price_per_quantity: float, remaining_quantity: Optional[int] = None, db: AsyncSession = Depends(get_db)):
     """Update an existing item in the database"""
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         return False
-    
+
     item.item_name = item_name
     item.price_per_quantity = price_per_quantity
     item.remaining_quantity = remaining_quantity
-    
-    db.commit()
+
+    _on_commit(db, item_catalog.invalidate)
+    _publish(db, "items", {})
+    await db.commit()
     return True
 
-def delete_item(item_id: int, db: Session = Depends(get_db)):
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an item from the database"""
     # Check if item exists in any order items
-    order_item_count = db.query(OrderItem).filter(OrderItem.item_id == item_id).count()
+    order_item_count = await db.scalar(
+        select(func.count()).select_from(OrderItem).filter(OrderItem.item_id == item_id)
+    )
     if order_item_count > 0:
         return False
-    
+
     # Delete the item
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         return False
-    
-    db.delete(item)
-    db.commit()
+
+    await db.delete(item)
+    _on_commit(db, item_catalog.invalidate)
+    _publish(db, "items", {})
+    await db.commit()
     return True
 
-def restock_all_items(quantity: int = 9999, db: Session = Depends(get_db)):
+async def restock_all_items(quantity: int = 9999, db: AsyncSession = Depends(get_db)):
     """Restock all items to the specified quantity"""
-    db.query(Item).update({"remaining_quantity": quantity})
-    db.commit()
+    await db.execute(update(Item).values(remaining_quantity=quantity))
+    _on_commit(db, lambda: item_catalog.set_stock(quantity))
+    _publish(db, "items", {})
+    await db.commit()
     return True
 
-def get_item_by_id(item_id: int, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
-    return ItemResponse.model_validate(item) if item else None
+async def get_item_by_id(item_id: int, db: AsyncSession = Depends(get_db)):
+    return (await _item_catalog(db)).get(item_id)
+
+async def get_item_by_name(item_name: str, db: AsyncSession = Depends(get_db)):
+    return (await _item_catalog(db)).get_by_name(item_name)
 
-def get_item_by_name(item_name: str, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.item_name == item_name).first()
-    return ItemResponse.model_validate(item) if item else None
+async def search_items(query: str, db: AsyncSession = Depends(get_db)):
+    """
+    Find items whose name contains `query`, case-insensitively.
 
-def search_items(query: str, db: Session = Depends(get_db)):
-    items = db.query(Item).filter(Item.item_name.ilike(f"%{query}%")).all()
-    return [ItemResponse.model_validate(item) for item in items]
+    Served from the in-memory catalog: prefix matches come first, then the
+    remaining substring matches, each in name order.
+    """
+    return (await _item_catalog(db)).search(query)
 
-def update_item_quantity(item_id: int, quantity_change: int, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item or item.remaining_quantity is None:
+async def update_item_quantity(item_id: int, quantity_change: int, db: AsyncSession = Depends(get_db)):
+    """Add `quantity_change` to an item's stock; fails if the item does not track stock or would go below zero"""
+    if not await _adjust_stock(db, {item_id: quantity_change}):
         return False
-    
-    item.remaining_quantity += quantity_change
-    db.commit()
+
+    await db.commit()
     return True
 
+def get_cache_stats():
+    """Hit/miss counters and sizes of the in-process caches"""
+    return {"item_catalog": item_catalog.stats(), "order_search": search_results.stats()}
+
+# Bulk item import
+ITEM_IMPORT_COLUMNS = ["item_name", "price_per_quantity", "remaining_quantity"]
+
+def parse_items_csv(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Read item rows from CSV with a header line naming ITEM_IMPORT_COLUMNS.
+
+    Other columns are ignored, and an empty remaining_quantity means the item
+    does not track stock. Raises ValueError if the header lacks a required column.
+    """
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    missing = {"item_name", "price_per_quantity"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+    return [
+        {column: row.get(column) if row.get(column) != "" else None for column in ITEM_IMPORT_COLUMNS}
+        for row in reader
+    ]
+
+def _validate_item_row(row: Any) -> Dict[str, Any]:
+    """Check one imported row against the items table's rules; raises ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    try:
+        item = ItemCreate.model_validate(row)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()))
+
+    item_name = item.item_name.strip()
+    if not item_name or len(item_name) > 100:
+        raise ValueError("item_name must be 1 to 100 characters")
+    if item.price_per_quantity <= 0:
+        raise ValueError("price_per_quantity must be greater than 0")
+    if item.remaining_quantity is not None and item.remaining_quantity < 0:
+        raise ValueError("remaining_quantity must not be negative")
+    return {"item_name": item_name, "price_per_quantity": item.price_per_quantity, "remaining_quantity": item.remaining_quantity}
+
+async def bulk_upsert_items(rows: List[Any], skip_invalid: bool = False, db: AsyncSession = Depends(get_db)):
+    """
+    Insert or update items by their unique name, all in one transaction.
+
+    Every row is validated first and errors are reported by row number
+    (counting from 1); a name repeated within the import is an error too.
+    Unless `skip_invalid`, any error leaves the database untouched. Valid rows
+    are written with a single INSERT ... ON CONFLICT (item_name) DO UPDATE
+    executed for all of them, so a matching item gets the row's price and
+    stock, and the catalog cache is reloaded once afterwards.
+
+    Returns the number of items inserted and updated, and the errors.
+    """
+    valid: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    first_seen: Dict[str, int] = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            item = _validate_item_row(row)
+            if item["item_name"] in first_seen:
+                raise ValueError(f"Duplicate item_name, already in row {first_seen[item['item_name']]}")
+        except ValueError as e:
+            name = row.get("item_name") if isinstance(row, dict) else None
+            errors.append({"row": number, "item_name": name, "error": str(e)})
+            continue
+        first_seen[item["item_name"]] = number
+        valid.append(item)
+
+    if not valid or (errors and not skip_invalid):
+        return {"inserted": 0, "updated": 0, "errors": errors}
+
+    # Names that already exist, so the result can tell inserts from updates
+    names = [item["item_name"] for item in valid]
+    existing = 0
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        existing += await db.scalar(
+            select(func.count()).select_from(Item).where(Item.item_name.in_(names[start:start + IN_CHUNK_SIZE]))
+        )
+
+    stmt = sqlite_insert(Item.__table__)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Item.item_name],
+            set_={
+                "price_per_quantity": stmt.excluded.price_per_quantity,
+                "remaining_quantity": stmt.excluded.remaining_quantity,
+            },
+        ),
+        valid,
+    )
+
+    _on_commit(db, item_catalog.invalidate)
+    _publish(db, "items", {})
+    await db.commit()
+    return {"inserted": len(valid) - existing, "updated": existing, "errors": errors}
+
 # Order operations
-def get_all_orders(db: Session = Depends(get_db)):
-    orders = db.query(Order).options(joinedload(Order.order_items)).order_by(Order.order_date.desc()).all()
-    
-    # Explicitly create OrderResponse objects with items
-    result = []
-    for order in orders:
-        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-        order_dict = OrderResponse.model_validate(order)
-        order_dict.items = items
-        result.append(order_dict)
-    
-    return result
+async def get_all_orders(limit: Optional[int] = None, cursor: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """Get orders newest first as plain dicts, one page of `limit` orders after `cursor`"""
+    return await _fetch_order_page(db, _order_columns_query(), limit, cursor)
 
-def get_order_history(db: Session = Depends(get_db)):
-    """Get all orders for history view, sorted by newest first"""
-    orders = db.query(Order).options(joinedload(Order.order_items)).order_by(Order.order_date.desc()).all()
-    
-    # Explicitly create OrderResponse objects with items
-    result = []
-    for order in orders:
-        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-        order_dict = OrderResponse.model_validate(order)
-        order_dict.items = items
-        result.append(order_dict)
-    
-    return result
+async def get_order_history(limit: Optional[int] = None, cursor: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """Get orders for history view, sorted by newest first, one page at a time"""
+    orders, next_cursor = await _fetch_order_page(db, _order_columns_query(), limit, cursor)
+    # Rendered by templates, which expect attribute access
+    return [OrderResponse.model_validate(order) for order in orders], next_cursor
 
-def get_completed_orders(db: Session = Depends(get_db)):
-    orders = db.query(Order).options(joinedload(Order.order_items)).filter(Order.payment_status == "completed").order_by(Order.payment_date.desc()).all()
-    
-    # Explicitly create OrderResponse objects with items
-    result = []
-    for order in orders:
-        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-        order_dict = OrderResponse.model_validate(order)
-        order_dict.items = items
-        result.append(order_dict)
-    
-    return result
+async def get_home_orders(recent_limit: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get everything the home page shows with a single order query.
 
-def get_pending_orders(db: Session = Depends(get_db)):
-    orders = db.query(Order).options(joinedload(Order.order_items)).filter(Order.payment_status == "pending").order_by(Order.order_date.asc()).all()
-    
-    # Explicitly create OrderResponse objects with items
-    result = []
-    for order in orders:
-        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-        order_dict = OrderResponse.model_validate(order)
-        order_dict.items = items
-        result.append(order_dict)
-    
-    return result
+    Loads every pending order plus the `recent_limit` newest orders, then splits
+    them in memory into the pending queue (oldest first) and the recent
+    history (newest first). The history cursor points at older orders for loading on demand.
+    """
+    recent_ids = (
+        select(Order.id)
+        .order_by(Order.order_date.desc(), Order.id.desc())
+        .limit(recent_limit)
+    )
+    orders = (await db.scalars(
+        select(Order)
+        .options(selectinload(Order.order_items))
+        .filter(or_(Order.payment_status == "pending", Order.id.in_(recent_ids)))
+        .order_by(Order.order_date.desc(), Order.id.desc())
+    )).all()
+
+    order_history = orders[:recent_limit]
+    history_cursor = None
+    if len(order_history) == recent_limit:
+        history_cursor = encode_cursor("order_date", to_epoch(order_history[-1].order_date), order_history[-1].id)
+
+    pending_orders = [order for order in reversed(orders) if order.payment_status == "pending"]
+
+    return {
+        "pending_orders": _order_responses(pending_orders),
+        "order_history": _order_responses(order_history),
+        "history_cursor": history_cursor,
+    }
+
+async def get_completed_orders(db: AsyncSession = Depends(get_db)):
+    orders = await db.scalars(
+        select(Order)
+        .options(selectinload(Order.order_items))
+        .filter(Order.payment_status == "completed")
+        .order_by(Order.payment_date.desc())
+    )
+    return _order_responses(orders)
+
+async def get_pending_orders(db: AsyncSession = Depends(get_db)):
+    orders = await db.scalars(
+        select(Order)
+        .options(selectinload(Order.order_items))
+        .filter(Order.payment_status == "pending")
+        .order_by(Order.order_date.asc())
+    )
+    return _order_responses(orders)
+
+async def get_order_by_id(order_id: int, db: AsyncSession = Depends(get_db)):
+    """Get an order with its items, from the archive if it is no longer live"""
+    order = await db.scalar(
+        select(Order).options(selectinload(Order.order_items)).filter(Order.id == order_id)
+    )
+    if not order:
+        order = await db.scalar(
+            select(ArchivedOrder).options(selectinload(ArchivedOrder.order_items)).filter(ArchivedOrder.id == order_id)
+        )
 
-def get_order_by_id(order_id: int, db: Session = Depends(get_db)):
-    order = db.query(Order).options(joinedload(Order.order_items)).filter(Order.id == order_id).first()
-    
     if not order:
         return None
-    
-    # Explicitly create OrderResponse object with items
-    items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-    order_dict = OrderResponse.model_validate(order)
-    order_dict.items = items
-    
-    return order_dict
-
-def create_order(items: List[Dict], payment_status: str, db: Session = Depends(get_db)):
-    """Create a new order with multiple items"""
-    order_date = datetime.now().isoformat()
-    payment_date = order_date if payment_status == "completed" else None
-    
-    # Calculate total price from all items
-    total_price = sum(item["subtotal"] for item in items)
-    
-    # Create the order
-    order = Order(
-        total_price=total_price,
-        payment_status=payment_status,
-        order_date=order_date,
-        payment_date=payment_date
+
+    return _order_responses([order])[0]
+
+# Sales rollup maintenance
+async def _record_sales(
+    db: AsyncSession,
+    order_date: datetime,
+    payment_status: str,
+    order_count: int,
+    revenue: float,
+    lines: List[Dict] = ()
+):
+    """
+    Add deltas to the daily sales rollup in the caller's transaction.
+
+    `order_count` and `revenue` adjust the day's totals for `payment_status`;
+    `lines` holds per-item deltas as dicts with item_id, item_name, quantity
+    and revenue. Rows are created on first use with an ON CONFLICT upsert.
+    """
+    day = order_date.date()
+
+    statement = sqlite_insert(DailySales).values(
+        day=day, payment_status=payment_status, order_count=order_count, revenue=revenue
     )
-    
-    db.add(order)
-    db.flush()  # Get the order ID without committing
-    
-    # Add order items
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["day", "payment_status"],
+        set_={
+            "order_count": DailySales.order_count + statement.excluded.order_count,
+            "revenue": DailySales.revenue + statement.excluded.revenue,
+        }
+    ))
+
+    if lines:
+        statement = sqlite_insert(DailyItemSales)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["day", "payment_status", "item_id"],
+                set_={
+                    "item_name": statement.excluded.item_name,
+                    "quantity": DailyItemSales.quantity + statement.excluded.quantity,
+                    "revenue": DailyItemSales.revenue + statement.excluded.revenue,
+                }
+            ),
+            [dict(line, day=day, payment_status=payment_status) for line in lines]
+        )
+
+async def create_order(items: List[Dict], payment_status: str, db: AsyncSession = Depends(get_db)):
+    """
+    Create a new order with multiple items in a single transaction.
+
+    With WRITE_QUEUE_ENABLED the order is written by the shared group-commit
+    writer, in a transaction with other concurrent writes, instead of `db`.
+    See _create_order. Returns the new order's id.
+    """
+    if WRITE_QUEUE_ENABLED:
+        return await order_writes.submit(_create_order, items, payment_status)
+
+    try:
+        order_id = await _create_order(db, items, payment_status)
+    except OrderError:
+        await db.rollback()
+        raise
+    await db.commit()
+    return order_id
+
+async def _create_order(db: AsyncSession, items: List[Dict], payment_status: str) -> int:
+    """
+    Write a new order with multiple items, leaving the commit to the caller.
+
+    `items` holds dicts with `item_id` and `quantity`. Tracked stock is
+    decremented with one guarded UPDATE, then the items' names, prices and
+    stock are read in one query, and the order and its lines are inserted in
+    bulk. The caller rolls back if an error is raised, so nothing is written
+    unless every line can be fulfilled. Nothing is taken from the cached
+    catalog, which may be out of date when other worker processes change
+    prices or sell and restock.
+
+    Raises ItemNotFoundError or OrderError if the order cannot be created.
+    """
+    # Merge repeated items so each one is checked and decremented once
+    quantities: Dict[int, int] = {}
     for item_data in items:
-        order_item = OrderItem(
-            order_id=order.id,
-            item_id=item_data["item_id"],
-            item_name=item_data["item_name"],
-            quantity=item_data["quantity"],
-            unit_price=item_data["unit_price"],
-            subtotal=item_data["subtotal"]
+        if item_data["quantity"] <= 0:
+            raise OrderError("Quantity must be greater than 0")
+        quantities[item_data["item_id"]] = quantities.get(item_data["item_id"], 0) + item_data["quantity"]
+
+    # Decrement tracked stock in one guarded statement; items that do not track stock are skipped
+    taken = await _adjust_stock(db, {item_id: -quantity for item_id, quantity in quantities.items()})
+
+    # Read after the update, which holds the write lock once it has taken stock
+    catalog = {
+        row.id: row
+        for row in await db.execute(
+            select(Item.id, Item.item_name, Item.price_per_quantity, Item.remaining_quantity)
+            .where(Item.id.in_(quantities))
         )
-        db.add(order_item)
-    
-    db.commit()
-    db.refresh(order)
-    return order.id
+    }
+    for item_id in quantities:
+        if item_id not in catalog:
+            raise ItemNotFoundError(f"Item with ID {item_id} not found")
 
-def update_payment_status(order_id: int, status: str = "completed", db: Session = Depends(get_db)):
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
-        return False
-    
-    payment_date = datetime.now().isoformat() if status == "completed" else None
-    order.payment_status = status
-    order.payment_date = payment_date
-    
-    db.commit()
-    return True
+    short = [item_id for item_id, item in catalog.items() if item.remaining_quantity is not None and item_id not in taken]
 
-def cancel_order(order_id: int, db: Session = Depends(get_db)):
-    """Cancel an order and restore inventory if needed"""
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    if item_catalog.loaded and any(
+        (cached := item_catalog.get(item_id)) is None
+        or (cached.item_name, cached.price_per_quantity) != (item.item_name, item.price_per_quantity)
+        or (item_id in short and cached.remaining_quantity != item.remaining_quantity)
+        for item_id, item in catalog.items()
+    ):
+        # Another worker changed the menu or sold the stock, so reload this worker's copy on the next read
+        item_catalog.invalidate()
+
+    if short:
+        item = catalog[min(short)]
+        raise OrderError(f"Not enough stock for {item.item_name}. Only {item.remaining_quantity} available.")
+
+    order_lines = [
+        {
+            "item_id": item_id,
+            "item_name": catalog[item_id].item_name,
+            "quantity": quantity,
+            "unit_price": catalog[item_id].price_per_quantity,
+            "subtotal": catalog[item_id].price_per_quantity * quantity
+        }
+        for item_id, quantity in quantities.items()
+    ]
+
+    order_date = datetime.now()
+    payment_date = order_date if payment_status == "completed" else None
+
+    # Calculate total price from all items
+    total_price = sum(line["subtotal"] for line in order_lines)
+
+    # Create the order and its items
+    order_id = await db.scalar(
+        insert(Order.__table__)
+        .values(
+            total_price=total_price,
+            payment_status=payment_status,
+            order_date=order_date,
+            payment_date=payment_date
+        )
+        .returning(Order.id)
+    )
+
+    for line in order_lines:
+        line["order_id"] = order_id
+    await db.execute(insert(OrderItem.__table__), order_lines)
+
+    await _record_sales(db, order_date, payment_status, 1, total_price, [
+        {"item_id": line["item_id"], "item_name": line["item_name"], "quantity": line["quantity"], "revenue": line["subtotal"]}
+        for line in order_lines
+    ])
+
+    await _publish_orders(db, [order_id])
+    _on_commit(db, order_versions.bump)
+    return order_id
+
+async def update_payment_status(order_id: int, status: str = "completed", db: AsyncSession = Depends(get_db)):
+    """Move an order to payment status `status`; False if it does not exist"""
+    return await _change_single_order_status(db, order_id, status)
+
+async def cancel_order(order_id: int, db: AsyncSession = Depends(get_db)):
+    """Cancel an order and restore inventory if needed; False if it does not exist"""
+    return await _change_single_order_status(db, order_id, "cancelled")
+
+async def _change_single_order_status(db: AsyncSession, order_id: int, status: str) -> bool:
+    """
+    Move one order through the same guarded transition as a batch.
+
+    Raises StatusTransitionError if STATUS_TRANSITIONS does not allow the
+    move from the order's current status, the order has been archived, or
+    the order was changed by another request meanwhile.
+    """
+    if status not in STATUS_TRANSITIONS:
+        raise ValueError(f"Unknown payment status: {status}")
+
+    orders, moved = await _change_order_status(db, [order_id], status)
+    order = orders.get(order_id)
+    if order is None:
+        if await _archived_statuses(db, [order_id]):
+            raise StatusTransitionError("Order is archived")
         return False
-    
-    # Get all order items
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    
-    # Restore inventory for each item if it tracks quantity
-    for order_item in order_items:
-        item = db.query(Item).filter(Item.id == order_item.item_id).first()
-        if item and item.remaining_quantity is not None:
-            # Add the quantity back to inventory
-            item.remaining_quantity += order_item.quantity
-    
-    # Mark the order as cancelled
-    order.payment_status = "cancelled"
-    
-    db.commit()
+    if order_id not in moved:
+        if order.payment_status == status:
+            raise StatusTransitionError(f"Order is already {status}")
+        if status in STATUS_TRANSITIONS[order.payment_status]:
+            raise StatusTransitionError("Order was changed by another request")
+        raise StatusTransitionError(f"Cannot change a {order.payment_status} order to {status}")
+
+    await db.commit()
     return True
 
-def search_orders(
+async def _archived_statuses(db: AsyncSession, order_ids: List[int]) -> Dict[int, str]:
+    """Payment statuses of those of `order_ids` that have been archived (archived orders are read-only)"""
+    if not order_ids:
+        return {}
+    rows = await db.execute(
+        select(ArchivedOrder.id, ArchivedOrder.payment_status).where(ArchivedOrder.id.in_(order_ids))
+    )
+    return {row.id: row.payment_status for row in rows}
+
+# Payment statuses an order may move to, by its current status
+STATUS_TRANSITIONS = {
+    "pending": {"completed", "cancelled"},
+    "completed": {"cancelled"},
+    "cancelled": set(),
+}
+
+async def _change_order_status(db: AsyncSession, order_ids: List[int], status: str):
+    """
+    Move orders to payment status `status`, leaving the commit to the caller.
+
+    Orders are read in one query and moved with one guarded UPDATE per
+    current status, so an order changed concurrently is not moved twice.
+    Everything the stock and rollup changes depend on, the moved orders'
+    totals and lines, is read after that UPDATE, under the write lock it
+    took, so a concurrent cancel or line edit cannot make them stale. Stock
+    of cancelled orders is restored with a single grouped update, and the
+    sales rollup moves are summed per day before they are applied.
+
+    Returns the orders as read, by id, and the ids moved, mapped to the
+    status they moved from.
+    """
+    orders = {}
+    for start in range(0, len(order_ids), IN_CHUNK_SIZE):
+        rows = await db.execute(
+            select(Order.id, Order.payment_status).where(Order.id.in_(order_ids[start:start + IN_CHUNK_SIZE]))
+        )
+        orders.update((row.id, row) for row in rows)
+
+    # Group the orders that may move by their current status
+    movable: Dict[str, List[int]] = {}
+    for order_id, order in orders.items():
+        if status in STATUS_TRANSITIONS[order.payment_status]:
+            movable.setdefault(order.payment_status, []).append(order_id)
+
+    moved: Dict[int, str] = {}
+    moved_orders = {}
+    payment_date = datetime.now() if status == "completed" else None
+    for current_status, ids in movable.items():
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            updated = await db.execute(
+                update(Order.__table__)
+                .where(Order.id.in_(ids[start:start + IN_CHUNK_SIZE]), Order.payment_status == current_status)
+                .values(payment_status=status, payment_date=payment_date)
+                .returning(Order.id, Order.order_date, Order.total_price)
+            )
+            for order in updated:
+                moved[order.id] = current_status
+                moved_orders[order.id] = order
+
+    if not moved:
+        return orders, moved
+
+    moved_ids = list(moved)
+    lines = []
+    for start in range(0, len(moved_ids), IN_CHUNK_SIZE):
+        lines.extend(await db.execute(
+            select(OrderItem.order_id, OrderItem.item_id, OrderItem.item_name, OrderItem.quantity, OrderItem.subtotal)
+            .where(OrderItem.order_id.in_(moved_ids[start:start + IN_CHUNK_SIZE]))
+        ))
+
+    if status == "cancelled":
+        restored: Dict[int, int] = {}
+        for line in lines:
+            restored[line.item_id] = restored.get(line.item_id, 0) + line.quantity
+        await _adjust_stock(db, restored)
+
+    # Sum the rollup deltas per day and previous status, then move them in one go
+    totals: Dict[tuple, Dict[str, Any]] = {}
+    for order_id, previous_status in moved.items():
+        order = moved_orders[order_id]
+        key = (order.order_date.date(), previous_status)
+        total = totals.setdefault(key, {"order_date": order.order_date, "order_count": 0, "revenue": 0.0, "lines": {}})
+        total["order_count"] += 1
+        total["revenue"] += order.total_price
+    for line in lines:
+        order = moved_orders[line.order_id]
+        day_lines = totals[(order.order_date.date(), moved[line.order_id])]["lines"]
+        item = day_lines.setdefault(line.item_id, {"item_id": line.item_id, "item_name": line.item_name, "quantity": 0, "revenue": 0.0})
+        item["quantity"] += line.quantity
+        item["revenue"] += line.subtotal
+
+    for (_, previous_status), total in totals.items():
+        item_lines = list(total["lines"].values())
+        removed = [dict(line, quantity=-line["quantity"], revenue=-line["revenue"]) for line in item_lines]
+        await _record_sales(db, total["order_date"], previous_status, -total["order_count"], -total["revenue"], removed)
+        await _record_sales(db, total["order_date"], status, total["order_count"], total["revenue"], item_lines)
+
+    await _publish_orders(db, moved_ids)
+    _on_commit(db, order_versions.bump)
+    return orders, moved
+
+async def batch_update_order_status(order_ids: List[int], status: str, db: AsyncSession = Depends(get_db)):
+    """
+    Move many orders to payment status `status` in one transaction.
+
+    See _change_order_status for how orders are moved. Returns one result
+    per distinct order id, in request order, with `success`, the order's
+    `payment_status` afterwards and a `detail` when it was not moved.
+    """
+    if status not in STATUS_TRANSITIONS:
+        raise ValueError(f"Unknown payment status: {status}")
+
+    order_ids = list(dict.fromkeys(order_ids))
+    orders, moved = await _change_order_status(db, order_ids, status)
+    if moved:
+        await db.commit()
+    archived = await _archived_statuses(db, [order_id for order_id in order_ids if order_id not in orders])
+
+    results = []
+    for order_id in order_ids:
+        order = orders.get(order_id)
+        if order_id in moved:
+            results.append({"order_id": order_id, "success": True, "payment_status": status})
+        elif order_id in archived:
+            results.append({"order_id": order_id, "success": False, "payment_status": archived[order_id],
+                            "detail": "Order is archived"})
+        elif order is None:
+            results.append({"order_id": order_id, "success": False, "payment_status": None, "detail": "Order not found"})
+        elif order.payment_status == status:
+            results.append({"order_id": order_id, "success": False, "payment_status": status,
+                            "detail": f"Order is already {status}"})
+        elif status in STATUS_TRANSITIONS[order.payment_status]:
+            results.append({"order_id": order_id, "success": False, "payment_status": None,
+                            "detail": "Order was changed by another request"})
+        else:
+            results.append({"order_id": order_id, "success": False, "payment_status": order.payment_status,
+                            "detail": f"Cannot change a {order.payment_status} order to {status}"})
+    return results
+
+def _order_filters(
     status: Optional[str] = None,
     item_name: Optional[str] = None,
     min_quantity: Optional[int] = None,
@@ -273,94 +1204,438 @@ def search_orders(
     order_date_end: Optional[str] = None,
     payment_date_start: Optional[str] = None,
     payment_date_end: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
-    """Search orders with various filter criteria"""
-    query = db.query(Order)
-    
-    # Add filters based on provided parameters
+    orders=Order,
+    order_items=OrderItem,
+) -> list:
+    """
+    Build the WHERE clauses for the order search filters.
+
+    Shared by search_orders and the order export so both select the same
+    orders. `orders` and `order_items` are the live tables or the archive
+    ones; only the live lines have a full-text index. Raises ValueError for
+    a malformed date.
+    """
+    filters = []
+
     if status:
-        query = query.filter(Order.payment_status == status)
-    
-    # Handle item name filter through OrderItem relationship
+        filters.append(orders.payment_status == status)
+
+    # Item-level filters all apply to the same order line. Matching orders are
+    # selected with an IN subquery over order_items, so no DISTINCT is needed.
+    line_filters = []
     if item_name:
-        query = query.join(OrderItem).filter(OrderItem.item_name.ilike(f"%{item_name}%"))
-    
-    # Handle quantity filters through OrderItem relationship
+        if order_items is OrderItem and _use_search_index(item_name):
+            line_filters.append(order_items.id.in_(
+                select(order_items_fts.c.rowid)
+                .filter(order_items_fts.c.item_name.op("MATCH")(_match_phrase(item_name)))
+            ))
+        else:
+            line_filters.append(order_items.item_name.ilike(f"%{item_name}%"))
+
     if min_quantity is not None:
-        query = query.join(OrderItem, isouter=True).filter(OrderItem.quantity >= min_quantity)
-    
+        line_filters.append(order_items.quantity >= min_quantity)
+
     if max_quantity is not None:
-        query = query.join(OrderItem, isouter=True).filter(OrderItem.quantity <= max_quantity)
-    
+        line_filters.append(order_items.quantity <= max_quantity)
+
+    if line_filters:
+        filters.append(orders.id.in_(select(order_items.order_id).filter(*line_filters)))
+
     if order_date_start:
-        query = query.filter(Order.order_date >= order_date_start)
-    
+        filters.append(orders.order_date >= parse_timestamp(order_date_start))
+
     if order_date_end:
-        query = query.filter(Order.order_date <= order_date_end)
-    
+        filters.append(orders.order_date <= parse_timestamp(order_date_end, end_of_day=True))
+
     if payment_date_start:
-        query = query.filter(Order.payment_date >= payment_date_start)
-    
+        filters.append(orders.payment_date >= parse_timestamp(payment_date_start))
+
     if payment_date_end:
-        query = query.filter(Order.payment_date <= payment_date_end)
-    
-    # Add default sorting
-    query = query.order_by(Order.order_date.desc())
-    
-    # Use distinct to avoid duplicate orders due to joins
-    query = query.distinct()
-    
-    # Add eager loading for order_items
-    query = query.options(joinedload(Order.order_items))
-    
-    orders = query.all()
-    
-    # Explicitly create OrderResponse objects with items
-    result = []
-    for order in orders:
-        items = [OrderItemResponse.model_validate(item) for item in order.order_items]
-        order_dict = OrderResponse.model_validate(order)
-        order_dict.items = items
-        result.append(order_dict)
-    
-    return result
+        filters.append(orders.payment_date <= parse_timestamp(payment_date_end, end_of_day=True))
+
+    return filters
+
+async def search_orders(
+    status: Optional[str] = None,
+    item_name: Optional[str] = None,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    order_date_start: Optional[str] = None,
+    order_date_end: Optional[str] = None,
+    payment_date_start: Optional[str] = None,
+    payment_date_end: Optional[str] = None,
+    sort_by: str = "order_date",
+    sort_order: str = "desc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search orders with various filter criteria.
+
+    Date bounds are ISO strings; a date-only end bound includes that whole day.
+    Sorting happens in SQL on any key in SORT_KEYS, so it composes with keyset
+    pagination. Archived orders are searched too, unless the filters rule
+    them out (see _archive_needed). Returns one page of matching orders and
+    the cursor for the next page (None when there are no more results).
+    Orders are plain dicts ready for JSON encoding. Raises ValueError for an
+    unknown sort key, a malformed date or a malformed cursor.
+    """
+    filters = (
+        status, item_name, min_quantity, max_quantity,
+        order_date_start, order_date_end, payment_date_start, payment_date_end
+    )
+    query = _order_columns_query().filter(*_order_filters(*filters))
+
+    archive_query = None
+    if await _archive_needed(db, status, order_date_start, payment_date_start):
+        archive_query = _order_columns_query(ArchivedOrder).filter(
+            *_order_filters(*filters, orders=ArchivedOrder, order_items=ArchivedOrderItem)
+        )
+
+    return await _fetch_order_page(db, query, limit, cursor, sort_by, sort_order, archive_query)
+
+# Shared cache of encoded search result pages for this process
+search_results = SearchResultCache(SEARCH_CACHE_ENTRIES, int(SEARCH_CACHE_MAX_MB * 1024 * 1024), SEARCH_CACHE_TTL_SECONDS)
+
+def search_cache_key(
+    status: Optional[str] = None,
+    item_name: Optional[str] = None,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    order_date_start: Optional[str] = None,
+    order_date_end: Optional[str] = None,
+    payment_date_start: Optional[str] = None,
+    payment_date_end: Optional[str] = None,
+    sort_by: str = "order_date",
+    sort_order: str = "desc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> tuple:
+    """
+    Normalize search_orders parameters into a search_results cache key.
+
+    Parameters that select the same page map to the same key: empty values
+    count as missing, ASCII item names match case-insensitively like the
+    search itself, and dates are keyed on the timestamps they bound, so
+    "2024-01-05" and "2024-01-05T00:00:00" share a start. Raises ValueError
+    for a malformed date.
+    """
+    def bound(value: Optional[str], end_of_day: bool = False) -> Optional[str]:
+        return parse_timestamp(value, end_of_day).isoformat() if value else None
+
+    if item_name and item_name.isascii():
+        item_name = item_name.lower()
+    return (
+        status or None,
+        item_name or None,
+        min_quantity,
+        max_quantity,
+        bound(order_date_start),
+        bound(order_date_end, end_of_day=True),
+        bound(payment_date_start),
+        bound(payment_date_end, end_of_day=True),
+        sort_by,
+        sort_order.lower(),
+        limit,
+        cursor or None,
+    )
+
+async def _archive_needed(
+    db: AsyncSession,
+    status: Optional[str],
+    order_date_start: Optional[str],
+    payment_date_start: Optional[str],
+) -> bool:
+    """
+    Whether a search with these filters can match archived orders.
+
+    Only settled orders are archived, and the newest archived dates are read
+    from their indexes, so searches for pending orders or for recent dates
+    never touch the archive tables.
+    """
+    if status == "pending":
+        return False
+
+    newest_order_date, newest_payment_date = (await db.execute(
+        select(func.max(ArchivedOrder.order_date), func.max(ArchivedOrder.payment_date))
+    )).one()
+    if newest_order_date is None:
+        return False
+    if order_date_start and parse_timestamp(order_date_start) > newest_order_date:
+        return False
+    if payment_date_start and (newest_payment_date is None or parse_timestamp(payment_date_start) > newest_payment_date):
+        return False
+    return True
+
+async def summarize_orders(
+    status: Optional[str] = None,
+    item_name: Optional[str] = None,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    order_date_start: Optional[str] = None,
+    order_date_end: Optional[str] = None,
+    payment_date_start: Optional[str] = None,
+    payment_date_end: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Count and total the orders search_orders finds for the same filters.
+
+    Returns order_count, revenue (sum of total_price) and item_quantity
+    (units on the orders' lines), overall and per payment status under
+    by_status. Only aggregates are read, never the orders. Filters the daily
+    rollup answers exactly, payment status and whole-day order dates, are
+    summed from it; others run COUNT/SUM over the orders and their lines,
+    in the archive too when it may match. Raises ValueError for a malformed
+    date.
+    """
+    filters = (
+        status, item_name, min_quantity, max_quantity,
+        order_date_start, order_date_end, payment_date_start, payment_date_end
+    )
+    days = None
+    if not (item_name or min_quantity is not None or max_quantity is not None or payment_date_start or payment_date_end):
+        days = _rollup_days(order_date_start, order_date_end)
+
+    totals: Dict[str, Dict[str, Any]] = {}
+
+    def add(payment_status, order_count=0, revenue=0.0, item_quantity=0):
+        entry = totals.setdefault(payment_status, {
+            "payment_status": payment_status, "order_count": 0, "revenue": 0.0, "item_quantity": 0
+        })
+        entry["order_count"] += order_count or 0
+        entry["revenue"] += revenue or 0.0
+        entry["item_quantity"] += item_quantity or 0
+
+    if days is not None:
+        start, end = days
+        day_filters = [DailySales.payment_status == status] if status else []
+        item_day_filters = [DailyItemSales.payment_status == status] if status else []
+        if start:
+            day_filters.append(DailySales.day >= start)
+            item_day_filters.append(DailyItemSales.day >= start)
+        if end:
+            day_filters.append(DailySales.day <= end)
+            item_day_filters.append(DailyItemSales.day <= end)
+
+        for row in await db.execute(
+            select(DailySales.payment_status, func.sum(DailySales.order_count), func.sum(DailySales.revenue))
+            .filter(*day_filters)
+            .group_by(DailySales.payment_status)
+        ):
+            add(row[0], order_count=row[1], revenue=row[2])
+        for row in await db.execute(
+            select(DailyItemSales.payment_status, func.sum(DailyItemSales.quantity))
+            .filter(*item_day_filters)
+            .group_by(DailyItemSales.payment_status)
+        ):
+            add(row[0], item_quantity=row[1])
+    else:
+        tiers = [(Order, OrderItem)]
+        if await _archive_needed(db, status, order_date_start, payment_date_start):
+            tiers.append((ArchivedOrder, ArchivedOrderItem))
+        for orders, order_items in tiers:
+            order_filters = _order_filters(*filters, orders=orders, order_items=order_items)
+            for row in await db.execute(
+                select(orders.payment_status, func.count(), func.sum(orders.total_price))
+                .filter(*order_filters)
+                .group_by(orders.payment_status)
+            ):
+                add(row[0], order_count=row[1], revenue=row[2])
+            for row in await db.execute(
+                select(orders.payment_status, func.sum(order_items.quantity))
+                .join(order_items, order_items.order_id == orders.id)
+                .filter(*order_filters)
+                .group_by(orders.payment_status)
+            ):
+                add(row[0], item_quantity=row[1])
+
+    # The rollup keeps emptied statuses as zero rows
+    by_status = [entry for _, entry in sorted(totals.items()) if entry["order_count"]]
+    for entry in by_status:
+        entry["revenue"] = round(entry["revenue"], 2)
+    return {
+        "order_count": sum(entry["order_count"] for entry in by_status),
+        "revenue": round(sum(entry["revenue"] for entry in by_status), 2),
+        "item_quantity": sum(entry["item_quantity"] for entry in by_status),
+        "by_status": by_status,
+    }
+
+def _rollup_days(order_date_start: Optional[str], order_date_end: Optional[str]):
+    """
+    The (first, last) days covered by order date bounds, if they fall on day
+    boundaries so the daily rollup can answer for them; otherwise None.
+    Either day is None when its bound is missing.
+    """
+    start = parse_timestamp(order_date_start) if order_date_start else None
+    end = parse_timestamp(order_date_end, end_of_day=True) if order_date_end else None
+    if start and start.time() != datetime.min.time():
+        return None
+    if end and end.time() != datetime.max.time():
+        return None
+    return (start.date() if start else None, end.date() if end else None)
+
+# Order export
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CSV_COLUMNS = [
+    "order_id", "order_date", "payment_status", "payment_date", "total_price",
+    "order_item_id", "item_id", "item_name", "quantity", "unit_price", "subtotal",
+]
+
+def export_orders(export_format: str = "ndjson", batch_size: int = 1000, **filters):
+    """
+    Stream every order matching the search filters, oldest first.
+
+    Returns an async generator of text chunks: one JSON object per order
+    (with its items) for "ndjson", or one row per order line for "csv".
+    Filters are validated up front, so bad input raises ValueError before
+    anything is streamed.
+
+    The generator opens its own session and reads orders joined to their
+    lines through a server-side cursor, `batch_size` rows at a time, so
+    memory use does not grow with the size of the export.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    # Archived orders are included; both tiers are read in one statement ordered by id
+    statement = (
+        union_all(*(
+            select(
+                orders.id.label("id"), orders.order_date, orders.payment_status, orders.payment_date, orders.total_price,
+                order_items.id.label("order_item_id"), order_items.item_id, order_items.item_name,
+                order_items.quantity, order_items.unit_price, order_items.subtotal,
+            )
+            .outerjoin(order_items, order_items.order_id == orders.id)
+            .filter(*_order_filters(**filters, orders=orders, order_items=order_items))
+            for orders, order_items in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+        ))
+        .order_by("id", "order_item_id")
+        .execution_options(yield_per=batch_size)
+    )
+    encode = _export_ndjson if export_format == "ndjson" else _export_csv
+    return encode(statement)
+
+async def _export_rows(statement):
+    """Yield batches of export rows from a dedicated streaming session"""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement)
+        async for rows in result.partitions():
+            yield rows
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+async def _export_ndjson(statement):
+    # Rows arrive ordered by order id, so each order's lines are adjacent and
+    # only the order being assembled is held in memory
+    order = None
+    async for rows in _export_rows(statement):
+        lines = []
+        for row in rows:
+            if order is None or order["id"] != row.id:
+                if order is not None:
+                    lines.append(json.dumps(order))
+                order = {
+                    "id": row.id,
+                    "total_price": row.total_price,
+                    "payment_status": row.payment_status,
+                    "order_date": _isoformat(row.order_date),
+                    "payment_date": _isoformat(row.payment_date),
+                    "items": [],
+                }
+            if row.order_item_id is not None:
+                order["items"].append({
+                    "id": row.order_item_id,
+                    "item_id": row.item_id,
+                    "item_name": row.item_name,
+                    "quantity": row.quantity,
+                    "unit_price": row.unit_price,
+                    "subtotal": row.subtotal,
+                })
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    if order is not None:
+        yield json.dumps(order) + "\n"
+
+async def _export_csv(statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Send the header straight away so the client sees the first byte immediately
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    async for rows in _export_rows(statement):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (
+                row.id, _isoformat(row.order_date), row.payment_status, _isoformat(row.payment_date),
+                row.total_price, row.order_item_id, row.item_id, row.item_name,
+                row.quantity, row.unit_price, row.subtotal,
+            )
+            for row in rows
+        )
+        yield buffer.getvalue()
 
 # Order item operations
-def add_item_to_order(order_id: int, item_id: int, quantity: int, db: Session = Depends(get_db)):
-    """Add a new item to an existing order"""
-    # Check if order exists and is not completed or cancelled
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order or order.payment_status != "pending":
+async def add_item_to_order(order_id: int, item_id: int, quantity: int, db: AsyncSession = Depends(get_db)):
+    """
+    Add a new item to an existing order; returns (success, message).
+
+    Goes through the group-commit writer like create_order when
+    WRITE_QUEUE_ENABLED is set.
+    """
+    if WRITE_QUEUE_ENABLED:
+        return await order_writes.submit(_add_item_to_order, order_id, item_id, quantity)
+
+    success, message = await _add_item_to_order(db, order_id, item_id, quantity)
+    if success:
+        await db.commit()
+    return success, message
+
+async def _add_item_to_order(db: AsyncSession, order_id: int, item_id: int, quantity: int):
+    """Write a new item onto an existing order, leaving the commit to the caller"""
+    # Check if order exists and is not completed or cancelled, and hold it until commit
+    order = await _lock_pending_order(db, order_id)
+    if not order:
         return False, "Order not found or not in pending status"
-    
+
     # Check if item exists
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         return False, "Item not found"
-    
-    # Check if there's enough inventory
-    if item.remaining_quantity is not None and item.remaining_quantity < quantity:
-        return False, f"Not enough stock. Only {item.remaining_quantity} available."
-    
+
+    # Take the stock first; the guarded update fails if another order got there first
+    available = await _take_stock(db, item_id, quantity)
+    if available is not None:
+        return False, f"Not enough stock. Only {available} available."
+
     # Check if item already exists in this order
-    existing_order_item = db.query(OrderItem).filter(
-        OrderItem.order_id == order_id,
-        OrderItem.item_id == item_id
-    ).first()
-    
+    existing_order_item = await db.scalar(
+        select(OrderItem).filter(
+            OrderItem.order_id == order_id,
+            OrderItem.item_id == item_id
+        )
+    )
+
     if existing_order_item:
-        # Update existing order item
-        old_quantity = existing_order_item.quantity
+        # Update existing order item, at the price the line was sold at
+        old_subtotal = existing_order_item.subtotal
         existing_order_item.quantity += quantity
         existing_order_item.subtotal = existing_order_item.quantity * existing_order_item.unit_price
-        
+        delta = existing_order_item.subtotal - old_subtotal
+
         # Update order total price
-        order.total_price += quantity * item.price_per_quantity
-        
-        # Update inventory if tracked
-        if item.remaining_quantity is not None:
-            item.remaining_quantity -= quantity
+        order.total_price += delta
+
+        await _record_sales(db, order.order_date, order.payment_status, 0, delta, [
+            {"item_id": item_id, "item_name": existing_order_item.item_name, "quantity": quantity,
+             "revenue": delta}
+        ])
     else:
         # Create new order item
         subtotal = quantity * item.price_per_quantity
@@ -373,103 +1648,181 @@ def add_item_to_order(order_id: int, item_id: int, quantity: int, db: Session =
             subtotal=subtotal
         )
         db.add(order_item)
-        
+
         # Update order total price
         order.total_price += subtotal
-        
-        # Update inventory if tracked
-        if item.remaining_quantity is not None:
-            item.remaining_quantity -= quantity
-    
-    db.commit()
+
+        await _record_sales(db, order.order_date, order.payment_status, 0, subtotal, [
+            {"item_id": item_id, "item_name": item.item_name, "quantity": quantity, "revenue": subtotal}
+        ])
+
+    await _publish_orders(db, [order_id])
+    _on_commit(db, order_versions.bump)
     return True, "Item added to order"
 
-def remove_item_from_order(order_id: int, order_item_id: int, db: Session = Depends(get_db)):
+async def remove_item_from_order(order_id: int, order_item_id: int, db: AsyncSession = Depends(get_db)):
     """Remove an item from an existing order"""
-    # Check if order exists and is not completed or cancelled
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order or order.payment_status != "pending":
+    # Check if order exists and is not completed or cancelled, and hold it until commit
+    order = await _lock_pending_order(db, order_id)
+    if not order:
+        await db.rollback()
         return False, "Order not found or not in pending status"
-    
+
     # Check if order item exists and belongs to this order
-    order_item = db.query(OrderItem).filter(
-        OrderItem.id == order_item_id,
-        OrderItem.order_id == order_id
-    ).first()
-    
+    order_item = await db.scalar(
+        select(OrderItem).filter(
+            OrderItem.id == order_item_id,
+            OrderItem.order_id == order_id
+        )
+    )
+
     if not order_item:
+        await db.rollback()
         return False, "Order item not found"
-    
-    # Update order total price
-    order.total_price -= order_item.subtotal
-    
+
+    # Update order total price, rounded to cents so float drift cannot take it below zero
+    order.total_price = round(order.total_price - order_item.subtotal, 2)
+
     # Restore inventory if tracked
-    item = db.query(Item).filter(Item.id == order_item.item_id).first()
-    if item and item.remaining_quantity is not None:
-        item.remaining_quantity += order_item.quantity
-    
+    await _adjust_stock(db, {order_item.item_id: order_item.quantity})
+
     # Remove the order item
-    db.delete(order_item)
-    
+    await db.delete(order_item)
+    await db.flush()
+
     # If this was the last item, cancel the order
-    remaining_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).count()
+    remaining_items = await db.scalar(
+        select(func.count()).select_from(OrderItem).filter(OrderItem.order_id == order_id)
+    )
+    if remaining_items == 0:
+        await db.delete(order)
+
+    # A deleted order also leaves the day's order count
+    await _record_sales(db, order.order_date, order.payment_status, -1 if remaining_items == 0 else 0, -order_item.subtotal, [
+        {"item_id": order_item.item_id, "item_name": order_item.item_name, "quantity": -order_item.quantity,
+         "revenue": -order_item.subtotal}
+    ])
+
     if remaining_items == 0:
-        db.delete(order)
-    
-    db.commit()
+        _publish(db, "order_deleted", {"order_id": order_id})
+    else:
+        await _publish_orders(db, [order_id])
+    _on_commit(db, order_versions.bump)
+    await db.commit()
     return True, "Item removed from order"
 
-def update_order_item_quantity(order_id: int, order_item_id: int, new_quantity: int, db: Session = Depends(get_db)):
+async def update_order_item_quantity(order_id: int, order_item_id: int, new_quantity: int, db: AsyncSession = Depends(get_db)):
     """Update the quantity of an item in an order"""
-    # Check if order exists and is not completed or cancelled
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order or order.payment_status != "pending":
+    # Check if order exists and is not completed or cancelled, and hold it until commit,
+    # so the line read below is the one the quantity difference is taken from
+    order = await _lock_pending_order(db, order_id)
+    if not order:
+        await db.rollback()
         return False, "Order not found or not in pending status"
-    
+
     # Check if order item exists and belongs to this order
-    order_item = db.query(OrderItem).filter(
-        OrderItem.id == order_item_id,
-        OrderItem.order_id == order_id
-    ).first()
-    
+    order_item = await db.scalar(
+        select(OrderItem).filter(
+            OrderItem.id == order_item_id,
+            OrderItem.order_id == order_id
+        )
+    )
+
     if not order_item:
+        await db.rollback()
         return False, "Order item not found"
-    
+
     # If new quantity is 0 or less, remove the item
     if new_quantity <= 0:
-        return remove_item_from_order(order_id, order_item_id, db)
-    
+        return await remove_item_from_order(order_id, order_item_id, db)
+
     # Calculate quantity difference
     quantity_diff = new_quantity - order_item.quantity
-    
-    # Check if there's enough inventory for an increase
+
+    # Take stock for an increase, failing if there is not enough
     if quantity_diff > 0:
-        item = db.query(Item).filter(Item.id == order_item.item_id).first()
-        if item.remaining_quantity is not None and item.remaining_quantity < quantity_diff:
-            return False, f"Not enough stock. Only {item.remaining_quantity} additional units available."
-        
-        # Update inventory if tracked
-        if item.remaining_quantity is not None:
-            item.remaining_quantity -= quantity_diff
+        available = await _take_stock(db, order_item.item_id, quantity_diff)
+        if available is not None:
+            await db.rollback()
+            return False, f"Not enough stock. Only {available} additional units available."
     elif quantity_diff < 0:
         # Restore inventory for a decrease
-        item = db.query(Item).filter(Item.id == order_item.item_id).first()
-        if item and item.remaining_quantity is not None:
-            item.remaining_quantity -= quantity_diff  # Negative diff, so subtract it (which adds)
-    
+        await _adjust_stock(db, {order_item.item_id: -quantity_diff})
+
     # Update order total price
     old_subtotal = order_item.subtotal
     order_item.quantity = new_quantity
     order_item.subtotal = new_quantity * order_item.unit_price
     order.total_price = order.total_price - old_subtotal + order_item.subtotal
-    
-    db.commit()
+
+    await _record_sales(db, order.order_date, order.payment_status, 0, order_item.subtotal - old_subtotal, [
+        {"item_id": order_item.item_id, "item_name": order_item.item_name, "quantity": quantity_diff,
+         "revenue": order_item.subtotal - old_subtotal}
+    ])
+
+    await _publish_orders(db, [order_id])
+    _on_commit(db, order_versions.bump)
+    await db.commit()
     return True, "Order item quantity updated"
 
-def get_order_items(order_id: int, db: Session = Depends(get_db)):
-    """Get all items in an order"""
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+async def get_order_items(order_id: int, db: AsyncSession = Depends(get_db)):
+    """Get all items in an order, from the archive if it is no longer live"""
+    order_items = (await db.scalars(
+        select(OrderItem).filter(OrderItem.order_id == order_id).order_by(OrderItem.id)
+    )).all()
+    if not order_items:
+        order_items = await db.scalars(
+            select(ArchivedOrderItem).filter(ArchivedOrderItem.order_id == order_id).order_by(ArchivedOrderItem.id)
+        )
     return [OrderItemResponse.model_validate(item) for item in order_items]
 
+# Reports
+async def get_sales_report(start: date, end: date, payment_status: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """
+    Sales between `start` and `end` (inclusive), read only from the rollup tables.
+
+    Returns the per-day totals for each payment status and the per-item totals
+    over the whole period, best sellers first. Cost grows with the number of
+    days and items in the range, not with the number of orders.
+    """
+    if start > end:
+        raise ValueError("start must not be after end")
+
+    day_filters = [DailySales.day.between(start, end), DailySales.order_count != 0]
+    item_filters = [DailyItemSales.day.between(start, end)]
+    if payment_status:
+        day_filters.append(DailySales.payment_status == payment_status)
+        item_filters.append(DailyItemSales.payment_status == payment_status)
+
+    days = await db.scalars(
+        select(DailySales).filter(*day_filters).order_by(DailySales.day, DailySales.payment_status)
+    )
+
+    quantity = func.sum(DailyItemSales.quantity)
+    revenue = func.sum(DailyItemSales.revenue)
+    items = await db.execute(
+        select(
+            DailyItemSales.item_id,
+            func.max(DailyItemSales.item_name).label("item_name"),
+            quantity.label("quantity"),
+            revenue.label("revenue"),
+        )
+        .filter(*item_filters)
+        .group_by(DailyItemSales.item_id)
+        .having(quantity != 0)
+        .order_by(revenue.desc(), DailyItemSales.item_id)
+    )
+
+    return SalesReport(
+        start=start,
+        end=end,
+        payment_status=payment_status,
+        days=[DailySalesResponse.model_validate(day) for day in days],
+        items=[ItemSalesResponse(**row._mapping) for row in items],
+    )
+
 # Initialize the database when this module is imported
 init_db()
+
+# Name searches use the FTS5 indexes when the database has them
+SEARCH_INDEX_ENABLED = has_search_indexes(engine)
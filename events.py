@@ -0,0 +1,170 @@
+"""
+Live change events for the Food Billing Application.
+
+Write paths in database.py publish an event once their transaction has
+committed, and /api/events streams them to the open pages as Server-Sent
+Events, so every terminal patches its order lists and stock levels in place
+instead of reloading. Like the caches, the broker lives in the memory of a
+single worker process: a page only hears about writes made through the
+worker serving its event stream.
+"""
+
+import asyncio
+import collections
+import time
+from typing import AsyncIterator, List, Optional
+
+import orjson
+
+from cache import BOOT_ID
+
+# Recent events kept for pages that reconnect with Last-Event-ID
+REPLAY_EVENTS = 256
+# Events queued for one page before it counts as too far behind to catch up
+SUBSCRIBER_QUEUE_SIZE = 256
+# Comment line sent on idle streams, so proxies do not close them
+HEARTBEAT_SECONDS = 15.0
+# How long browsers wait before reconnecting a dropped stream
+RECONNECT_MILLISECONDS = 3000
+# Streams end after this long and browsers reconnect where they left off, so an
+# open page never holds up a server shutdown or reload for longer
+STREAM_SECONDS = 60.0
+# Changes are still published in full this long after the last stream closed
+# or a page was rendered, so the page connecting soon after can replay them
+LISTEN_GRACE_SECONDS = RECONNECT_MILLISECONDS / 1000 + 5.0
+
+
+class Event:
+    """One published change, already encoded for the wire"""
+
+    __slots__ = ("sequence", "id", "payload")
+
+    def __init__(self, sequence: int, event_type: str, data: dict):
+        self.sequence = sequence
+        self.id = f"{BOOT_ID}-{sequence}"
+        self.payload = (
+            f"id: {self.id}\nevent: {event_type}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+        )
+
+
+class _Subscriber:
+    """Queue of events for one open stream"""
+
+    def __init__(self, broker: "EventBroker"):
+        self.broker = broker
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event: Event):
+        if self.queue.full():
+            # Too far behind to catch up event by event; have the page reload instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = self.broker.resync_event()
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """
+    Fans committed changes out to every open event stream.
+
+    Event ids are BOOT_ID plus a sequence number. A stream opened with the
+    id of the last event a page saw replays what it missed, or asks the page
+    to reload ("resync") when that cannot be done exactly: after a restart,
+    once the events fell out of the replay buffer, or when skip() recorded
+    changes that were not published in full because nobody was listening.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._recent = collections.deque(maxlen=REPLAY_EVENTS)
+        self._sequence = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._expected_at = float("-inf")
+
+    @property
+    def listening(self) -> bool:
+        """Whether a page has a stream open, or may be about to reconnect one"""
+        return bool(self._subscribers) or time.monotonic() - self._expected_at < LISTEN_GRACE_SECONDS
+
+    def expect_stream(self) -> str:
+        """
+        Note that a page is being rendered and will open a stream shortly.
+
+        Returns the id of the latest event, to be handed to the page: it has
+        seen everything up to that event.
+        """
+        self._expected_at = time.monotonic()
+        return f"{BOOT_ID}-{self._sequence}"
+
+    def publish(self, event_type: str, data: dict):
+        """Send an event to every open stream and keep it for replay"""
+        self._sequence += 1
+        event = Event(self._sequence, event_type, data)
+        self._recent.append(event)
+        if not self._subscribers:
+            return
+
+        # Commit hooks of a session used from another thread must not touch the queues directly
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(event)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+
+    def skip(self):
+        """Record a change that was not published, so reconnecting pages resync"""
+        self._sequence += 1
+
+    def resync_event(self) -> Event:
+        return Event(self._sequence, "resync", {})
+
+    def _deliver(self, event: Event):
+        for subscriber in list(self._subscribers):
+            subscriber.put(event)
+
+    def _replay(self, last_event_id: Optional[str]) -> List[Event]:
+        """Events published after `last_event_id`, or a single resync if some are missing"""
+        if not last_event_id:
+            return []
+        boot_id, _, sequence = last_event_id.rpartition("-")
+        if boot_id != BOOT_ID or not sequence.isdigit() or int(sequence) > self._sequence:
+            return [self.resync_event()]
+
+        missed = [event for event in self._recent if event.sequence > int(sequence)]
+        if len(missed) != self._sequence - int(sequence):
+            return [self.resync_event()]
+        return missed
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Server-Sent Events for one page, starting after `last_event_id`.
+
+        Runs until the client disconnects or STREAM_SECONDS have passed.
+        """
+        subscriber = _Subscriber(self)
+        self._loop = asyncio.get_running_loop()
+        self._subscribers.add(subscriber)
+        # Taken right after subscribing, so no event falls between replay and live delivery
+        replay = self._replay(last_event_id)
+        try:
+            yield f"retry: {RECONNECT_MILLISECONDS}\n\n".encode()
+            for event in replay:
+                yield event.payload
+            deadline = time.monotonic() + STREAM_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), min(remaining, HEARTBEAT_SECONDS))
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield event.payload
+        finally:
+            self._subscribers.discard(subscriber)
+            self._expected_at = time.monotonic()
+
+
+# Shared broker for this process
+event_broker = EventBroker()
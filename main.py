@@ -1,140 +1,273 @@
 from fastapi import FastAPI, Request, Form, HTTPException, Query, Body, Path, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Optional, List, Dict, Any
+import json
 import uvicorn
 import database as db
-from sqlalchemy.orm import Session
+from cache import VersionCounter, item_versions, order_versions
+from events import event_broker
+import metrics
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import Pydantic schemas
 from schemas import (
     ItemBase, ItemCreate, ItemUpdate, ItemResponse,
-    OrderBase, OrderCreate, OrderResponse,
-    OrderItemBase, OrderItemCreate, OrderItemUpdate, OrderItemResponse
+    OrderBase, OrderCreate, OrderResponse, OrderPage, OrderSummary, OrderStatusBatch, OrderStatusBatchResponse,
+    OrderItemBase, OrderItemCreate, OrderItemUpdate, OrderItemResponse,
+    SalesReport
 )
 
 app = FastAPI(title="Billing App")
 
+# Per-route latency, per-request query counts and Server-Timing headers
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
-# Routes
+
+@app.on_event("shutdown")
+async def close_write_queue():
+    # Apply order writes still queued for group commit before the process exits
+    await db.order_writes.close()
+
+# Number of recent orders rendered into the history views; older ones load on demand
+RECENT_ORDERS_WINDOW = 50
+
+def not_modified(request: Request, response: Response, version: VersionCounter) -> Optional[Response]:
+    """
+    Handle a conditional GET against a table version.
+
+    Returns a 304 response if the client's If-None-Match already holds the
+    current ETag, so the route can return before querying anything. Otherwise
+    sets the ETag on `response` and returns None. The ETag is taken before the
+    route reads, so a write that lands mid-request only makes it look stale.
+    It also changes when another worker or script writes to the database.
+    """
+    etag = version.etag(db.data_version())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+def order_page(orders: List[Dict[str, Any]], next_cursor: Optional[str], response: Response) -> Response:
+    """
+    Encode a page of order dicts straight to JSON bytes with orjson.
+
+    Skips building OrderPage models and FastAPI's jsonable_encoder pass; the
+    output matches OrderPage, which the routes keep as response_model for the
+    API docs only. Headers already set on the route's `response` (such as the
+    ETag) are carried over.
+    """
+    return ORJSONResponse({"orders": orders, "next_cursor": next_cursor}, headers=dict(response.headers))
+
+def action_response(request: Request, result: Dict[str, Any]):
+    """
+    Answer a form action: `result` as JSON for scripts that accept it, otherwise
+    a redirect back to the home page for plain form posts.
+    """
+    if "application/json" in request.headers.get("accept", ""):
+        return result
+    return RedirectResponse(url="/", status_code=303)
+
 
 # Routes
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request, search: str = "", db_session: Session = Depends(db.get_db)):
-    # Always get all orders
-    completed_orders = db.get_completed_orders(db_session)
-    pending_orders = db.get_pending_orders(db_session)
-    order_history = db.get_order_history(db_session)
+async def home(request: Request, search: str = "", db_session: AsyncSession = Depends(db.get_db)):
+    # Taken before reading, so the page's event stream replays anything committed meanwhile
+    last_event_id = event_broker.expect_stream()
+
+    # Fetch pending orders and the recent window in one query; older history loads on demand
+    home_orders = await db.get_home_orders(RECENT_ORDERS_WINDOW, db_session)
     
     # If search query is provided, filter items
     if search:
-        items = db.search_items(search, db_session)
+        items = await db.search_items(search, db_session)
     else:
-        items = db.get_all_items(db_session)
+        items = await db.get_all_items(db_session)
     
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
             "items": items,
-            "completed_orders": completed_orders,
-            "pending_orders": pending_orders,
-            "order_history": order_history,
-            "search_query": search
+            "pending_orders": home_orders["pending_orders"],
+            "order_history": home_orders["order_history"],
+            "history_cursor": home_orders["history_cursor"],
+            "search_query": search,
+            "last_event_id": last_event_id
         }
     )
 
 @app.get("/api/items", response_class=JSONResponse)
-async def get_items(search: str = Query(None), db_session: Session = Depends(db.get_db)):
+async def get_items(request: Request, response: Response, search: str = Query(None), db_session: AsyncSession = Depends(db.get_db)):
+    if cached := not_modified(request, response, item_versions):
+        return cached
+
     if search:
-        items = db.search_items(search, db_session)
+        items = await db.search_items(search, db_session)
     else:
-        items = db.get_all_items(db_session)
+        items = await db.get_all_items(db_session)
     return items
 
-@app.get("/api/orders", response_class=JSONResponse)
-async def get_orders(db_session: Session = Depends(db.get_db)):
-    orders = db.get_all_orders(db_session)
-    return orders
+# Page size bounds for paginated order listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+@app.get("/api/orders", response_model=OrderPage, response_class=ORJSONResponse)
+async def get_orders(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db_session: AsyncSession = Depends(db.get_db)
+):
+    if cached := not_modified(request, response, order_versions):
+        return cached
+
+    try:
+        orders, next_cursor = await db.get_all_orders(limit=limit, cursor=cursor, db=db_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return order_page(orders, next_cursor, response)
+
+# Media types for the order export formats
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@app.get("/api/orders/export")
+async def export_orders(
+    format: str = Query("ndjson"),
+    status: Optional[str] = Query(None),
+    item_name: Optional[str] = Query(None),
+    min_quantity: Optional[int] = Query(None),
+    max_quantity: Optional[int] = Query(None),
+    order_date_start: Optional[str] = Query(None),
+    order_date_end: Optional[str] = Query(None),
+    payment_date_start: Optional[str] = Query(None),
+    payment_date_end: Optional[str] = Query(None),
+):
+    # The export streams from its own session, so no request session is opened here
+    try:
+        chunks = db.export_orders(
+            export_format=format.lower(),
+            status=status,
+            item_name=item_name,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            order_date_start=order_date_start,
+            order_date_end=order_date_end,
+            payment_date_start=payment_date_start,
+            payment_date_end=payment_date_end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format.lower()],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format.lower()}"'}
+    )
 
 @app.post("/api/create-order")
 async def create_order(
     order: OrderCreate,
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
     if not order.items:
         raise HTTPException(status_code=400, detail="Order must contain at least one item")
     
-    # Prepare items for the order
-    order_items = []
-    
-    for order_item in order.items:
-        item = db.get_item_by_id(order_item.item_id, db_session)
-        if not item:
-            raise HTTPException(status_code=404, detail=f"Item with ID {order_item.item_id} not found")
-        
-        # Check inventory
-        if item.remaining_quantity is not None:
-            if item.remaining_quantity < order_item.quantity:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Not enough stock for {item.item_name}. Only {item.remaining_quantity} available."
-                )
-            
-            # Update remaining quantity
-            db.update_item_quantity(order_item.item_id, -order_item.quantity, db_session)
-        
-        # Add to order items list
-        subtotal = item.price_per_quantity * order_item.quantity
-        order_items.append({
-            "item_id": order_item.item_id,
-            "item_name": item.item_name,
-            "quantity": order_item.quantity,
-            "unit_price": item.price_per_quantity,
-            "subtotal": subtotal
-        })
-    
-    # Create new order
-    order_id = db.create_order(
-        items=order_items,
-        payment_status=order.payment_status,
-        db=db_session
-    )
+    # Stock checks, decrements and inserts all happen in one transaction
+    try:
+        order_id = await db.create_order(
+            items=[order_item.model_dump() for order_item in order.items],
+            payment_status=order.payment_status,
+            db=db_session
+        )
+    except db.OrderError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     
     return {"order_id": order_id, "success": True}
 
 @app.post("/api/update-payment-status/{order_id}")
-async def update_payment_status(order_id: int, db_session: Session = Depends(db.get_db)):
-    order = db.get_order_by_id(order_id, db_session)
-    if not order:
+async def update_payment_status(request: Request, order_id: int, db_session: AsyncSession = Depends(db.get_db)):
+    # update_payment_status reports a missing order itself, so no separate lookup is needed
+    try:
+        found = await db.update_payment_status(order_id, db=db_session)
+    except db.OrderError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not found:
         raise HTTPException(status_code=404, detail="Order not found")
-    
-    db.update_payment_status(order_id, db=db_session)
-    return RedirectResponse(url="/", status_code=303)
+    return action_response(request, {"order_id": order_id, "success": True})
 
 @app.post("/api/cancel-order/{order_id}")
-async def cancel_order(order_id: int, db_session: Session = Depends(db.get_db)):
-    order = db.get_order_by_id(order_id, db_session)
-    if not order:
+async def cancel_order(request: Request, order_id: int, db_session: AsyncSession = Depends(db.get_db)):
+    try:
+        found = await db.cancel_order(order_id, db_session)
+    except db.OrderError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not found:
         raise HTTPException(status_code=404, detail="Order not found")
-    
-    success = db.cancel_order(order_id, db_session)
-    if not success:
-        raise HTTPException(status_code=400, detail="Failed to cancel order")
-    
-    return RedirectResponse(url="/", status_code=303)
+    return action_response(request, {"order_id": order_id, "success": True})
+
+@app.post("/api/orders/batch-status", response_model=OrderStatusBatchResponse)
+async def batch_update_order_status(batch: OrderStatusBatch, db_session: AsyncSession = Depends(db.get_db)):
+    """
+    Settle or cancel many orders at once.
+
+    Every order is reported on its own: orders that are missing, already in
+    the target status or cannot move to it are left alone, while the others
+    change in one transaction.
+    """
+    try:
+        results = await db.batch_update_order_status(batch.order_ids, batch.payment_status, db_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"updated": sum(result["success"] for result in results), "results": results}
 
 @app.get("/api/search-items")
-async def search_items(query: str = Query(...), db_session: Session = Depends(db.get_db)):
-    items = db.search_items(query, db_session)
+async def search_items(request: Request, response: Response, query: str = Query(...), db_session: AsyncSession = Depends(db.get_db)):
+    if cached := not_modified(request, response, item_versions):
+        return cached
+
+    items = await db.search_items(query, db_session)
     return items
 
+@app.get("/api/cache-stats", response_class=JSONResponse)
+async def cache_stats():
+    return db.get_cache_stats()
+
+@app.get("/api/events")
+async def order_events(request: Request, last_event_id: Optional[str] = Query(None)):
+    """
+    Stream committed order and stock changes as Server-Sent Events.
+
+    Event types: "order" (an order as listed by /api/orders), "order_deleted",
+    "stock" (new stock levels), "items" (the catalog changed, reload it) and
+    "resync" (changes were missed, reload the page). Browsers reconnect with a
+    Last-Event-ID header; the first connection passes the page's id as
+    `last_event_id`.
+    """
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        event_broker.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/search-orders", response_class=HTMLResponse)
 async def search_orders_page(request: Request):
     return templates.TemplateResponse(
@@ -144,8 +277,10 @@ async def search_orders_page(request: Request):
         }
     )
 
-@app.get("/api/search-orders", response_class=JSONResponse)
+@app.get("/api/search-orders", response_model=OrderPage, response_class=ORJSONResponse)
 async def search_orders(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None),
     item_name: Optional[str] = Query(None),
     min_quantity: Optional[int] = Query(None),
@@ -154,63 +289,148 @@ async def search_orders(
     order_date_end: Optional[str] = Query(None),
     payment_date_start: Optional[str] = Query(None),
     payment_date_end: Optional[str] = Query(None),
-    sort_by: Optional[str] = Query("order_date"),
-    sort_order: Optional[str] = Query("desc"),
-    db_session: Session = Depends(db.get_db)
+    sort_by: str = Query("order_date"),
+    sort_order: str = Query("desc"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db_session: AsyncSession = Depends(db.get_db)
 ):
-    # Call the database search function
-    orders = db.search_orders(
-        status=status,
-        item_name=item_name,
-        min_quantity=min_quantity,
-        max_quantity=max_quantity,
-        order_date_start=order_date_start,
-        order_date_end=order_date_end,
-        payment_date_start=payment_date_start,
-        payment_date_end=payment_date_end,
-        db=db_session
-    )
-    
-    # With Pydantic models, the items are already included in the order response
-    # Convert to dict for consistency with the rest of the API
-    enhanced_orders = [order.model_dump() for order in orders]
-    
-    # Handle sorting (since SQLite might not handle complex sorting well)
-    if sort_by and sort_by in ["id", "item_name", "quantity", "price", "order_date", "payment_date", "total_price"]:
-        reverse = sort_order.lower() == "desc"
-        if sort_by in ["quantity", "price", "id", "total_price"]:
-            enhanced_orders = sorted(enhanced_orders, key=lambda x: float(x.get(sort_by, 0)) if x.get(sort_by) is not None else 0, reverse=reverse)
-        else:
-            enhanced_orders = sorted(enhanced_orders, key=lambda x: x.get(sort_by, "") if x.get(sort_by) is not None else "", reverse=reverse)
-    
-    return enhanced_orders
+    if cached := not_modified(request, response, order_versions):
+        return cached
+
+    # Pages other clients already fetched since the last order write are served as stored
+    try:
+        key = db.search_cache_key(
+            status, item_name, min_quantity, max_quantity, order_date_start, order_date_end,
+            payment_date_start, payment_date_end, sort_by, sort_order, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if (body := db.search_results.get(key)) is not None:
+        return Response(body, media_type="application/json", headers=dict(response.headers))
+    version = order_versions.value
+
+    # Filtering, sorting and pagination all happen in SQL
+    try:
+        orders, next_cursor = await db.search_orders(
+            status=status,
+            item_name=item_name,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            order_date_start=order_date_start,
+            order_date_end=order_date_end,
+            payment_date_start=payment_date_start,
+            payment_date_end=payment_date_end,
+            sort_by=sort_by,
+            sort_order=sort_order.lower(),
+            limit=limit,
+            cursor=cursor,
+            db=db_session
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page = order_page(orders, next_cursor, response)
+    db.search_results.put(key, page.body, version)
+    return page
+
+@app.get("/api/search-orders/summary", response_model=OrderSummary, response_class=ORJSONResponse)
+async def search_orders_summary(
+    request: Request,
+    response: Response,
+    status: Optional[str] = Query(None),
+    item_name: Optional[str] = Query(None),
+    min_quantity: Optional[int] = Query(None),
+    max_quantity: Optional[int] = Query(None),
+    order_date_start: Optional[str] = Query(None),
+    order_date_end: Optional[str] = Query(None),
+    payment_date_start: Optional[str] = Query(None),
+    payment_date_end: Optional[str] = Query(None),
+    db_session: AsyncSession = Depends(db.get_db)
+):
+    """Order count, revenue and units of everything /api/search-orders matches, without the orders"""
+    if cached := not_modified(request, response, order_versions):
+        return cached
+
+    try:
+        key = ("summary",) + db.search_cache_key(
+            status, item_name, min_quantity, max_quantity, order_date_start, order_date_end,
+            payment_date_start, payment_date_end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if (body := db.search_results.get(key)) is not None:
+        return Response(body, media_type="application/json", headers=dict(response.headers))
+    version = order_versions.value
+
+    try:
+        summary = await db.summarize_orders(
+            status=status,
+            item_name=item_name,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            order_date_start=order_date_start,
+            order_date_end=order_date_end,
+            payment_date_start=payment_date_start,
+            payment_date_end=payment_date_end,
+            db=db_session
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = ORJSONResponse(summary, headers=dict(response.headers))
+    db.search_results.put(key, result.body, version)
+    return result
+
+# Reports
+# Days covered by the sales report when no range is given
+DEFAULT_REPORT_DAYS = 30
+
+@app.get("/api/reports/sales", response_model=SalesReport)
+async def sales_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    payment_status: Optional[str] = Query(None),
+    db_session: AsyncSession = Depends(db.get_db)
+):
+    # Reads only the daily rollup tables, never the orders themselves
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    try:
+        return await db.get_sales_report(start, end, payment_status, db_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Inventory Management Routes
 @app.get("/inventory", response_class=HTMLResponse)
-async def inventory_page(request: Request, db_session: Session = Depends(db.get_db)):
-    items = db.get_all_items(db_session)
-    order_history = db.get_order_history(db_session)
+async def inventory_page(request: Request, db_session: AsyncSession = Depends(db.get_db)):
+    items = await db.get_all_items(db_session)
+    order_history, history_cursor = await db.get_order_history(limit=RECENT_ORDERS_WINDOW, db=db_session)
     
     return templates.TemplateResponse(
         "inventory.html",
         {
             "request": request,
             "items": items,
-            "order_history": order_history
+            "order_history": order_history,
+            "history_cursor": history_cursor
         }
     )
 
 @app.get("/api/items/{item_id}", response_class=JSONResponse)
-async def get_item(item_id: int, db_session: Session = Depends(db.get_db)):
-    item = db.get_item_by_id(item_id, db_session)
+async def get_item(request: Request, response: Response, item_id: int, db_session: AsyncSession = Depends(db.get_db)):
+    if cached := not_modified(request, response, item_versions):
+        return cached
+
+    item = await db.get_item_by_id(item_id, db_session)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
 
 @app.post("/api/items", response_class=JSONResponse)
-async def create_item(item: ItemCreate, db_session: Session = Depends(db.get_db)):
+async def create_item(item: ItemCreate, db_session: AsyncSession = Depends(db.get_db)):
     try:
-        item_id = db.add_item(
+        item_id = await db.add_item(
             item_name=item.item_name,
             price_per_quantity=item.price_per_quantity,
             remaining_quantity=item.remaining_quantity,
@@ -220,14 +440,41 @@ async def create_item(item: ItemCreate, db_session: Session = Depends(db.get_db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/items/bulk", response_class=JSONResponse)
+async def bulk_upsert_items(request: Request, skip_invalid: bool = False, db_session: AsyncSession = Depends(db.get_db)):
+    """
+    Insert or update many items by name in one transaction.
+
+    The body is a JSON array of items (or {"items": [...]}) or, with a text/csv
+    content type, CSV with an item_name,price_per_quantity,remaining_quantity
+    header. Invalid rows are reported per row; unless skip_invalid is set, any
+    invalid row rejects the whole import with status 422.
+    """
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            rows = db.parse_items_csv(body)
+        else:
+            rows = json.loads(body)
+            if isinstance(rows, dict):
+                rows = rows.get("items")
+            if not isinstance(rows, list):
+                raise ValueError("Expected a JSON array of items")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read items: {e}")
+
+    result = await db.bulk_upsert_items(rows, skip_invalid, db_session)
+    rejected = bool(result["errors"]) and not skip_invalid
+    return JSONResponse({"success": not rejected, **result}, status_code=422 if rejected else 200)
+
 @app.put("/api/items/{item_id}", response_class=JSONResponse)
-async def update_item(item_id: int, item: ItemUpdate, db_session: Session = Depends(db.get_db)):
-    existing_item = db.get_item_by_id(item_id, db_session)
+async def update_item(item_id: int, item: ItemUpdate, db_session: AsyncSession = Depends(db.get_db)):
+    existing_item = await db.get_item_by_id(item_id, db_session)
     if not existing_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
     try:
-        success = db.update_item(
+        success = await db.update_item(
             item_id=item_id,
             item_name=item.item_name,
             price_per_quantity=item.price_per_quantity,
@@ -239,29 +486,29 @@ async def update_item(item_id: int, item: ItemUpdate, db_session: Session = Depe
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/api/items/{item_id}", response_class=JSONResponse)
-async def delete_item(item_id: int, db_session: Session = Depends(db.get_db)):
-    existing_item = db.get_item_by_id(item_id, db_session)
+async def delete_item(item_id: int, db_session: AsyncSession = Depends(db.get_db)):
+    existing_item = await db.get_item_by_id(item_id, db_session)
     if not existing_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    success = db.delete_item(item_id, db_session)
+    success = await db.delete_item(item_id, db_session)
     if not success:
         raise HTTPException(status_code=400, detail="Cannot delete item with existing orders")
     
     return {"success": True}
 
 @app.post("/api/restock-all", response_class=JSONResponse)
-async def restock_all(db_session: Session = Depends(db.get_db)):
-    success = db.restock_all_items(quantity=9999, db=db_session)
+async def restock_all(db_session: AsyncSession = Depends(db.get_db)):
+    success = await db.restock_all_items(quantity=9999, db=db_session)
     return {"success": success}
 
 @app.post("/api/orders/{order_id}/items")
 async def add_item_to_order(
     order_id: int,
     order_item: OrderItemCreate,
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
-    success, message = db.add_item_to_order(
+    success, message = await db.add_item_to_order(
         order_id=order_id,
         item_id=order_item.item_id,
         quantity=order_item.quantity,
@@ -277,9 +524,9 @@ async def add_item_to_order(
 async def remove_item_from_order(
     order_id: int,
     order_item_id: int,
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
-    success, message = db.remove_item_from_order(
+    success, message = await db.remove_item_from_order(
         order_id=order_id,
         order_item_id=order_item_id,
         db=db_session
@@ -295,9 +542,9 @@ async def update_order_item(
     order_id: int,
     order_item_id: int,
     order_item: OrderItemUpdate,
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
-    success, message = db.update_order_item_quantity(
+    success, message = await db.update_order_item_quantity(
         order_id=order_id,
         order_item_id=order_item_id,
         new_quantity=order_item.quantity,
@@ -311,23 +558,29 @@ async def update_order_item(
 
 @app.get("/api/orders/{order_id}/items")
 async def get_order_items(
+    request: Request,
+    response: Response,
     order_id: int,
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
+    if cached := not_modified(request, response, order_versions):
+        return cached
+
     # Check if order exists
-    order = db.get_order_by_id(order_id, db_session)
+    order = await db.get_order_by_id(order_id, db_session)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    order_items = db.get_order_items(order_id, db_session)
+    order_items = await db.get_order_items(order_id, db_session)
     return order_items
 
 @app.post("/api/create-order-form")
 async def create_order_form(
+    request: Request,
     item_id: int = Form(...),
     quantity: int = Form(...),
     payment_status: str = Form(...),
-    db_session: Session = Depends(db.get_db)
+    db_session: AsyncSession = Depends(db.get_db)
 ):
     # Create an order with a single item (for backward compatibility with the form)
     order = OrderCreate(
@@ -336,7 +589,8 @@ async def create_order_form(
     )
     
     result = await create_order(order, db_session)
-    return RedirectResponse(url="/", status_code=303)
+    return action_response(request, result)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Open event streams would otherwise hold up every reload until they end
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, timeout_graceful_shutdown=5)
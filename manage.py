@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Food Billing Application.
+
+Usage:
+    python manage.py migrate                 Apply pending schema migrations
+    python manage.py rebuild-sales-rollup    Recompute the daily sales rollup from all orders
+    python manage.py archive-orders [--older-than-days N] [--batch-size N]
+                                             Move old settled orders to the archive tables
+
+The database is taken from DATABASE_URL, as for the application.
+"""
+
+import argparse
+from sqlalchemy import select, func
+
+
+def migrate(args):
+    """Apply pending migrations and print the schema history"""
+    from migrations import main as run_migrations
+    run_migrations()
+
+
+def rebuild_sales_rollup(args):
+    """Recompute daily_sales and daily_item_sales from orders and order_items"""
+    from database import engine, DATABASE_URL
+    from migrations import rebuild_sales_rollup as rebuild
+    from models import DailySales, DailyItemSales
+
+    with engine.begin() as connection:
+        rebuild(connection)
+        days = connection.scalar(select(func.count(func.distinct(DailySales.day))))
+        item_rows = connection.scalar(select(func.count()).select_from(DailyItemSales))
+
+    print(f"Rebuilt sales rollup for {DATABASE_URL}: {days} days, {item_rows} item rows")
+
+
+def archive_orders(args):
+    """Move completed and cancelled orders older than --older-than-days to the archive tables"""
+    from datetime import timedelta
+    from database import engine, DATABASE_URL
+    from archive import archive_orders as archive
+
+    archived = archive(
+        engine,
+        timedelta(days=args.older_than_days),
+        args.batch_size,
+        progress=lambda total: print(f"  {total} orders archived", flush=True),
+    )
+    print(f"Archived {archived} orders older than {args.older_than_days} days in {DATABASE_URL}")
+
+
+def _archive_arguments(parser):
+    from archive import ARCHIVE_AFTER_DAYS
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f"archive orders placed more than this many days ago (default {ARCHIVE_AFTER_DAYS}, "
+                             "or ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="orders moved per transaction (default 500)")
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "rebuild-sales-rollup": rebuild_sales_rollup,
+    "archive-orders": archive_orders,
+}
+
+# Commands that take options, with the function adding them to their parser
+COMMAND_ARGUMENTS = {
+    "archive-orders": _archive_arguments,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Food Billing maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=command.__doc__)
+        if name in COMMAND_ARGUMENTS:
+            COMMAND_ARGUMENTS[name](subparser)
+
+    args = parser.parse_args()
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
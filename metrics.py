@@ -0,0 +1,344 @@
+"""
+Request and database metrics for the Food Billing Application.
+
+MetricsMiddleware times every request by route template. SQLAlchemy event
+hooks count the queries each request runs and the time spent in them, and
+timed_pool() records how long each connection checkout took. Metrics live in
+the memory of a single worker process and are rendered in the Prometheus text
+format by render(); each response also reports its own share in a
+Server-Timing header.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.routing import Match
+
+# Histogram bucket upper bounds
+REQUEST_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CHECKOUT_SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+WRITE_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A value that only goes up, per combination of label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, per combination of label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...], labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # Per label values: [count per bucket..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), key + (_format_value(float(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value read when the metrics are rendered, from `collect()` returning {label values: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Dict[LabelValues, float]],
+                 labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+# Every metric rendered by render(), in order
+REGISTRY: List = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# Requests
+REQUESTS = _register(Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")))
+REQUEST_SECONDS = _register(Histogram(
+    "http_request_duration_seconds", "Time to handle a request, until the whole response was sent",
+    REQUEST_SECONDS_BUCKETS, ("method", "route")))
+REQUEST_QUERIES = _register(Histogram(
+    "http_request_db_queries", "Database queries run by a request",
+    QUERIES_PER_REQUEST_BUCKETS, ("method", "route")))
+REQUEST_QUERY_SECONDS = _register(Histogram(
+    "http_request_db_seconds", "Time a request spent running database queries",
+    REQUEST_SECONDS_BUCKETS, ("method", "route")))
+
+# Database, across requests and offline scripts alike
+QUERY_SECONDS = _register(Histogram(
+    "db_query_duration_seconds", "Time to execute a single database statement",
+    QUERY_SECONDS_BUCKETS, ("engine",)))
+CHECKOUT_SECONDS = _register(Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting for one and opening new ones",
+    CHECKOUT_SECONDS_BUCKETS, ("engine",)))
+SATURATED_CHECKOUTS = _register(Counter(
+    "db_pool_saturated_checkouts_total",
+    "Checkouts that found every connection the pool may open (pool_size + max_overflow) in use and had to wait",
+    ("engine",)))
+CHECKOUT_TIMEOUTS = _register(Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after waiting pool_timeout for a connection",
+    ("engine",)))
+WRITE_BATCH_SIZE = _register(Histogram(
+    "db_write_batch_size", "Writes applied per transaction by the group-commit write queue",
+    WRITE_BATCH_SIZE_BUCKETS))
+
+# Instrumented engines by name, for the pool gauges
+_engines: Dict[str, object] = {}
+
+
+def _pool_gauge(read: Callable) -> Callable[[], Dict[LabelValues, float]]:
+    def collect():
+        return {
+            (name,): read(engine.pool)
+            for name, engine in _engines.items()
+            if hasattr(engine.pool, "checkedout")
+        }
+    return collect
+
+
+def _capacity(pool) -> int:
+    """Connections `pool` may have open at once; overflow is unlimited when max_overflow is negative"""
+    return pool.size() + pool._max_overflow if pool._max_overflow >= 0 else 0
+
+
+POOL_CHECKED_OUT = _register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool",
+    _pool_gauge(lambda pool: pool.checkedout()), ("engine",)))
+POOL_CAPACITY = _register(Gauge(
+    "db_pool_capacity", "Connections the pool may have open at once (pool_size + max_overflow)",
+    _pool_gauge(_capacity), ("engine",)))
+POOL_SATURATION = _register(Gauge(
+    "db_pool_saturation", "Share of the pool capacity currently checked out; at 1 new checkouts wait",
+    _pool_gauge(lambda pool: pool.checkedout() / _capacity(pool) if _capacity(pool) else 0.0), ("engine",)))
+
+
+class RequestStats:
+    """Database work done on behalf of one request"""
+
+    __slots__ = ("queries", "query_seconds", "checkout_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.checkout_seconds = 0.0
+
+    def server_timing(self, app_seconds: float) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        return (
+            f'app;dur={app_seconds * 1000:.1f}, '
+            f'db;dur={self.query_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f'pool;dur={self.checkout_seconds * 1000:.1f}'
+        )
+
+
+# Stats of the request being handled; SQLAlchemy runs the async engine's
+# events in greenlets that share the awaiting task's context, so they see it too
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def timed_pool(pool_class, engine_name: str):
+    """Subclass of the queue pool `pool_class` that records how long every checkout took"""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            if self._max_overflow >= 0 and self.checkedout() >= self.size() + self._max_overflow:
+                SATURATED_CHECKOUTS.inc(engine_name)
+
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                CHECKOUT_TIMEOUTS.inc(engine_name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                CHECKOUT_SECONDS.observe(elapsed, engine_name)
+                stats = _request_stats.get()
+                if stats is not None:
+                    stats.checkout_seconds += elapsed
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_engine(engine, engine_name: str):
+    """Time every statement `engine` executes and report its pool in the gauges"""
+    _engines[engine_name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        QUERY_SECONDS.observe(elapsed, engine_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+
+def _route_template(scope, path: str, root_path: str) -> str:
+    """
+    Path template of the route that handled `scope`, e.g. /api/orders/{order_id}/items.
+
+    `path` and `root_path` are the scope's values before the app ran: mounts
+    rewrite them in place for the app they forward to.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+
+    # Mounts (static files) do not record themselves in the scope, so match the request as it came in
+    request_scope = dict(scope, path=path, root_path=root_path)
+    app = scope.get("app")
+    for candidate in getattr(app, "routes", ()):
+        match, _ = candidate.matches(request_scope)
+        if match == Match.FULL:
+            return candidate.path
+    # Keep unknown paths out of the labels, so scanners cannot blow up the series
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request metrics and adding a Server-Timing header.
+
+    The header goes out with the response start, so database work done while
+    a streamed body is sent counts towards the metrics but not the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path, root_path = scope["path"], scope.get("root_path", "")
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = stats.server_timing(time.perf_counter() - started)
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            method, route = scope["method"], _route_template(scope, path, root_path)
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_QUERY_SECONDS.observe(stats.query_seconds, method, route)
@@ -0,0 +1,356 @@
+"""
+Schema migrations for the Food Billing Application.
+
+init_db() creates missing tables with create_all, which never changes a table
+that already exists. The migrations below bring an existing database file up
+to date with the models without dropping data. Applied versions are recorded
+in the schema_migrations table so each migration runs exactly once.
+
+Migrations run automatically when the database module is imported. To apply
+them to a database explicitly and print the schema history:
+
+    DATABASE_URL=sqlite:///data/billing.db python migrations.py
+"""
+
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, BigInteger, MetaData, inspect, select, insert, delete, text, func, type_coerce, union_all
+from sqlalchemy.exc import OperationalError
+
+from models import Base, Item, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales, DailyItemSales, to_epoch
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", String(50), nullable=False),
+)
+
+
+def add_query_indexes(connection):
+    """Create any index declared on the models that the database is missing"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def convert_order_timestamps(connection, batch_size=5000):
+    """
+    Rebuild the orders table with order_date/payment_date as integer epochs.
+
+    Older databases store these columns as ISO strings. SQLite cannot change a
+    column's type in place, so the rows are copied into a new table with the
+    current schema, converting timestamps in batches, and the new table then
+    replaces the old one. order_items keeps referencing orders by name.
+    """
+    columns = {column["name"]: column for column in inspect(connection).get_columns("orders")}
+    if isinstance(columns["order_date"]["type"], Integer):
+        return
+
+    orders_new = Table("orders_new", MetaData(), *(column._copy() for column in Order.__table__.columns))
+    orders_new.drop(bind=connection, checkfirst=True)
+    orders_new.create(bind=connection)
+
+    result = connection.execute(
+        text("SELECT id, total_price, payment_status, order_date, payment_date FROM orders ORDER BY id")
+    )
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        # Values are converted here so the raw table receives plain integers
+        connection.execute(
+            text(
+                "INSERT INTO orders_new (id, total_price, payment_status, order_date, payment_date) "
+                "VALUES (:id, :total_price, :payment_status, :order_date, :payment_date)"
+            ),
+            [
+                {
+                    "id": row.id,
+                    "total_price": row.total_price,
+                    "payment_status": row.payment_status,
+                    "order_date": to_epoch(row.order_date),
+                    "payment_date": to_epoch(row.payment_date),
+                }
+                for row in rows
+            ]
+        )
+
+    connection.execute(text("DROP TABLE orders"))
+    connection.execute(text("ALTER TABLE orders_new RENAME TO orders"))
+
+    for index in Order.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+# Trigram full-text indexes over item names, as migration 3 created them. Each
+# one is an external-content FTS5 table kept in sync with its source table by triggers.
+SEARCH_INDEXES = {
+    "items_fts": "items",
+    "order_items_fts": "order_items",
+}
+
+# The indexes still maintained; migration 5 dropped the one on items
+LIVE_SEARCH_INDEXES = {
+    "order_items_fts": "order_items",
+}
+
+
+def create_search_indexes(connection, indexes=SEARCH_INDEXES):
+    """
+    Create the trigram FTS5 indexes on items.item_name and order_items.item_name.
+
+    The trigram tokenizer supports substring and prefix matching, and FTS5
+    ranks results with bm25. Safe to run repeatedly: missing tables and
+    triggers are created and the indexes are rebuilt from their source tables.
+    Does nothing on databases other than SQLite or builds without FTS5.
+    Pass LIVE_SEARCH_INDEXES to rebuild only the indexes still in use.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    for fts_table, source in indexes.items():
+        try:
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+                f"item_name, content='{source}', content_rowid='id', tokenize='trigram')"
+            ))
+        except OperationalError:
+            # SQLite was built without FTS5 or trigram support; search falls back to LIKE
+            return
+
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, item_name) VALUES (new.id, new.item_name); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, item_name) VALUES ('delete', old.id, old.item_name); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF item_name ON {source} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, item_name) VALUES ('delete', old.id, old.item_name); "
+            f"INSERT INTO {fts_table}(rowid, item_name) VALUES (new.id, new.item_name); END"
+        ))
+        connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+
+def drop_search_index_triggers(connection):
+    """
+    Drop the triggers that keep the FTS5 indexes in sync with their tables.
+
+    Bulk loaders call this before inserting many rows, then create_search_indexes
+    afterwards, which recreates the triggers and rebuilds each index in one pass
+    instead of updating it row by row.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    for fts_table in LIVE_SEARCH_INDEXES:
+        for trigger in ("ai", "ad", "au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {fts_table}_{trigger}"))
+
+
+def drop_item_search_index(connection):
+    """
+    Drop the FTS5 index on items.item_name and its triggers.
+
+    Item searches are served from the in-memory catalog, so the index was
+    only slowing down every write to items.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    for trigger in ("ai", "ad", "au"):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS items_fts_{trigger}"))
+    connection.execute(text("DROP TABLE IF EXISTS items_fts"))
+
+
+def has_search_indexes(engine):
+    """Return True if the FTS5 search indexes still in use exist in this database"""
+    return all(inspect(engine).has_table(fts_table) for fts_table in LIVE_SEARCH_INDEXES)
+
+
+def rebuild_sales_rollup(connection):
+    """
+    Recompute the daily sales rollup tables from all orders and their lines.
+
+    The application keeps the rollup up to date as orders change; this rebuilds
+    it from scratch, e.g. for an existing database or after editing orders by
+    hand. Archived orders count as well as live ones. Days are bucketed in SQL
+    from the integer order_date, matching the order_date.date() used by the
+    incremental updates.
+    """
+    for table in (DailySales, DailyItemSales, ArchivedOrder, ArchivedOrderItem):
+        table.__table__.create(bind=connection, checkfirst=True)
+
+    def day(orders):
+        return func.date(type_coerce(orders.order_date, BigInteger) / 1000000, "unixepoch")
+
+    orders = union_all(*(
+        select(day(model).label("day"), model.payment_status, model.total_price)
+        for model in (Order, ArchivedOrder)
+    )).subquery()
+    lines = union_all(*(
+        select(
+            day(model).label("day"), model.payment_status,
+            line_model.item_id, line_model.item_name, line_model.quantity, line_model.subtotal
+        )
+        .join(line_model, line_model.order_id == model.id)
+        for model, line_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+    )).subquery()
+
+    connection.execute(delete(DailySales))
+    connection.execute(
+        insert(DailySales).from_select(
+            ["day", "payment_status", "order_count", "revenue"],
+            select(orders.c.day, orders.c.payment_status, func.count(), func.sum(orders.c.total_price))
+            .group_by(orders.c.day, orders.c.payment_status)
+        )
+    )
+
+    connection.execute(delete(DailyItemSales))
+    connection.execute(
+        insert(DailyItemSales).from_select(
+            ["day", "payment_status", "item_id", "item_name", "quantity", "revenue"],
+            select(
+                lines.c.day, lines.c.payment_status, lines.c.item_id, func.max(lines.c.item_name),
+                func.sum(lines.c.quantity), func.sum(lines.c.subtotal)
+            )
+            .group_by(lines.c.day, lines.c.payment_status, lines.c.item_id)
+        )
+    )
+
+
+def use_autoincrement_ids(connection):
+    """
+    Rebuild orders and order_items with AUTOINCREMENT ids.
+
+    Without it SQLite hands out the highest id left in a table plus one, so
+    once the newest order or line was deleted or archived, its id went to
+    the next one and an archived order and a live one could share an id.
+    Rows are copied into tables created from the models, which declare
+    sqlite_autoincrement, and the id sequences start above every id used
+    so far, live or archived. Does nothing on databases other than SQLite,
+    whose sequences never reuse ids.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    # Rebuilt tables are declared next to copies of the tables they reference
+    metadata = MetaData()
+    for model in (Item, Order):
+        model.__table__.to_metadata(metadata)
+
+    for model in (Order, OrderItem):
+        name = model.__tablename__
+        definition = connection.scalar(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+        )
+        if "AUTOINCREMENT" not in definition.upper():
+            columns = [column.name for column in model.__table__.columns]
+            rebuilt = model.__table__.to_metadata(metadata, name=f"{name}_new")
+            rebuilt.drop(bind=connection, checkfirst=True)
+            # to_metadata copies the indexes too; create the bare table and add them after the rename
+            for index in list(rebuilt.indexes):
+                rebuilt.indexes.discard(index)
+            rebuilt.create(bind=connection)
+            column_list = ", ".join(columns)
+            connection.execute(text(f"INSERT INTO {name}_new ({column_list}) SELECT {column_list} FROM {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+            connection.execute(text(f"ALTER TABLE {name}_new RENAME TO {name}"))
+            for index in model.__table__.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+    # Dropping order_items dropped the triggers of its search index
+    create_search_indexes(connection, LIVE_SEARCH_INDEXES)
+
+    # Start each sequence above the ids of archived rows as well
+    for model, archived_model in ((Order, ArchivedOrder), (OrderItem, ArchivedOrderItem)):
+        name = model.__tablename__
+        highest = max(
+            connection.scalar(select(func.coalesce(func.max(model.id), 0))),
+            connection.scalar(select(func.coalesce(func.max(archived_model.id), 0))),
+            connection.scalar(text("SELECT coalesce(max(seq), 0) FROM sqlite_sequence WHERE name = :name"),
+                              {"name": name}),
+        )
+        connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": name})
+        connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                           {"name": name, "seq": highest})
+
+
+# Ordered list of (version, name, function); append new migrations at the end
+MIGRATIONS = [
+    (1, "add query indexes", add_query_indexes),
+    (2, "store order timestamps as integer epochs", convert_order_timestamps),
+    (3, "add full-text search indexes for item names", create_search_indexes),
+    (4, "add daily sales rollup tables", rebuild_sales_rollup),
+    (5, "drop unused item name search index", drop_item_search_index),
+    (6, "never reuse order and order line ids", use_autoincrement_ids),
+]
+
+
+def upgrade(engine):
+    """Apply every migration that has not run yet and return the names of those applied"""
+    migration_metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        applied_versions = set(connection.scalars(select(schema_migrations.c.version)))
+
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied_versions:
+            continue
+
+        with engine.connect() as connection:
+            # Table rebuilds drop and rename tables that others reference, which
+            # SQLite only allows with foreign key enforcement off. The setting
+            # cannot change inside a transaction, so switch it before starting.
+            foreign_keys = _set_foreign_keys(connection, False)
+            try:
+                # Each migration commits together with its history row
+                with connection.begin():
+                    migrate(connection)
+                    connection.execute(
+                        insert(schema_migrations).values(
+                            version=version,
+                            name=name,
+                            applied_at=datetime.now().isoformat()
+                        )
+                    )
+            finally:
+                _set_foreign_keys(connection, foreign_keys)
+        applied.append(name)
+
+    return applied
+
+
+def _set_foreign_keys(connection, enabled):
+    """Switch SQLite foreign key enforcement on a connection and return the previous setting"""
+    if connection.dialect.name != "sqlite":
+        return enabled
+
+    previous = bool(connection.exec_driver_sql("PRAGMA foreign_keys").scalar())
+    connection.exec_driver_sql(f"PRAGMA foreign_keys = {'ON' if enabled else 'OFF'}")
+    # End the implicit transaction SQLAlchemy opened for the PRAGMA statements
+    connection.commit()
+    return previous
+
+
+def main():
+    """Apply pending migrations and print the schema history"""
+    # Importing the database module creates the tables and applies pending migrations
+    from database import engine, DATABASE_URL
+
+    upgrade(engine)
+
+    print(f"Schema history for {DATABASE_URL}:")
+    with engine.connect() as connection:
+        for row in connection.execute(select(schema_migrations).order_by(schema_migrations.c.version)):
+            print(f"  {row.version:>3}  {row.name:<40} {row.applied_at}")
+
+
+if __name__ == "__main__":
+    main()
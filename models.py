@@ -3,13 +3,53 @@ Database models for the Food Billing Application.
 This file contains SQLAlchemy ORM model definitions with proper relationships and constraints.
 """
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, DateTime, Date, CheckConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.types import TypeDecorator
+from datetime import datetime, timedelta
 
 Base = declarative_base()
 
+# Timestamps are stored as integer microseconds since this (naive, wall-clock) epoch
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value):
+    """Convert a datetime (or ISO string) to integer microseconds since EPOCH"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        # Store aware datetimes as local wall-clock time, like datetime.now()
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch(value):
+    """Convert integer microseconds since EPOCH back to a naive datetime"""
+    if value is None:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+
+class EpochTimestamp(TypeDecorator):
+    """
+    Naive datetime stored as an integer count of microseconds since EPOCH.
+
+    Integers compare and index more compactly than ISO strings, and bucketing
+    by day or hour is plain integer division in SQL.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_epoch(value)
+
+    def process_result_value(self, value, dialect):
+        return from_epoch(value)
+
 class Item(Base):
     """
     Item model representing food items available for purchase.
@@ -73,6 +113,15 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     item = relationship("Item", back_populates="order_items")
     
+    __table_args__ = (
+        # Loading an order's lines and finding an item within an order
+        Index("ix_order_items_order_id_item_id", "order_id", "item_id"),
+        # Checking whether an item is referenced by any order (delete_item)
+        Index("ix_order_items_item_id", "item_id"),
+        # Never hand out the id of a deleted or archived line again
+        {"sqlite_autoincrement": True},
+    )
+    
     def __repr__(self):
         return f"<OrderItem(id={self.id}, order_id={self.order_id}, item='{self.item_name}', quantity={self.quantity})>"
     
@@ -105,14 +154,23 @@ class Order(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     total_price = Column(Float, CheckConstraint('total_price >= 0'), nullable=False)
     payment_status = Column(String(20), CheckConstraint("payment_status IN ('pending', 'completed', 'cancelled')"), nullable=False)
-    order_date = Column(String(50), nullable=False, default=lambda: datetime.now().isoformat())
-    payment_date = Column(String(50), nullable=True)
+    order_date = Column(EpochTimestamp, nullable=False, default=datetime.now)
+    payment_date = Column(EpochTimestamp, nullable=True)
     
     # Relationships
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     
     __table_args__ = (
-        # Add any table-level constraints here if needed
+        # Default newest-first listing and its keyset pagination on (order_date, id)
+        Index("ix_orders_order_date_id", "order_date", "id"),
+        # Status filters sorted by order date, e.g. the pending queue
+        Index("ix_orders_payment_status_order_date", "payment_status", "order_date"),
+        # Completed orders sorted by payment date
+        Index("ix_orders_payment_status_payment_date", "payment_status", "payment_date"),
+        # Payment date range filters and sorting
+        Index("ix_orders_payment_date", "payment_date"),
+        # Never hand out the id of a deleted or archived order again
+        {"sqlite_autoincrement": True},
     )
     
     def __repr__(self):
@@ -138,7 +196,115 @@ class Order(Base):
             "id": self.id,
             "total_price": self.total_price,
             "payment_status": self.payment_status,
-            "order_date": self.order_date,
-            "payment_date": self.payment_date,
+            "order_date": self.order_date.isoformat() if self.order_date else None,
+            "payment_date": self.payment_date.isoformat() if self.payment_date else None,
             "items": items_data
         }
+
+
+class ArchivedOrder(Base):
+    """
+    Settled order moved out of `orders` by the archive job (see archive.py).
+
+    Same columns as Order, and the order keeps its id. Archived orders are
+    read-only: searches and order lookups fall back to these tables, while
+    the listings and every write only touch the live ones.
+    """
+    __tablename__ = "archived_orders"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    total_price = Column(Float, nullable=False)
+    payment_status = Column(String(20), nullable=False)
+    order_date = Column(EpochTimestamp, nullable=False)
+    payment_date = Column(EpochTimestamp, nullable=True)
+
+    # Relationships
+    order_items = relationship("ArchivedOrderItem", back_populates="order", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Date-sorted searches and their keyset pagination, and the archive horizon (max order_date)
+        Index("ix_archived_orders_order_date_id", "order_date", "id"),
+        Index("ix_archived_orders_payment_date", "payment_date"),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedOrder(id={self.id}, total_price={self.total_price}, status='{self.payment_status}')>"
+
+
+class ArchivedOrderItem(Base):
+    """
+    Line of an archived order; same columns and ids as OrderItem.
+
+    There is no foreign key to items, so an item only sold on archived orders
+    can be deleted without touching the history.
+    """
+    __tablename__ = "archived_order_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(Integer, ForeignKey("archived_orders.id", ondelete="CASCADE"), nullable=False)
+    item_id = Column(Integer, nullable=False)
+    item_name = Column(String(100), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    subtotal = Column(Float, nullable=False)
+
+    # Relationships
+    order = relationship("ArchivedOrder", back_populates="order_items")
+
+    __table_args__ = (
+        Index("ix_archived_order_items_order_id", "order_id"),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedOrderItem(id={self.id}, order_id={self.order_id}, item='{self.item_name}', quantity={self.quantity})>"
+
+
+class DailySales(Base):
+    """
+    Daily sales rollup per payment status.
+
+    Maintained incrementally in the same transaction as every order change, so
+    sales reports read a handful of rows per day instead of scanning orders.
+    Orders are bucketed by the day they were placed; a payment status change
+    moves the order between status rows of that day.
+
+    Attributes:
+        day (date): Day the orders were placed
+        payment_status (str): Current status of those orders
+        order_count (int): Number of orders
+        revenue (float): Sum of the orders' total prices
+    """
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    payment_status = Column(String(20), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailySales(day={self.day}, status='{self.payment_status}', orders={self.order_count})>"
+
+
+class DailyItemSales(Base):
+    """
+    Daily sales rollup per item and payment status.
+
+    Attributes:
+        day (date): Day the orders were placed
+        payment_status (str): Current status of those orders
+        item_id (int): Item sold
+        item_name (str): Name of the item as it appeared on the orders
+        quantity (int): Units sold
+        revenue (float): Sum of the order line subtotals
+    """
+    __tablename__ = "daily_item_sales"
+
+    day = Column(Date, primary_key=True)
+    payment_status = Column(String(20), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    item_name = Column(String(100), nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyItemSales(day={self.day}, status='{self.payment_status}', item_id={self.item_id})>"
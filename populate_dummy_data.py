@@ -2,182 +2,215 @@
 """
 Script to populate the database with dummy data for testing purposes.
 This script will clear existing data and add fresh test data to all tables.
+
+Rows are generated in batches and inserted with bulk executemany statements,
+one transaction per batch, so the same code builds a small demo database or
+a load-test database with millions of orders:
+
+    python populate_dummy_data.py                              # 10 items, 50 orders, asks first
+    python populate_dummy_data.py --items 500 --orders 1000000 --days 365 --seed 1 --yes
+
+The populate() function is also used directly by the benchmark fixtures.
 """
 
+import argparse
 import os
+import random
 import sys
+import time
 from datetime import datetime, timedelta
-import random
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
+from typing import Callable, Dict, Optional
 
 # Add the project root to the path so we can import the database module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import database components
 from models import Base, Item, Order, OrderItem
-from database import engine, SessionLocal
+from migrations import upgrade, create_search_indexes, drop_search_index_triggers, rebuild_sales_rollup, LIVE_SEARCH_INDEXES
+
+# The demo menu; larger catalogs add variants of these items
+MENU = [
+    {"item_name": "Burger", "price_per_quantity": 5.99, "remaining_quantity": 50},
+    {"item_name": "Pizza", "price_per_quantity": 8.99, "remaining_quantity": 30},
+    {"item_name": "Fries", "price_per_quantity": 2.99, "remaining_quantity": 100},
+    {"item_name": "Soda", "price_per_quantity": 1.99, "remaining_quantity": 200},
+    {"item_name": "Salad", "price_per_quantity": 4.99, "remaining_quantity": 40},
+    {"item_name": "Ice Cream", "price_per_quantity": 3.99, "remaining_quantity": 60},
+    {"item_name": "Coffee", "price_per_quantity": 2.49, "remaining_quantity": 150},
+    {"item_name": "Sandwich", "price_per_quantity": 6.49, "remaining_quantity": 45},
+    {"item_name": "Chicken Wings", "price_per_quantity": 7.99, "remaining_quantity": 35},
+    {"item_name": "Pasta", "price_per_quantity": 9.99, "remaining_quantity": 25},
+]
+VARIANTS = ["Spicy", "Large", "Small", "Classic", "Veggie", "Double", "Cheesy", "Grilled", "Crispy", "Deluxe"]
+
+# Default share of orders in each payment status
+DEFAULT_STATUS_MIX = {"pending": 0.3, "completed": 0.6, "cancelled": 0.1}
+
+# Number of lines per order and their weights, by payment status
+LINES_PER_ORDER = {
+    "pending": ([1, 2, 3, 4], [0.2, 0.3, 0.3, 0.2]),
+    "completed": ([1, 2, 3, 4, 5], [0.1, 0.2, 0.3, 0.25, 0.15]),
+    "cancelled": ([1, 2], [0.5, 0.5]),
+}
+
+
+def generate_items(count: int, rng: random.Random):
+    """Build `count` items with unique names: the menu first, then variants of it"""
+    items = []
+    for index in range(count):
+        base = MENU[index % len(MENU)]
+        round_number = index // len(MENU)
+        if round_number == 0:
+            items.append(dict(base, id=index + 1))
+            continue
+
+        if round_number <= len(VARIANTS):
+            name = f"{VARIANTS[round_number - 1]} {base['item_name']}"
+        else:
+            name = f"{VARIANTS[round_number % len(VARIANTS)]} {base['item_name']} {index + 1}"
+
+        items.append({
+            "id": index + 1,
+            "item_name": name,
+            "price_per_quantity": round(base["price_per_quantity"] * rng.uniform(0.8, 1.5), 2),
+            # A few items do not track stock at all
+            "remaining_quantity": None if rng.random() < 0.1 else rng.randint(20, 500),
+        })
+    return items
 
-def clear_database():
-    """Drop all tables and recreate them"""
-    print("Clearing existing database...")
+
+def populate(
+    engine,
+    item_count: int = 10,
+    order_count: int = 50,
+    days: int = 30,
+    status_mix: Optional[Dict[str, float]] = None,
+    seed: Optional[int] = None,
+    batch_size: int = 10000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Replace the contents of the database behind `engine` with generated data.
+
+    Orders are spread evenly over the last `days` days with ids in date order,
+    and their payment statuses follow `status_mix` (relative weights). The
+    same `seed` always produces the same data. Each batch of `batch_size`
+    orders and their lines is inserted in one transaction. The search indexes
+    and the sales rollup are rebuilt once at the end rather than per row.
+    `progress` is called with the number of orders written after each batch.
+
+    Returns the number of items, orders and order lines created.
+    """
+    rng = random.Random(seed)
+    statuses, weights = zip(*(status_mix or DEFAULT_STATUS_MIX).items())
+
+    # Start from an empty, fully migrated schema
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
-    print("Database schema recreated successfully.")
-
-def populate_items():
-    """Populate the items table with dummy data"""
-    print("Populating items table...")
-    
-    items = [
-        {"item_name": "Burger", "price_per_quantity": 5.99, "remaining_quantity": 50},
-        {"item_name": "Pizza", "price_per_quantity": 8.99, "remaining_quantity": 30},
-        {"item_name": "Fries", "price_per_quantity": 2.99, "remaining_quantity": 100},
-        {"item_name": "Soda", "price_per_quantity": 1.99, "remaining_quantity": 200},
-        {"item_name": "Salad", "price_per_quantity": 4.99, "remaining_quantity": 40},
-        {"item_name": "Ice Cream", "price_per_quantity": 3.99, "remaining_quantity": 60},
-        {"item_name": "Coffee", "price_per_quantity": 2.49, "remaining_quantity": 150},
-        {"item_name": "Sandwich", "price_per_quantity": 6.49, "remaining_quantity": 45},
-        {"item_name": "Chicken Wings", "price_per_quantity": 7.99, "remaining_quantity": 35},
-        {"item_name": "Pasta", "price_per_quantity": 9.99, "remaining_quantity": 25},
-    ]
-    
-    db = SessionLocal()
-    try:
-        for item_data in items:
-            item = Item(**item_data)
-            db.add(item)
-        db.commit()
-        print(f"Added {len(items)} items to the database.")
-    except SQLAlchemyError as e:
-        db.rollback()
-        print(f"Error populating items: {e}")
-    finally:
-        db.close()
-
-def populate_orders():
-    """Populate the orders table with dummy data"""
-    print("Populating orders table...")
-    
-    # Get all items from the database to reference in orders
-    db = SessionLocal()
-    try:
-        items = db.query(Item).all()
-        
-        # Generate orders over the past 30 days
-        today = datetime.now()
-        
-        # Create a mix of pending, completed, and cancelled orders
-        orders_to_create = []
-        
-        # Generate 50 random orders
-        for i in range(50):
-            # Random date within the last 30 days
-            days_ago = random.randint(0, 30)
-            order_date = (today - timedelta(days=days_ago)).isoformat()
-            
-            # Random payment status
-            status_options = ["pending", "completed", "cancelled"]
-            weights = [0.3, 0.6, 0.1]  # 30% pending, 60% completed, 10% cancelled
-            payment_status = random.choices(status_options, weights=weights, k=1)[0]
-            
-            # Payment date for completed orders
+    upgrade(engine)
+    with engine.begin() as connection:
+        drop_search_index_triggers(connection)
+
+    items = generate_items(item_count, rng)
+    with engine.begin() as connection:
+        connection.execute(Item.__table__.insert(), items)
+
+    now = datetime.now()
+    start = now - timedelta(days=days)
+    span = (now - start).total_seconds()
+    line_count = 0
+
+    for batch_start in range(0, order_count, batch_size):
+        orders, lines = [], []
+        for order_id in range(batch_start + 1, min(order_count, batch_start + batch_size) + 1):
+            # Evenly spaced with jitter, so later ids are always later orders
+            order_date = start + timedelta(seconds=span * (order_id - 1 + rng.random()) / order_count)
+            payment_status = rng.choices(statuses, weights=weights)[0]
+
             payment_date = None
             if payment_status == "completed":
-                # Payment happened between 0 and 2 days after order
-                payment_delay = random.randint(0, 2)
-                payment_date = (today - timedelta(days=days_ago-payment_delay)).isoformat()
-            
-            # Create order with initial total price of 0
-            order = Order(
-                total_price=0,
-                payment_status=payment_status,
-                order_date=order_date,
-                payment_date=payment_date
-            )
-            db.add(order)
-            db.flush()  # Get the order ID without committing
-            
-            # Generate a variable number of items per order
-            # For pending and completed orders, use a different distribution to ensure variety
-            if payment_status == "pending":
-                # For pending orders: 1-4 items with higher probability of multiple items
-                num_items_weights = [0.2, 0.3, 0.3, 0.2]  # Weights for 1, 2, 3, 4 items
-                num_items = random.choices([1, 2, 3, 4], weights=num_items_weights, k=1)[0]
-            elif payment_status == "completed":
-                # For completed orders: 1-5 items with higher probability of multiple items
-                num_items_weights = [0.1, 0.2, 0.3, 0.25, 0.15]  # Weights for 1, 2, 3, 4, 5 items
-                num_items = random.choices([1, 2, 3, 4, 5], weights=num_items_weights, k=1)[0]
-            else:  # cancelled
-                # For cancelled orders: usually fewer items
-                num_items = random.randint(1, 2)
-            
+                # Paid up to two days after ordering, but never in the future
+                delay = rng.uniform(0, min(2 * 86400, (now - order_date).total_seconds()))
+                payment_date = order_date + timedelta(seconds=delay)
+
+            choices, line_weights = LINES_PER_ORDER[payment_status]
+            line_total = min(rng.choices(choices, weights=line_weights)[0], item_count)
+
             total_price = 0
-            
-            # Make sure we don't add the same item twice in an order
-            available_items = list(items)  # Create a copy to avoid modifying the original list
-            selected_items = []
-            
-            for _ in range(num_items):
-                if not available_items:
-                    break
-                    
-                item = random.choice(available_items)
-                available_items.remove(item)  # Remove to avoid duplicates
-                selected_items.append(item)
-            
-            for item in selected_items:
-                # Random quantity between 1 and 5
-                quantity = random.randint(1, 5)
-                
-                # Calculate price
-                unit_price = item.price_per_quantity
-                subtotal = round(unit_price * quantity, 2)
+            for item in rng.sample(items, line_total):
+                quantity = rng.randint(1, 5)
+                subtotal = round(item["price_per_quantity"] * quantity, 2)
                 total_price += subtotal
-                
-                # Create order item
-                order_item = OrderItem(
-                    order_id=order.id,
-                    item_id=item.id,
-                    item_name=item.item_name,
-                    quantity=quantity,
-                    unit_price=unit_price,
-                    subtotal=subtotal
-                )
-                db.add(order_item)
-            
-            # Update order total price
-            order.total_price = round(total_price, 2)
-            orders_to_create.append(order)
-        
-        db.commit()
-        print(f"Added {len(orders_to_create)} orders with multiple items to the database.")
-    except SQLAlchemyError as e:
-        db.rollback()
-        print(f"Error populating orders: {e}")
-    finally:
-        db.close()
+                lines.append({
+                    "order_id": order_id,
+                    "item_id": item["id"],
+                    "item_name": item["item_name"],
+                    "quantity": quantity,
+                    "unit_price": item["price_per_quantity"],
+                    "subtotal": subtotal,
+                })
+
+            orders.append({
+                "id": order_id,
+                "total_price": round(total_price, 2),
+                "payment_status": payment_status,
+                "order_date": order_date,
+                "payment_date": payment_date,
+            })
+
+        with engine.begin() as connection:
+            connection.execute(Order.__table__.insert(), orders)
+            connection.execute(OrderItem.__table__.insert(), lines)
+        line_count += len(lines)
+
+        if progress:
+            progress(batch_start + len(orders))
+
+    # Recreate the search triggers, rebuild the indexes and compute the sales rollup
+    with engine.begin() as connection:
+        create_search_indexes(connection, LIVE_SEARCH_INDEXES)
+        rebuild_sales_rollup(connection)
+
+    return {"items": len(items), "orders": order_count, "order_items": line_count}
+
+
+def parse_status_mix(value: str) -> Dict[str, float]:
+    """Parse a status mix such as 'pending=30,completed=60,cancelled=10'"""
+    mix = {}
+    for part in value.split(","):
+        status, _, weight = part.partition("=")
+        status = status.strip()
+        if status not in DEFAULT_STATUS_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown payment status: {status}")
+        try:
+            mix[status] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for {status}: {weight}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("At least one status needs a positive weight")
+    return mix
+
 
 def display_schema_info():
     """Display information about the database schema"""
     print("\nDatabase Schema Information:")
     print("============================")
-    
+
     # Item table
     print("\nTable: items")
     print("  - id: Integer, Primary Key, Auto-increment")
     print("  - item_name: String, Not Null")
     print("  - price_per_quantity: Float, Not Null")
     print("  - remaining_quantity: Integer, Nullable")
-    
+
     # Order table
     print("\nTable: orders")
     print("  - id: Integer, Primary Key, Auto-increment")
     print("  - total_price: Float, Not Null")
     print("  - payment_status: String, Not Null")
-    print("  - order_date: String, Not Null")
-    print("  - payment_date: String, Nullable")
-    
+    print("  - order_date: Integer (epoch microseconds), Not Null")
+    print("  - payment_date: Integer (epoch microseconds), Nullable")
+
     # OrderItem table
     print("\nTable: order_items")
     print("  - id: Integer, Primary Key, Auto-increment")
@@ -187,34 +220,68 @@ def display_schema_info():
     print("  - quantity: Integer, Not Null")
     print("  - unit_price: Float, Not Null")
     print("  - subtotal: Float, Not Null")
-    
+
     print("\nRelationships:")
     print("  - Order.order_items -> OrderItem (One-to-Many)")
     print("  - OrderItem.order_id -> Order.id (Many-to-One)")
     print("  - OrderItem.item_id -> Item.id (Many-to-One)")
     print("  - Item.order_items -> OrderItem (One-to-Many)")
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replace the database contents with generated dummy data")
+    parser.add_argument("--items", type=int, default=10, help="Number of items (default: 10)")
+    parser.add_argument("--orders", type=int, default=50, help="Number of orders (default: 50)")
+    parser.add_argument("--days", type=int, default=30, help="Spread orders over this many past days (default: 30)")
+    parser.add_argument("--status-mix", type=parse_status_mix, default=None,
+                        help="Relative weights per status, e.g. pending=30,completed=60,cancelled=10")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Orders per insert transaction (default: 10000)")
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation before clearing the database")
+    args = parser.parse_args()
+    if args.items < 1 or args.orders < 0 or args.days < 1 or args.batch_size < 1:
+        parser.error("--items, --days and --batch-size must be positive and --orders not negative")
+    return args
+
+
 def main():
     """Main function to run the script"""
-    print("Starting database population script...")
-    
-    # Display schema information
-    display_schema_info()
-    
-    # Ask for confirmation before proceeding
-    confirm = input("\nWARNING: This will clear all existing data. Continue? (y/n): ")
-    if confirm.lower() != 'y':
-        print("Operation cancelled.")
-        return
-    
-    # Clear and recreate the database
-    clear_database()
-    
-    # Populate tables
-    populate_items()
-    populate_orders()
-    
-    print("\nDatabase population completed successfully!")
+    args = parse_args()
+
+    # Importing the database module applies the connection settings and migrations
+    from database import engine, DATABASE_URL
+
+    print(f"Starting database population script for {DATABASE_URL}...")
+
+    if not args.yes:
+        # Display schema information
+        display_schema_info()
+
+        # Ask for confirmation before proceeding
+        confirm = input("\nWARNING: This will clear all existing data. Continue? (y/n): ")
+        if confirm.lower() != 'y':
+            print("Operation cancelled.")
+            return
+
+    started = time.perf_counter()
+
+    def report(done):
+        elapsed = time.perf_counter() - started
+        print(f"  {done:,}/{args.orders:,} orders ({done / elapsed:,.0f} orders/s)")
+
+    counts = populate(
+        engine,
+        item_count=args.items,
+        order_count=args.orders,
+        days=args.days,
+        status_mix=args.status_mix,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        progress=report,
+    )
+
+    print(f"\nDatabase population completed in {time.perf_counter() - started:.1f}s: "
+          f"{counts['items']:,} items, {counts['orders']:,} orders, {counts['order_items']:,} order items.")
 
 if __name__ == "__main__":
     main()
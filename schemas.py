@@ -4,8 +4,8 @@ These schemas are used for data validation and serialization.
 """
 
 from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, datetime
 
 
 class ItemBase(BaseModel):
@@ -67,6 +67,26 @@ class OrderCreate(OrderBase):
     items: List[OrderItemCreate]
 
 
+class OrderStatusBatch(BaseModel):
+    """Schema for moving many orders to one payment status"""
+    order_ids: List[int] = Field(min_length=1, max_length=1000)
+    payment_status: str
+
+
+class OrderStatusResult(BaseModel):
+    """Outcome of a batch status change for one order"""
+    order_id: int
+    success: bool
+    payment_status: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class OrderStatusBatchResponse(BaseModel):
+    """Response schema for a batch status change"""
+    updated: int
+    results: List[OrderStatusResult]
+
+
 class OrderResponse(BaseModel):
     """Response schema for Order"""
     id: int
@@ -82,6 +102,34 @@ class OrderResponse(BaseModel):
         "arbitrary_types_allowed": True
     }
 
+    @field_validator("order_date", "payment_date", mode="before")
+    @classmethod
+    def format_timestamp(cls, value):
+        """Timestamps are stored as datetimes but exposed as ISO strings"""
+        return value.isoformat() if isinstance(value, datetime) else value
+
+
+class OrderPage(BaseModel):
+    """Response schema for one page of orders"""
+    orders: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderStatusSummary(BaseModel):
+    """Totals of the matching orders in one payment status"""
+    payment_status: str
+    order_count: int
+    revenue: float
+    item_quantity: int
+
+
+class OrderSummary(BaseModel):
+    """Response schema for the totals of an order search, without the orders"""
+    order_count: int
+    revenue: float
+    item_quantity: int
+    by_status: List[OrderStatusSummary]
+
 
 class ItemResponse(BaseModel):
     """Response schema for Item"""
@@ -94,3 +142,32 @@ class ItemResponse(BaseModel):
         "from_attributes": True,
         "populate_by_name": True
     }
+
+
+class DailySalesResponse(BaseModel):
+    """Response schema for one day's sales in one payment status"""
+    day: date
+    payment_status: str
+    order_count: int
+    revenue: float
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class ItemSalesResponse(BaseModel):
+    """Response schema for an item's sales over a report period"""
+    item_id: int
+    item_name: str
+    quantity: int
+    revenue: float
+
+
+class SalesReport(BaseModel):
+    """Response schema for a sales report over a date range"""
+    start: date
+    end: date
+    payment_status: Optional[str] = None
+    days: List[DailySalesResponse]
+    items: List[ItemSalesResponse]
@@ -63,7 +63,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const itemCard = this.closest('.item-card');
             const itemId = itemCard.dataset.id;
             
-            fetch(`/api/items/${itemId}`)
+            fetch(`/api/items/${itemId}`, { cache: 'no-cache' })
                 .then(response => response.json())
                 .then(item => {
                     document.getElementById('item-id').value = item.id;
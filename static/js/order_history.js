@@ -0,0 +1,106 @@
+// Loads older orders into the history modal on demand.
+// The page only renders the most recent orders; each click fetches the next page from /api/orders.
+document.addEventListener('DOMContentLoaded', function() {
+    const historyList = document.getElementById('history-orders-list');
+    const loadMoreBtn = document.getElementById('history-load-more');
+    const HISTORY_PAGE_SIZE = 50;
+    
+    if (!historyList || !loadMoreBtn) {
+        return;
+    }
+    
+    loadMoreBtn.addEventListener('click', function() {
+        loadMoreBtn.disabled = true;
+        loadMoreBtn.textContent = 'Loading...';
+        
+        const params = new URLSearchParams({
+            limit: HISTORY_PAGE_SIZE,
+            cursor: loadMoreBtn.dataset.cursor
+        });
+        
+        // Revalidate with the browser cache's ETag rather than re-downloading unchanged pages
+        fetch(`/api/orders?${params.toString()}`, { cache: 'no-cache' })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load order history');
+                }
+                return response.json();
+            })
+            .then(page => {
+                page.orders.forEach(order => {
+                    historyList.insertBefore(createHistoryCard(order), loadMoreBtn);
+                });
+                
+                if (page.next_cursor) {
+                    loadMoreBtn.dataset.cursor = page.next_cursor;
+                    loadMoreBtn.disabled = false;
+                    loadMoreBtn.textContent = 'Load Older Orders';
+                } else {
+                    loadMoreBtn.remove();
+                }
+            })
+            .catch(error => {
+                console.error('Error loading order history:', error);
+                loadMoreBtn.disabled = false;
+                loadMoreBtn.textContent = 'Load Older Orders';
+            });
+    });
+});
+
+// Build a history card with the same markup as the server-rendered ones
+function createHistoryCard(order) {
+    const card = document.createElement('div');
+    card.className = 'order-card';
+    card.dataset.orderId = order.id;
+    
+    let statusHtml;
+    if (order.payment_status === 'completed') {
+        statusHtml = `
+            <p class="status completed">Payment: Completed</p>
+            <p class="payment-date">Paid on: ${formatOrderTimestamp(order.payment_date)}</p>`;
+    } else if (order.payment_status === 'cancelled') {
+        statusHtml = '<p class="status cancelled">Status: Cancelled</p>';
+    } else {
+        statusHtml = '<p class="status pending">Payment: Pending</p>';
+    }
+    
+    const itemsHtml = order.items && order.items.length > 0
+        ? order.items.map(item => `
+            <li>
+                ${escapeHtml(item.item_name)} - ${item.quantity} x ₹${item.unit_price} = ₹${item.subtotal}
+            </li>`).join('')
+        : '<li>No item details available</li>';
+    
+    card.innerHTML = `
+        <div class="order-header">
+            <h3>Order #${order.id}</h3>
+            <span class="date">Order: ${formatOrderTimestamp(order.order_date)}</span>
+        </div>
+        <div class="order-details">
+            <p>Total: ₹${order.total_price}</p>
+            <p class="order-date">Order Date: ${formatOrderTimestamp(order.order_date)}</p>
+            ${statusHtml}
+            
+            <div class="order-items-details">
+                <h4>Order Items:</h4>
+                <ul class="order-items-list">${itemsHtml}</ul>
+            </div>
+        </div>
+    `;
+    return card;
+}
+
+// Format an ISO timestamp as "YYYY-MM-DD HH:MM:SS" like the templates do
+function formatOrderTimestamp(isoString) {
+    if (!isoString) return 'N/A';
+    
+    const [datePart, timePart = ''] = isoString.split('T');
+    return `${datePart} ${timePart.split('.')[0]}`;
+}
+
+// Escape user-provided text before inserting it as HTML
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
@@ -2,6 +2,44 @@
 let popupContainer;
 let items = [];
 let cartItems = [];
+let liveUpdates = null;
+
+// Fetch JSON with a conditional request. The last response for each URL is kept
+// with its ETag in sessionStorage; when the server answers 304 Not Modified the
+// stored copy is reused instead of downloading and parsing the payload again.
+function fetchJsonConditional(url) {
+    const cacheKey = `etag-cache:${url}`;
+    let stored = null;
+    try {
+        stored = JSON.parse(sessionStorage.getItem(cacheKey));
+    } catch (e) {
+        stored = null;
+    }
+    
+    const headers = stored ? { 'If-None-Match': stored.etag } : {};
+    return fetch(url, { headers: headers, cache: 'no-store' })
+        .then(response => {
+            if (response.status === 304 && stored) {
+                return stored.data;
+            }
+            if (!response.ok) {
+                return response.json().then(data => {
+                    throw new Error(data.detail || `Request failed: ${response.status}`);
+                });
+            }
+            return response.json().then(data => {
+                const etag = response.headers.get('ETag');
+                if (etag) {
+                    try {
+                        sessionStorage.setItem(cacheKey, JSON.stringify({ etag: etag, data: data }));
+                    } catch (e) {
+                        // Storage full or unavailable; the next request is simply unconditional
+                    }
+                }
+                return data;
+            });
+        });
+}
 
 document.addEventListener('DOMContentLoaded', function() {
     // DOM Elements
@@ -13,7 +51,6 @@ document.addEventListener('DOMContentLoaded', function() {
     const emptyCartMessage = document.getElementById('empty-cart-message');
     const summaryTotalPrice = document.getElementById('summary-total-price');
     const addToCartBtn = document.getElementById('add-to-cart-btn');
-    const paymentForms = document.querySelectorAll('.payment-form');
     const submitOrderBtn = document.getElementById('submit-order-btn');
     const paymentDoneBtn = document.getElementById('payment-done-btn');
     
@@ -80,37 +117,31 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    // Add event listeners to all payment forms
-    paymentForms.forEach(form => {
-        form.addEventListener('submit', function(e) {
+    // Payment and cancel forms, including those on cards added by live updates
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        if (form.classList.contains('payment-form')) {
             e.preventDefault();
             showConfirmationPopup(
                 'Mark as Paid',
                 'Are you sure you want to mark this order as paid?',
                 'green',
-                () => {
-                    form.submit();
-                }
+                () => submitOrderAction(form, 'Order marked as paid', 'green')
             );
-        });
-    });
-    
-    // Add event listeners to all cancel forms
-    const cancelForms = document.querySelectorAll('.cancel-form');
-    cancelForms.forEach(form => {
-        form.addEventListener('submit', function(e) {
+        } else if (form.classList.contains('cancel-form')) {
             e.preventDefault();
             showConfirmationPopup(
                 'Cancel Order',
                 'Are you sure you want to cancel this order? This action cannot be undone.',
                 'red',
-                () => {
-                    form.submit();
-                }
+                () => submitOrderAction(form, 'Order cancelled', 'red')
             );
-        });
+        }
     });
     
+    // Patch the page with changes made from any terminal
+    connectLiveUpdates();
+    
     // Sidebar toggle
     if (sidebarToggle && sidebar) {
         sidebarToggle.addEventListener('click', function() {
@@ -145,8 +176,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Function to fetch search results
     function fetchSearchResults(query) {
-        fetch(`/api/search-items?query=${encodeURIComponent(query)}`)
-            .then(response => response.json())
+        fetchJsonConditional(`/api/search-items?query=${encodeURIComponent(query)}`)
             .then(data => {
                 displaySearchResults(data);
             })
@@ -201,8 +231,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Fetch all items on page load
     if (itemSelect) {
-        fetch('/api/items')
-            .then(response => response.json())
+        fetchJsonConditional('/api/items')
             .then(data => {
                 items = data;
                 console.log('Items loaded:', items.length);
@@ -453,10 +482,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 cartItems = [];
                 updateCartDisplay();
                 
-                // Reload page after a short delay
-                setTimeout(() => {
-                    window.location.reload();
-                }, 1500);
+                // The new order and stock levels arrive as live updates; reload only without them
+                if (!liveUpdatesConnected()) {
+                    setTimeout(() => {
+                        window.location.reload();
+                    }, 1500);
+                }
             })
             .catch(error => {
                 console.error('Error creating order:', error);
@@ -495,6 +526,211 @@ document.addEventListener('DOMContentLoaded', function() {
     // Use the global showConfirmationPopup and showAlert functions
 });
 
+// Mark an order as paid or cancel it without leaving the page
+function submitOrderAction(form, successMessage, color) {
+    fetch(form.action, { method: 'POST', headers: { 'Accept': 'application/json' } })
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(data => {
+                    throw new Error(data.detail || 'Failed to update order');
+                });
+            }
+            return response.json();
+        })
+        .then(data => {
+            showAlert(successMessage, color);
+            // Either way the order leaves the pending list; its new state arrives as a live update
+            removeOrderCard(document.getElementById('pending-orders-list'), data.order_id, 'No pending payments.');
+            if (!liveUpdatesConnected()) {
+                setTimeout(() => {
+                    window.location.reload();
+                }, 1500);
+            }
+        })
+        .catch(error => {
+            console.error('Error updating order:', error);
+            showAlert(error.message, 'red');
+        });
+}
+
+// Live updates: every committed order and stock change is pushed over
+// Server-Sent Events from /api/events and patched into the page in place.
+// The page's last event id makes the stream replay anything committed between
+// rendering the page and connecting; the browser resumes from the last event
+// it received after a dropped connection.
+function connectLiveUpdates() {
+    if (!window.EventSource || !document.getElementById('pending-orders-list')) {
+        return;
+    }
+    
+    const lastEventId = document.body.dataset.lastEventId;
+    const url = lastEventId ? `/api/events?last_event_id=${encodeURIComponent(lastEventId)}` : '/api/events';
+    liveUpdates = new EventSource(url);
+    
+    liveUpdates.addEventListener('order', event => applyOrderUpdate(JSON.parse(event.data).order));
+    liveUpdates.addEventListener('order_deleted', event => {
+        const orderId = JSON.parse(event.data).order_id;
+        removeOrderCard(document.getElementById('pending-orders-list'), orderId, 'No pending payments.');
+        removeOrderCard(document.getElementById('history-orders-list'), orderId, 'No order history yet.');
+    });
+    liveUpdates.addEventListener('stock', event => {
+        JSON.parse(event.data).items.forEach(item => applyStockUpdate(item.id, item.remaining_quantity));
+    });
+    liveUpdates.addEventListener('items', reloadItemOptions);
+    // Changes were missed (server restart, or too far behind); start over from a fresh page
+    liveUpdates.addEventListener('resync', () => window.location.reload());
+}
+
+function liveUpdatesConnected() {
+    return liveUpdates !== null && liveUpdates.readyState === EventSource.OPEN;
+}
+
+// Show an order's current state in the pending list and the history
+function applyOrderUpdate(order) {
+    const pendingList = document.getElementById('pending-orders-list');
+    if (order.payment_status === 'pending') {
+        // Pending payments are listed oldest first, so new ones go to the end
+        upsertOrderCard(pendingList, createPendingCard(order), false);
+    } else {
+        removeOrderCard(pendingList, order.id, 'No pending payments.');
+    }
+    
+    // History is newest first; cards for new orders go before the older ones
+    const historyList = document.getElementById('history-orders-list');
+    if (historyList) {
+        upsertOrderCard(historyList, createHistoryCard(order), true);
+    }
+}
+
+// Replace the card of the same order, or add it at the top or the end of the list
+function upsertOrderCard(list, card, atTop) {
+    const existing = list.querySelector(`.order-card[data-order-id="${card.dataset.orderId}"]`);
+    if (existing) {
+        list.replaceChild(card, existing);
+        return;
+    }
+    
+    const placeholder = list.querySelector('.no-orders');
+    if (placeholder) {
+        placeholder.remove();
+    }
+    
+    const firstCard = list.querySelector('.order-card');
+    const loadMoreBtn = list.querySelector('#history-load-more');
+    if (atTop && firstCard) {
+        list.insertBefore(card, firstCard);
+    } else if (loadMoreBtn) {
+        list.insertBefore(card, loadMoreBtn);
+    } else {
+        list.appendChild(card);
+    }
+}
+
+// Remove an order's card, putting back the empty list message if it was the last one
+function removeOrderCard(list, orderId, emptyMessage) {
+    if (!list) return;
+    
+    const card = list.querySelector(`.order-card[data-order-id="${orderId}"]`);
+    if (!card) return;
+    
+    card.remove();
+    if (!list.querySelector('.order-card')) {
+        const placeholder = document.createElement('p');
+        placeholder.className = 'no-orders';
+        placeholder.textContent = emptyMessage;
+        list.insertBefore(placeholder, list.firstChild);
+    }
+}
+
+// Build a pending order card with the same markup as the server-rendered ones
+function createPendingCard(order) {
+    const card = document.createElement('div');
+    card.className = 'order-card';
+    card.dataset.orderId = order.id;
+    
+    const itemsHtml = order.items && order.items.length > 0
+        ? order.items.map(item => `
+            <li>
+                ${escapeHtml(item.item_name)} - ${item.quantity} x ₹${item.unit_price} = ₹${item.subtotal}
+            </li>`).join('')
+        : '<li>No item details available</li>';
+    
+    card.innerHTML = `
+        <div class="order-header">
+            <h3>Order #${order.id}</h3>
+            <span class="date">Order: ${formatOrderTimestamp(order.order_date)}</span>
+        </div>
+        <div class="order-details">
+            <p>Total: ₹${order.total_price}</p>
+            <p class="order-date">Order Date: ${formatOrderTimestamp(order.order_date)}</p>
+            <p class="status pending">Payment: Pending</p>
+            
+            <div class="order-items-details">
+                <h4>Order Items:</h4>
+                <ul class="order-items-list">${itemsHtml}</ul>
+            </div>
+            
+            <div class="order-actions">
+                <form action="/api/update-payment-status/${order.id}" method="post" class="payment-form">
+                    <button type="submit" class="mark-paid-btn">Mark as Paid</button>
+                </form>
+                <form action="/api/cancel-order/${order.id}" method="post" class="cancel-form">
+                    <button type="submit" class="cancel-btn">Cancel Order</button>
+                </form>
+            </div>
+        </div>
+    `;
+    return card;
+}
+
+// Item select option text, matching the server-rendered options
+function itemOptionText(item) {
+    const stock = item.remaining_quantity !== null ? ` (${item.remaining_quantity} in stock)` : '';
+    return `${item.item_name} - ₹${item.price_per_quantity}${stock}`;
+}
+
+// Show a new stock level in the item select and the loaded item list
+function applyStockUpdate(itemId, remainingQuantity) {
+    const item = items.find(candidate => candidate.id === itemId);
+    if (item) {
+        item.remaining_quantity = remainingQuantity;
+    }
+    
+    const option = document.querySelector(`#item-select option[value="${itemId}"]`);
+    if (option) {
+        option.dataset.stock = remainingQuantity;
+        option.textContent = itemOptionText({
+            item_name: option.dataset.name,
+            price_per_quantity: option.dataset.price,
+            remaining_quantity: remainingQuantity
+        });
+    }
+}
+
+// The catalog changed (items added, edited, removed or restocked); rebuild the item select
+function reloadItemOptions() {
+    const itemSelect = document.getElementById('item-select');
+    if (!itemSelect) return;
+    
+    fetchJsonConditional('/api/items')
+        .then(data => {
+            items = data;
+            const selected = itemSelect.value;
+            itemSelect.querySelectorAll('option[value]:not([value=""])').forEach(option => option.remove());
+            data.forEach(item => {
+                const option = document.createElement('option');
+                option.value = item.id;
+                option.dataset.name = item.item_name;
+                option.dataset.price = item.price_per_quantity;
+                option.dataset.stock = item.remaining_quantity;
+                option.textContent = itemOptionText(item);
+                itemSelect.appendChild(option);
+            });
+            itemSelect.value = selected;
+        })
+        .catch(error => console.error('Error reloading items:', error));
+}
+
 // Get sidebar element
 const sidebar = document.querySelector('.sidebar');
 
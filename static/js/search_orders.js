@@ -11,6 +11,14 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize filter state
     let filtersVisible = true;
     
+    // Pagination state for the current search
+    const PAGE_SIZE = 50;
+    let currentParams = new URLSearchParams();
+    let nextCursor = null;
+    let loadedCount = 0;
+    // Totals of the whole current search, from /api/search-orders/summary
+    let currentSummary = null;
+    
     // Set initial state of filters panel
     if (searchFilters) {
         searchFilters.style.maxHeight = searchFilters.scrollHeight + 'px';
@@ -52,27 +60,94 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
         
-        // Make API request
-        fetch(`/api/search-orders?${params.toString()}`)
-            .then(response => response.json())
-            .then(orders => {
-                displayResults(orders);
+        // Fetch the first page of results, and the totals alongside it
+        currentParams = params;
+        fetchSummary();
+        fetchOrdersPage(false).catch(error => {
+            console.error('Error searching orders:', error);
+            searchResults.innerHTML = '<p class="no-results">Error searching orders. Please try again.</p>';
+        });
+    }
+    
+    // Function to fetch the count, revenue and units of the current search without its orders
+    function fetchSummary() {
+        currentSummary = null;
+        const params = currentParams.toString();
+        
+        fetchJsonConditional(`/api/search-orders/summary?${params}`)
+            .then(summary => {
+                // Ignore totals of a search that has since been replaced
+                if (params !== currentParams.toString()) {
+                    return;
+                }
+                currentSummary = summary;
+                updateResultsCount();
             })
             .catch(error => {
-                console.error('Error searching orders:', error);
-                searchResults.innerHTML = '<p class="no-results">Error searching orders. Please try again.</p>';
+                console.error('Error loading search totals:', error);
+            });
+    }
+    
+    // Function to show how many orders are loaded, with the search totals once known
+    function updateResultsCount() {
+        if (currentSummary) {
+            const units = currentSummary.item_quantity;
+            resultsCount.textContent = `${loadedCount} of ${currentSummary.order_count} order(s) shown · ` +
+                `₹${currentSummary.revenue.toFixed(2)} · ${units} unit(s)`;
+        } else {
+            resultsCount.textContent = nextCursor
+                ? `${loadedCount} order(s) loaded, more available`
+                : `${loadedCount} order(s) found`;
+        }
+    }
+    
+    // Function to fetch one page of orders for the current search
+    function fetchOrdersPage(append) {
+        const pageParams = new URLSearchParams(currentParams);
+        pageParams.set('limit', PAGE_SIZE);
+        if (append && nextCursor) {
+            pageParams.set('cursor', nextCursor);
+        }
+        
+        return fetchJsonConditional(`/api/search-orders?${pageParams.toString()}`)
+            .then(page => {
+                nextCursor = page.next_cursor;
+                displayResults(page.orders, append);
             });
     }
     
+    // Function to load the next page of results
+    function loadMoreOrders(button) {
+        button.disabled = true;
+        button.textContent = 'Loading...';
+        
+        fetchOrdersPage(true).catch(error => {
+            console.error('Error loading more orders:', error);
+            button.disabled = false;
+            button.textContent = 'Load More Orders';
+        });
+    }
+    
     // Function to display search results
-    function displayResults(orders) {
-        // Update results count
-        resultsCount.textContent = `${orders.length} order(s) found`;
+    function displayResults(orders, append = false) {
+        if (append) {
+            // Drop the previous "load more" button before adding the next page
+            const loadMoreBtn = searchResults.querySelector('.load-more-btn');
+            if (loadMoreBtn) {
+                loadMoreBtn.remove();
+            }
+        } else {
+            // Clear previous results
+            searchResults.innerHTML = '';
+            loadedCount = 0;
+        }
         
-        // Clear previous results
-        searchResults.innerHTML = '';
+        loadedCount += orders.length;
         
-        if (orders.length === 0) {
+        // Update results count
+        updateResultsCount();
+        
+        if (loadedCount === 0) {
             searchResults.innerHTML = '<p class="no-results">No orders found matching your criteria.</p>';
             return;
         }
@@ -186,6 +261,15 @@ document.addEventListener('DOMContentLoaded', function() {
             
             searchResults.appendChild(orderCard);
         });
+        
+        // Offer the next page if there is one
+        if (nextCursor) {
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.className = 'quick-search-btn load-more-btn';
+            loadMoreBtn.textContent = 'Load More Orders';
+            loadMoreBtn.addEventListener('click', () => loadMoreOrders(loadMoreBtn));
+            searchResults.appendChild(loadMoreBtn);
+        }
     }
     
     // Function to reset the form
@@ -199,6 +283,10 @@ document.addEventListener('DOMContentLoaded', function() {
             </div>
         `;
         resultsCount.textContent = '';
+        currentParams = new URLSearchParams();
+        currentSummary = null;
+        nextCursor = null;
+        loadedCount = 0;
         
         // Re-attach event listener to the new button
         const newQuickSearchBtn = document.getElementById('quick-search-all');
@@ -232,16 +320,13 @@ document.addEventListener('DOMContentLoaded', function() {
         // Reset form fields
         searchForm.reset();
         
-        // Make API request without any parameters
-        fetch('/api/search-orders')
-            .then(response => response.json())
-            .then(orders => {
-                displayResults(orders);
-            })
-            .catch(error => {
-                console.error('Error fetching orders:', error);
-                searchResults.innerHTML = '<p class="no-results">Error loading orders. Please try again.</p>';
-            });
+        // Fetch the first page without any filters
+        currentParams = new URLSearchParams();
+        fetchSummary();
+        fetchOrdersPage(false).catch(error => {
+            console.error('Error fetching orders:', error);
+            searchResults.innerHTML = '<p class="no-results">Error loading orders. Please try again.</p>';
+        });
     }
     
     // Helper function to format date from ISO string
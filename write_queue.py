@@ -0,0 +1,125 @@
+"""
+Group commit for order writes.
+
+SQLite lets one connection write at a time. During a rush, every request on
+the commit-per-request path waits for the write lock on its own (busy_timeout
+polls for it with growing sleeps) and then pays for its own commit. A
+WriteQueue instead hands the writes to one background task, which gathers
+whatever arrives within a short window and applies the whole batch in a
+single transaction: one lock, one commit. database.py runs each write of a
+batch in its own SAVEPOINT, so a write that fails is undone alone and every
+caller gets its own result or exception.
+
+Like the caches, a queue only groups the writes of one worker process.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+# One write: the coroutine function to run, called as operation(db, *args), and its arguments
+Write = Tuple[Callable[..., Awaitable[Any]], tuple]
+# Outcome of one write: (result, None) or (None, exception)
+Outcome = Tuple[Any, Optional[BaseException]]
+
+
+class _Pending:
+    """A submitted write and the future its caller is waiting on"""
+
+    __slots__ = ("operation", "args", "future")
+
+    def __init__(self, operation, args, future: asyncio.Future):
+        self.operation = operation
+        self.args = args
+        self.future = future
+
+
+class WriteQueue:
+    """
+    Batches writes from concurrent callers into shared transactions.
+
+    `apply_batch` receives a list of writes, applies and commits them, and
+    returns one outcome per write. The writer task waits `window_seconds`
+    after the first write of a batch for others to join, and takes at most
+    `max_batch` writes per transaction; writes that arrive while a batch is
+    being applied simply wait for the next one.
+    """
+
+    def __init__(
+        self,
+        apply_batch: Callable[[List[Write]], Awaitable[List[Outcome]]],
+        window_seconds: float = 0.002,
+        max_batch: int = 64,
+    ):
+        self.apply_batch = apply_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, operation: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Run `operation(db, *args)` in the next batch and return its result.
+
+        Exceptions raised by the operation, or by the commit of its batch, are
+        raised here. A caller that is cancelled does not withdraw its write.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First write, or first on a new event loop
+            self._start(loop)
+        future = loop.create_future()
+        self._queue.put_nowait(_Pending(operation, args, future))
+        return await future
+
+    async def close(self):
+        """Apply the writes already queued, then stop the writer task"""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._queue = self._task = self._loop = None
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        # A fresh context, so the writer's queries are not counted against
+        # the request that happened to start it
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            if self.window_seconds > 0:
+                await asyncio.sleep(self.window_seconds)
+
+            batch = [first]
+            closing = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                pending = self._queue.get_nowait()
+                if pending is None:
+                    closing = True
+                    break
+                batch.append(pending)
+
+            await self._apply(batch)
+            if closing:
+                return
+
+    async def _apply(self, batch: List[_Pending]):
+        try:
+            outcomes = await self.apply_batch([(pending.operation, pending.args) for pending in batch])
+        except Exception as exc:
+            # The batch did not commit, so none of its writes happened
+            outcomes = [(None, exc)] * len(batch)
+
+        for pending, (result, error) in zip(batch, outcomes):
+            if pending.future.done():
+                continue
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)